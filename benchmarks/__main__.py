@@ -0,0 +1,80 @@
+"""
+Benchmark suite for the simulator.
+
+Run a sweep and save the results:
+    python -m benchmarks run --preset quick --output bench.json
+Compare a run against a stored baseline, exiting with 1 if anything regressed:
+    python -m benchmarks compare baseline.json bench.json
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.compare import THRESHOLD, compare_results
+from benchmarks.engines import RUN_ENGINES
+from benchmarks.suite import PRESETS, run_suite
+
+
+def print_result(result: dict):
+    if "error" in result:
+        print(f"{result['name']:<45} failed: {result['error']}", file=sys.stderr)
+        return
+    p99 = result["latency_ns"]["p99"]
+    p99 = f"{p99:,}" if p99 is not None else "-"
+    # Each call of a run engine is a whole ensemble rather than a tick
+    unit = "runs/s" if result["engine"] in RUN_ENGINES else "ticks/s"
+    print(
+        f"{result['name']:<45} {result['ticks_per_second']:>14,.0f} {unit:<7} "
+        f"p99 {p99:>12} ns  peak {result['peak_memory_bytes']:>14,} B",
+        file=sys.stderr
+    )
+
+
+def run(args) -> int:
+    preset = dict(PRESETS[args.preset])
+    if args.max_seconds:
+        preset["max_seconds"] = args.max_seconds
+    results = run_suite(preset, print_result)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        comparisons = compare_results(json.load(baseline_file), json.load(current_file), args.threshold)
+    for comparison in comparisons:
+        flag = "REGRESSION" if comparison["is_regression"] else "ok"
+        print(
+            f"{comparison['name']:<45} speed x{comparison['speed_ratio']:.2f} "
+            f"memory x{comparison['memory_ratio']:.2f} {flag}"
+        )
+    return 1 if any(comparison["is_regression"] for comparison in comparisons) else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run a benchmark sweep and write the results as JSON")
+    run_parser.add_argument("--preset", choices=PRESETS, default="quick", help="Which sweep to run")
+    run_parser.add_argument("-o", "--output", help="File to write the JSON results to, defaults to stdout")
+    run_parser.add_argument("--max-seconds", type=float, help="Time budget per case, overriding the preset's")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Flag regressions against a baseline run")
+    compare_parser.add_argument("baseline", help="JSON results of the baseline run")
+    compare_parser.add_argument("current", help="JSON results of the run to check")
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                                help="Relative slow down or memory growth counted as a regression")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Compares replica-ticks/sec of the object model (one Factory per replica) against the NumPy BatchFactory.
+
+Run with: python -m benchmarks.batch_engine
+"""
+import time
+
+from factory_simulator import batch, ensemble
+
+BELT_LENGTH = 3
+TICKS = 100
+OBJECT_REPLICAS = 200
+BATCH_REPLICAS = (1_000, 10_000, 100_000)
+
+
+def replica_ticks_per_second(run, replicas: int) -> float:
+    start = time.perf_counter()
+    run(replicas)
+    return replicas * TICKS / (time.perf_counter() - start)
+
+
+def run_object_model(replicas: int):
+    for replica in range(replicas):
+        ensemble.run_replica(BELT_LENGTH, TICKS, replica)
+
+
+def run_batch_engine(replicas: int):
+    batch.run_batch(BELT_LENGTH, TICKS, replicas, seed=0)
+
+
+def main():
+    object_rate = replica_ticks_per_second(run_object_model, OBJECT_REPLICAS)
+    print(f"{'engine':>8} {'replicas':>10} {'replica-ticks/sec':>18} {'speed-up':>9}")
+    print(f"{'object':>8} {OBJECT_REPLICAS:>10} {object_rate:>18,.0f} {1:>8.1f}x")
+    for replicas in BATCH_REPLICAS:
+        batch_rate = replica_ticks_per_second(run_batch_engine, replicas)
+        print(f"{'batch':>8} {replicas:>10} {batch_rate:>18,.0f} {batch_rate / object_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
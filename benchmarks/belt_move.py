@@ -0,0 +1,30 @@
+"""
+Measures Belt.move ticks/sec across belt lengths. With the circular buffer a move is O(1), so the rate should stay
+flat as the belt gets longer.
+
+Run with: python -m benchmarks.belt_move
+"""
+import timeit
+
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item
+
+BELT_LENGTHS = (3, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+MOVES = 100_000
+
+
+def time_moves(belt_length: int, moves: int = MOVES) -> float:
+    belt = Belt()
+    belt.slots = [Item.EMPTY] * belt_length
+    return timeit.timeit(lambda: belt.move(Item.A), number=moves)
+
+
+def main():
+    print(f"{'belt length':>12} {'moves/sec':>14}")
+    for belt_length in BELT_LENGTHS:
+        seconds = time_moves(belt_length)
+        print(f"{belt_length:>12} {MOVES / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Compares a benchmark run against a stored baseline, flagging cases whose throughput dropped or peak memory grew by
+more than a threshold.
+"""
+from typing import List
+
+THRESHOLD = 0.1
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = THRESHOLD) -> List[dict]:
+    baseline_results = {result["name"]: result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        baseline_result = baseline_results.get(result["name"])
+        if baseline_result is None or "error" in baseline_result:
+            continue
+        if "error" in result:
+            # A case that used to run and now fails is the worst regression of all
+            comparisons.append({
+                "name": result["name"], "speed_ratio": 0.0, "memory_ratio": 1.0, "is_regression": True
+            })
+            continue
+        speed_ratio = _get_ratio(result["ticks_per_second"], baseline_result["ticks_per_second"])
+        memory_ratio = _get_ratio(result["peak_memory_bytes"], baseline_result["peak_memory_bytes"])
+        comparisons.append({
+            "name": result["name"],
+            "speed_ratio": speed_ratio,
+            "memory_ratio": memory_ratio,
+            "is_regression": speed_ratio < 1 - threshold or memory_ratio > 1 + threshold,
+        })
+    return comparisons
+
+
+def _get_ratio(current: float, baseline: float) -> float:
+    if not baseline:
+        return 1.0 if not current else float("inf")
+    return current / baseline
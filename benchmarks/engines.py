@@ -0,0 +1,99 @@
+"""
+The engines the benchmark suite can time. Each one is a function taking a belt length and verbosity, and returning
+a zero argument callable that runs one tick, along with how many replica ticks each call runs.
+
+The ensemble and variance engines are whole runs rather than ticks: each call runs a short ensemble of replicas
+through the same code as -r, or -r with --compare, --antithetic and --control-variate, so their cost per replica tick
+can be compared with the single factory engines.
+"""
+import os
+from typing import Callable, Tuple
+
+from factory_simulator.batch import BatchFactory
+from factory_simulator.belt import Belt
+from factory_simulator.ensemble import run_ensemble
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.recipes import DEFAULT_RECIPES, RecipeBook, RecipeFactory
+from factory_simulator.rendering import Renderer
+from factory_simulator.transitions import TableFactory
+from factory_simulator.variance import run_variance_reduced
+from factory_simulator.vector import VectorFactory
+
+SEED = 0
+BATCH_REPLICAS = 1_000
+# The batch engine holds an array per replica per slot, so replicas are cut back on long belts to keep to this many
+BATCH_MAX_SLOTS = 10_000_000
+# Size of the runs the ensemble and variance engines make per call. They're run in this process, so the timings are of
+# the simulation rather than of starting a pool, which on a machine with one CPU they'd be run without anyway.
+RUN_REPLICAS = 4
+RUN_TICKS = 100
+# The variance engine compares against this configuration, fed the same inputs
+RUN_COMPARISON = {"assembly_ticks": 2}
+
+Tick = Callable[[], object]
+
+
+def make_factory(belt_length: int, is_verbose: bool = False) -> Tuple[Tick, int]:
+    factory = Factory(belt_length, Belt(RandomInputs(SEED)), is_silent=True)
+    if not is_verbose:
+        return factory.tick, 1
+    # Rendered the way -v does, to stdout as it is when the engine is made
+    renderer = Renderer()
+
+    def tick_and_render():
+        factory.tick()
+        renderer.render(factory)
+    return tick_and_render, 1
+
+
+def make_table_factory(belt_length: int, is_verbose: bool = False) -> Tuple[Tick, int]:
+    return TableFactory(belt_length, RandomInputs(SEED)).tick, 1
+
+
+def make_batch_factory(belt_length: int, is_verbose: bool = False) -> Tuple[Tick, int]:
+    replicas = max(1, min(BATCH_REPLICAS, BATCH_MAX_SLOTS // max(1, belt_length)))
+    return BatchFactory(replicas, belt_length, SEED).tick, replicas
+
+
+def make_vector_factory(belt_length: int, is_verbose: bool = False) -> Tuple[Tick, int]:
+    return VectorFactory(belt_length, RandomInputs(SEED)).tick, 1
+
+
+def make_recipe_factory(belt_length: int, is_verbose: bool = False) -> Tuple[Tick, int]:
+    # The default recipe book, so its cost can be compared with the object model it generalises
+    book = RecipeBook(DEFAULT_RECIPES["recipes"], DEFAULT_RECIPES["hands"])
+    return RecipeFactory(belt_length, book, book.make_inputs(SEED), is_silent=True).tick, 1
+
+
+def make_ensemble(belt_length: int, is_verbose: bool = False) -> Tuple[Tick, int]:
+    def run():
+        return run_ensemble(belt_length, RUN_TICKS, RUN_REPLICAS, SEED, max_workers=1)
+    return run, RUN_TICKS * RUN_REPLICAS
+
+
+def make_variance_reduced(belt_length: int, is_verbose: bool = False) -> Tuple[Tick, int]:
+    # Every replica runs both configurations
+    def run():
+        return run_variance_reduced(
+            belt_length, RUN_TICKS, RUN_REPLICAS, SEED, 1, comparison=RUN_COMPARISON, is_antithetic=True,
+            is_controlled=True
+        )
+    return run, RUN_TICKS * RUN_REPLICAS * 2
+
+
+ENGINES = {
+    "factory": make_factory,
+    "table": make_table_factory,
+    "batch": make_batch_factory,
+    "vector": make_vector_factory,
+    "recipe": make_recipe_factory,
+    "ensemble": make_ensemble,
+    "variance": make_variance_reduced,
+}
+# Only the object model has a verbose mode
+VERBOSE_ENGINES = ("factory",)
+# Engines whose calls are whole runs, so they're only benchmarked for the fewest calls, on belts up to this long
+RUN_ENGINES = ("ensemble", "variance")
+RUN_MAX_BELT_LENGTH = 100
+NULL_OUTPUT = os.devnull
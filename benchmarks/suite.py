@@ -0,0 +1,158 @@
+"""
+Runs a sweep of benchmark cases and records, for each one, throughput, per-tick latency percentiles and peak memory.
+
+Each case gets a time budget; cases that can't finish their ticks inside it stop early and record how many ticks they
+managed, so the full sweep up to million slot belts and ten million ticks still finishes in reasonable time. A case
+that fails, e.g. running out of memory, is recorded with its error and the sweep carries on.
+"""
+import contextlib
+import gc
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import product
+from typing import Dict, List, Optional
+
+from benchmarks.engines import ENGINES, NULL_OUTPUT, RUN_ENGINES, RUN_MAX_BELT_LENGTH, VERBOSE_ENGINES
+
+PRESETS = {
+    "quick": {
+        "engines": ("factory", "table", "batch", "vector", "recipe", "ensemble", "variance"),
+        "belt_lengths": (3, 100, 1_000),
+        "ticks": (100, 10_000),
+        "verbose": (False, True),
+        "max_seconds": 1.0,
+    },
+    "full": {
+        "engines": ("factory", "table", "batch", "vector", "recipe", "ensemble", "variance"),
+        "belt_lengths": (3, 10, 100, 1_000, 10_000, 100_000, 1_000_000),
+        "ticks": (100, 10_000, 1_000_000, 10_000_000),
+        "verbose": (False, True),
+        "max_seconds": 10.0,
+    },
+}
+# Ticks are run in chunks between checks of the time budget, starting at one tick and doubling for as long as a chunk
+# takes less than this, so slow ticks never run far past the budget and fast ones don't pay for a clock read each
+CHUNK_SECONDS = 0.01
+LATENCY_SAMPLE_TICKS = 10_000
+PERCENTILES = (50, 90, 99)
+
+
+def get_cases(preset: dict) -> List[dict]:
+    cases = []
+    for engine, belt_length, ticks, is_verbose in product(
+            preset["engines"], preset["belt_lengths"], preset["ticks"], preset["verbose"]
+    ):
+        # Verbose printing dwarfs everything else, so it's only measured on short runs of the object model
+        if is_verbose and (engine not in VERBOSE_ENGINES or ticks > min(preset["ticks"])):
+            continue
+        # Each call of a run engine is a whole ensemble, so only the fewest calls are timed, and only on belts short
+        # enough for those calls to fit in a case's time budget
+        if engine in RUN_ENGINES and (is_verbose or ticks > min(preset["ticks"]) or belt_length > RUN_MAX_BELT_LENGTH):
+            continue
+        cases.append({"engine": engine, "belt_length": belt_length, "ticks": ticks, "is_verbose": is_verbose})
+    return cases
+
+
+def get_case_name(case: dict) -> str:
+    output = "verbose" if case["is_verbose"] else "silent"
+    return f"{case['engine']}/belt={case['belt_length']}/ticks={case['ticks']}/{output}"
+
+
+def _run_ticks(tick, ticks: int, max_seconds: float) -> int:
+    now = time.perf_counter()
+    deadline = now + max_seconds
+    ticks_run, chunk_ticks = 0, 1
+    while ticks_run < ticks and now < deadline:
+        chunk_ticks = min(chunk_ticks, ticks - ticks_run)
+        chunk_start = now
+        for _ in range(chunk_ticks):
+            tick()
+        ticks_run += chunk_ticks
+        now = time.perf_counter()
+        if now - chunk_start < CHUNK_SECONDS:
+            chunk_ticks *= 2
+    return ticks_run
+
+
+def _get_percentile(sorted_samples: List[int], percentile: float) -> int:
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * percentile / 100))]
+
+
+def measure_throughput(case: dict, max_seconds: float) -> dict:
+    start = time.perf_counter()
+    tick, replicas = ENGINES[case["engine"]](case["belt_length"], case["is_verbose"])
+    set_up_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ticks_run = _run_ticks(tick, case["ticks"], max_seconds)
+    seconds = time.perf_counter() - start
+    return {
+        "set_up_seconds": set_up_seconds,
+        "ticks_run": ticks_run,
+        "seconds": seconds,
+        "ticks_per_second": ticks_run / seconds if seconds else 0.0,
+        "replica_ticks_per_second": ticks_run * replicas / seconds if seconds else 0.0,
+    }
+
+
+def measure_latency(case: dict, max_seconds: float) -> Dict[str, Optional[int]]:
+    # Times ticks one at a time on a fresh engine. Only a bounded sample is kept, so long cases don't hold a timing
+    # per tick in memory.
+    tick, _ = ENGINES[case["engine"]](case["belt_length"], case["is_verbose"])
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < min(case["ticks"], LATENCY_SAMPLE_TICKS) and time.perf_counter() < deadline:
+        start = time.perf_counter_ns()
+        tick()
+        samples.append(time.perf_counter_ns() - start)
+    if not samples:
+        return dict.fromkeys([*(f"p{percentile}" for percentile in PERCENTILES), "max"])
+    samples.sort()
+    latency = {f"p{percentile}": _get_percentile(samples, percentile) for percentile in PERCENTILES}
+    latency["max"] = samples[-1]
+    return latency
+
+
+def measure_peak_memory(case: dict, max_seconds: float) -> int:
+    # Includes building the engine, as that's where long belts spend most of their memory
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tick, _ = ENGINES[case["engine"]](case["belt_length"], case["is_verbose"])
+        _run_ticks(tick, case["ticks"], max_seconds)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_case(case: dict, max_seconds: float) -> dict:
+    with open(NULL_OUTPUT, "w") as null_output, contextlib.redirect_stdout(null_output):
+        result = {"name": get_case_name(case), **case}
+        result.update(measure_throughput(case, max_seconds))
+        result["latency_ns"] = measure_latency(case, max_seconds)
+        result["peak_memory_bytes"] = measure_peak_memory(case, max_seconds)
+    return result
+
+
+def run_suite(preset: dict, on_result=None) -> dict:
+    results = []
+    for case in get_cases(preset):
+        try:
+            result = run_case(case, preset["max_seconds"])
+        except Exception as error:
+            result = {"name": get_case_name(case), **case, "error": f"{type(error).__name__}: {error}"}
+        results.append(result)
+        if on_result:
+            on_result(result)
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "max_seconds": preset["max_seconds"],
+        },
+        "results": results,
+    }
@@ -0,0 +1,28 @@
+"""
+Compares ticks/sec of Factory, stepping Worker objects, against TableFactory, stepping the transition table.
+
+Run with: python -m benchmarks.table_engine
+"""
+import timeit
+
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.belt import Belt
+from factory_simulator.transitions import TableFactory
+
+BELT_LENGTHS = (3, 30, 300)
+TICKS = 20_000
+
+
+def main():
+    print(f"{'belt length':>12} {'Factory ticks/sec':>18} {'TableFactory ticks/sec':>23} {'speed-up':>9}")
+    for belt_length in BELT_LENGTHS:
+        factory = Factory(belt_length, Belt(RandomInputs(0)), is_silent=True)
+        table_factory = TableFactory(belt_length, RandomInputs(0))
+        factory_rate = TICKS / timeit.timeit(factory.tick, number=TICKS)
+        table_rate = TICKS / timeit.timeit(table_factory.tick, number=TICKS)
+        print(f"{belt_length:>12} {factory_rate:>18,.0f} {table_rate:>23,.0f} {table_rate / factory_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
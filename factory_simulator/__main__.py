@@ -1,25 +1,165 @@
 import argparse
 from factory_simulator import main as factorio
+from factory_simulator.variance import parse_comparison
 
 
-def main():
-    # Get command line arguments
-    parser = argparse.ArgumentParser()
+def get_parser() -> argparse.ArgumentParser:
+    # Shared with the daemon, so jobs sent to it take exactly the same options as a run from the command line
+    parser = argparse.ArgumentParser(prog="python -m factory_simulator")
+    # Each of these picks a different kind of run, so only one can be given. A sweep, over any of the sweep options,
+    # is one more, checked by check_modes as argparse can't group them.
+    modes = parser.add_mutually_exclusive_group()
     parser.add_argument("-v", "--is-verbose", action="store_true",
                         help="Whether the state of the factory should be printed every tick - No effect on stepped run")
-    parser.add_argument("-s", "--is-stepped", action="store_true",
-                        help="Whether to run a simulation with the ability to manually step through it,"
-                             "tick by tick")
+    modes.add_argument("-s", "--is-stepped", action="store_true",
+                       help="Whether to run a simulation with the ability to manually step through it,"
+                            "tick by tick")
     parser.add_argument("-b", "--belt-length", type=int,
                         help="How many slots the belt has, and consequentially, how many pairs of workers there are")
     parser.add_argument("-t", "--ticks", type=int,
                         help="How many ticks the simulation should run for - No effect on stepped run")
     parser.add_argument("-a", "--assembly-ticks", type=int,
-                        help="How many ticks it takes to assemble a product - Not yet fully implemented in module")
+                        help="How many ticks it takes to assemble a product")
+    modes.add_argument("-r", "--replicas", type=int,
+                       help="Run this many independent replicas in parallel and report aggregate statistics"
+                            " - No effect on stepped run")
+    parser.add_argument("--seed", type=int,
+                        help="Seed for the run's inputs, making it reproducible")
+    parser.add_argument("--compare", type=parse_comparison, metavar="KEY=N",
+                        help="Also run replicas with belt_length=N or assembly_ticks=N, fed the same inputs as the"
+                             " others (common random numbers), and report the difference in products - Only used"
+                             " with --replicas")
+    parser.add_argument("--antithetic", action="store_true",
+                        help="Run replicas in pairs, the second fed the mirror image of the first's inputs"
+                             " - Only used with an even number of --replicas")
+    parser.add_argument("--control-variate", action="store_true",
+                        help="Adjust each replica's products for how many components it was fed, against the number"
+                             " expected - Only used with --replicas")
+    parser.add_argument("-p", "--processes", type=int,
+                        help="How many processes to run replicas over, defaults to the CPU count"
+                             " - Only used with --replicas or --batch")
+    modes.add_argument("--analytic", action="store_true",
+                       help="Solve for the exact long run output rates instead of simulating - Only practical for"
+                            " belts of up to 3 slots, with 1 tick assembly")
+    parser.add_argument("-i", "--instrument", action="store_true",
+                        help="Report time spent per phase of a tick and what each worker spent their ticks doing"
+                             " - Only used with a set tick run")
+    parser.add_argument("--latency", action="store_true",
+                        help="Report how long components wait to be picked up and products take to come off the belt,"
+                             " as counts, means and quantiles - Only used with a set tick run, instead of -i")
+    modes.add_argument("-c", "--checkpoint", metavar="PATH",
+                       help="Checkpoint the run to this file as it goes, resuming from it if it already exists, when"
+                            " it must be of the same -b and -a - Only used with a set tick run, without -v, -i,"
+                            " --trace, --latency or --seed")
+    parser.add_argument("--checkpoint-every", type=float, metavar="SECONDS",
+                        help="How often to write a checkpoint, defaults to every 5 seconds - Only used with --checkpoint")
+    parser.add_argument("--sweep-belt-lengths", type=int, nargs="+", metavar="LENGTH",
+                        help="Sweep over these belt lengths, running every combination of the swept values and"
+                             " printing a table - Results are cached on disk, so points already run are reused")
+    parser.add_argument("--sweep-ticks", type=int, nargs="+", metavar="TICKS",
+                        help="Sweep over these tick counts")
+    parser.add_argument("--sweep-assembly-ticks", type=int, nargs="+", metavar="TICKS",
+                        help="Sweep over these assembly ticks")
+    parser.add_argument("--sweep-seeds", type=int, nargs="+", metavar="SEED",
+                        help="Sweep over these seeds")
+    parser.add_argument("--render-every", type=int, metavar="N",
+                        help="Only render the factory's state every N ticks - Only used with -v")
+    parser.add_argument("--render-file", metavar="PATH",
+                        help="Render the factory's state to this file instead of the terminal - Only used with -v")
+    parser.add_argument("--redraw", action="store_true",
+                        help="Redraw the factory's state in place on the terminal, rather than scrolling"
+                             " - Only used with -v")
+    parser.add_argument("--render-thread", action="store_true",
+                        help="Format and write the factory's state on a background thread, which helps when the output"
+                             " is slow to write, e.g. a terminal - Only used with -v")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record every tick of the run to this file, to replay any tick of it later with"
+                             " python -m factory_simulator.trace - Only used with a set tick run")
+    modes.add_argument("--tolerance", type=float,
+                       help="Run until the 95%% confidence interval of products per tick is within +/- this, with"
+                            " any -t as a limit on ticks - Uses --seed if given")
+    modes.add_argument("--segments", type=int, metavar="N",
+                       help="Split the belt into N segments, each stepped by its own process, for very long belts"
+                            " - Same result as a set tick run, which it's used instead of")
+    parser.add_argument("--arrivals", metavar="SPEC",
+                        help="How inputs arrive on the belt: uniform (the default), weighted:EMPTY=2,A=1,B=1 for a"
+                             " fixed mix, bursty or bursty:on=0.01,off=0.1 for lulls and bursts of components, or"
+                             " replay:PATH to read them back from a file of E, A and B characters, looping at the end"
+                             " - Used with a stepped, set tick or segmented run")
+    modes.add_argument("--recipes", metavar="PATH",
+                       help="Make products to the recipes in this JSON file, e.g. {\"hands\": 3, \"recipes\":"
+                            " [{\"product\": \"P\", \"components\": [\"A\", \"B\", \"C\"]}]}, with any"
+                            " component no recipe makes as an input - Runs a set tick simulation, using --seed")
+    modes.add_argument("--batch", metavar="PATH",
+                       help="Run every job in this JSON lines file, or - for stdin, printing one JSON result per job"
+                            " and nothing else - Each job can set belt_length, ticks, assembly_ticks, seed and engine"
+                            " (object, table, batch or vector), and -p sets how many processes run them")
+    parser.add_argument("--batch-output", metavar="PATH",
+                        help="Write batch results to this file instead of stdout - Only used with --batch")
+    return parser
+
+
+def get_render_options(args: argparse.Namespace) -> dict:
+    render_options = {"path": args.render_file, "is_redraw": args.redraw, "is_threaded": args.render_thread}
+    if args.render_every:
+        render_options["every"] = args.render_every
+    return render_options
+
+
+def check_modes(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    # Exits with a usage error for a sweep alongside another kind of run, variance reduction without replicas, or
+    # both kinds of report on a set tick run
+    is_sweep = any((args.sweep_belt_lengths, args.sweep_ticks, args.sweep_assembly_ticks, args.sweep_seeds))
+    modes = (args.is_stepped, args.replicas, args.analytic, args.checkpoint, args.tolerance, args.segments,
+             args.recipes, args.batch)
+    if is_sweep and any(modes):
+        parser.error("a sweep can't be combined with another kind of run")
+    if (args.compare or args.antithetic or args.control_variate) and not args.replicas:
+        parser.error("--compare, --antithetic and --control-variate need --replicas")
+    if args.instrument and args.latency:
+        parser.error("-i can't be combined with --latency")
+
+
+def main():
+    # Get command line arguments
+    parser = get_parser()
     args = parser.parse_args()
+    check_modes(parser, args)
+    sweep_grid = {
+        "belt_lengths": args.sweep_belt_lengths,
+        "ticks_to_run": args.sweep_ticks,
+        "assembly_ticks": args.sweep_assembly_ticks,
+        "seeds": args.sweep_seeds
+    }
 
     # Run the simulation, passing along command line arguments
-    factorio.run(args.is_stepped, args.belt_length, args.ticks, args.assembly_ticks, args.is_verbose)
+    factorio.run(
+        is_stepped=args.is_stepped,
+        belt_length=args.belt_length,
+        ticks_to_run=args.ticks,
+        assembly_ticks=args.assembly_ticks,
+        is_verbose=args.is_verbose,
+        replicas=args.replicas,
+        seed=args.seed,
+        max_workers=args.processes,
+        is_analytic=args.analytic,
+        is_instrumented=args.instrument,
+        checkpoint_path=args.checkpoint,
+        checkpoint_seconds=args.checkpoint_every,
+        sweep_grid=sweep_grid if any(sweep_grid.values()) else None,
+        render_options=get_render_options(args),
+        trace_path=args.trace,
+        tolerance=args.tolerance,
+        segments=args.segments,
+        batch_path=args.batch,
+        batch_output_path=args.batch_output,
+        is_latency_tracked=args.latency,
+        arrivals=args.arrivals,
+        recipes_path=args.recipes,
+        comparison=args.compare,
+        is_antithetic=args.antithetic,
+        is_controlled=args.control_variate
+    )
 
 
 if __name__ == "__main__":
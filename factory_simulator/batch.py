@@ -0,0 +1,117 @@
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from factory_simulator.enums import Item, Row
+from factory_simulator.worker import Worker
+
+# Belt slots and worker hands are stored as the items' flag values, so a worker's hands are a bitmask of what they hold.
+# Workers never hold two of the same item, so the bitmask loses nothing compared to Worker.held.
+EMPTY, A, B, P = (item.value for item in (Item.EMPTY, Item.A, Item.B, Item.P))
+COMPONENTS = A | B
+INPUTS = np.array([EMPTY, A, B], dtype=np.int8)
+TALLIED_ITEMS = (Item.EMPTY, Item.A, Item.B, Item.P)
+ROWS = (Row.TOP, Row.BOTTOM)
+# Every hands bitmask fits in HANDS_BITS, so a slot and both of its workers pack into one integer
+HANDS_BITS = 4
+HANDS_MASK = (1 << HANDS_BITS) - 1
+# Lookups indexed by a worker's hands, so per-worker checks are a single gather rather than bit counting
+HAS_FREE_HAND = np.array([bin(h).count("1") < Worker.NUMBER_OF_HANDS for h in range(HANDS_MASK + 1)])
+CAN_ASSEMBLE = np.array([h & COMPONENTS == COMPONENTS for h in range(HANDS_MASK + 1)])
+
+
+def _action_row(hands: np.ndarray, slots: np.ndarray, can_act: np.ndarray) -> np.ndarray:
+    # Same order of preference as Worker.take_action: place product, pick up component, then assemble
+    place = can_act & (hands >= P) & (slots == EMPTY)
+    pick_up = can_act & ~place & (slots & COMPONENTS != 0) & HAS_FREE_HAND[hands] & (hands & slots == 0)
+    assemble = can_act & ~place & ~pick_up & CAN_ASSEMBLE[hands]
+
+    np.bitwise_xor(hands, P, out=hands, where=place)
+    np.bitwise_or(hands, slots, out=hands, where=pick_up)
+    hands[assemble] = P
+    slots[place] = P
+    slots[pick_up] = EMPTY
+    # Like Worker.take_action, only placing and picking up count as interacting with the belt
+    return place | pick_up
+
+
+def action_workers(top_hands: np.ndarray, bottom_hands: np.ndarray, slots: np.ndarray):
+    # Same as Factory._action_workers; the bottom worker only acts if the top one didn't touch the belt
+    top_interacted = _action_row(top_hands, slots, np.ones(slots.shape, dtype=bool))
+    _action_row(bottom_hands, slots, ~top_interacted)
+
+
+def pack(slots: np.ndarray, top_hands: np.ndarray, bottom_hands: np.ndarray) -> np.ndarray:
+    packed = slots.astype(np.uint16) << 2 * HANDS_BITS
+    packed |= top_hands.astype(np.uint16) << HANDS_BITS
+    packed |= bottom_hands.astype(np.uint16)
+    return packed
+
+
+def _build_transitions() -> np.ndarray:
+    # A slot's next state only depends on its item and its two workers' hands, so the rules above are run once over
+    # every combination. Each tick is then a single gather per slot instead of a dozen array operations.
+    slots, top_hands, bottom_hands = (
+        combination.ravel().astype(np.int8) for combination in np.indices((P + 1, HANDS_MASK + 1, HANDS_MASK + 1))
+    )
+    action_workers(top_hands, bottom_hands, slots)
+    return pack(slots, top_hands, bottom_hands)
+
+
+TRANSITIONS = _build_transitions()
+
+
+class BatchFactory:
+    # Steps many independent factories in lockstep. Each replica is a row of the arrays below, and every tick applies
+    # the same rules as Factory.tick to all replicas at once with array operations.
+    def __init__(self, replicas: int, belt_length: int, seed=None):
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.slots: np.ndarray = np.full((replicas, belt_length), EMPTY, dtype=np.int8)
+        # One replicas x belt_length array of hands per row, indexed in the same order as ROWS
+        self.hands: np.ndarray = np.zeros((len(ROWS), replicas, belt_length), dtype=np.int8)
+        # One row of counts per tallied item, each with a column per replica
+        self.tally: np.ndarray = np.zeros((len(TALLIED_ITEMS), replicas), dtype=np.int64)
+
+    @property
+    def replicas(self) -> int:
+        return self.slots.shape[0]
+
+    def _move_belt(self, inputs: np.ndarray) -> np.ndarray:
+        if not self.slots.shape[1]:
+            return inputs
+        output = self.slots[:, -1].copy()
+        self.slots[:, 1:] = self.slots[:, :-1]
+        self.slots[:, 0] = inputs
+        return output
+
+    def _action_workers(self):
+        state = TRANSITIONS.take(pack(self.slots, self.hands[0], self.hands[1]))
+        self.hands[1] = state & HANDS_MASK
+        state >>= HANDS_BITS
+        self.hands[0] = state & HANDS_MASK
+        state >>= HANDS_BITS
+        self.slots[...] = state
+
+    def tick(self, inputs: np.ndarray = None) -> np.ndarray:
+        if inputs is None:
+            inputs = self.rng.choice(INPUTS, self.replicas)
+        output = self._move_belt(np.asarray(inputs, dtype=np.int8))
+        for counts, item in zip(self.tally, TALLIED_ITEMS):
+            counts += output == item.value
+        self._action_workers()
+        return output
+
+    def get_tallies(self) -> List[Counter]:
+        return [
+            Counter({item: int(count) for item, count in zip(TALLIED_ITEMS, replica_counts) if count})
+            for replica_counts in self.tally.T
+        ]
+
+
+def run_batch(belt_length: int, ticks_to_run: int, replicas: int, seed=None) -> List[Counter]:
+    # Drop-in for running ensemble.run_replica once per replica, giving one tally per replica
+    factory = BatchFactory(replicas, belt_length, seed)
+    for _ in range(ticks_to_run):
+        factory.tick()
+    return factory.get_tallies()
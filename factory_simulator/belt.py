@@ -1,24 +1,91 @@
-from typing import Optional, List
+from typing import Callable, List, Iterable, Iterator
 from typing_extensions import Self
 
 from factory_simulator.enums import Item
+from factory_simulator.inputs import RandomInputs
+
+
+class BeltSlots(object):
+    # Circular buffer of the belt's items. Indexes are relative to the start of the belt, so slot 0 is always the
+    # slot inputs are added to, while a move only shifts the head offset rather than every item on the belt.
+    __slots__ = ("_items", "_head")
+
+    def __init__(self, items: Iterable[Item] = ()):
+        self._items: List[Item] = list(items)
+        self._head: int = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _get_index(self, index: int) -> int:
+        # Same bounds as a list, including negative indexes from the end, rather than wrapping around the ring
+        length = len(self._items)
+        if not -length <= index < length:
+            raise IndexError("belt slot index out of range")
+        return (self._head + index) % length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self._items[self._get_index(index)]
+
+    def __setitem__(self, index: int, item: Item):
+        self._items[self._get_index(index)] = item
+
+    def __iter__(self) -> Iterator[Item]:
+        yield from self._items[self._head:]
+        yield from self._items[:self._head]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (BeltSlots, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def append(self, item: Item):
+        self.extend((item,))
+
+    def extend(self, items: Iterable[Item]):
+        # Only used while building the belt. Items go on the end of the belt, which is only the end of the buffer once
+        # it's re-aligned to the head, so that's only done when the belt has moved.
+        if self._head:
+            self._items = list(self)
+            self._head = 0
+        self._items.extend(items)
+
+    def shift(self, item_to_add: Item) -> Item:
+        if not self._items:
+            return item_to_add
+        self._head = (self._head - 1) % len(self._items)
+        item_removed = self._items[self._head]
+        self._items[self._head] = item_to_add
+        return item_removed
 
 
 class Belt(object):
-    _instance: Optional[Self] = None
-    slots: List[Item] = []
+    # Inputs are taken from any callable returning an item, e.g. a seeded RandomInputs for a reproducible run
+    def __init__(self, inputs: Callable[[], Item] = None):
+        self._slots: BeltSlots = BeltSlots()
+        self.inputs: Callable[[], Item] = inputs if inputs is not None else RandomInputs()
+
+    @property
+    def slots(self) -> BeltSlots:
+        return self._slots
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(Belt, cls).__new__(cls)
-        return cls._instance
+    @slots.setter
+    def slots(self, items: Iterable[Item]):
+        self._slots = BeltSlots(items)
 
     def add_empty_item(self) -> Self:
-        self.slots.append(Item.EMPTY)
+        return self.add_empty_items(1)
+
+    def add_empty_items(self, count: int) -> Self:
+        self.slots.extend([Item.EMPTY] * count)
         return self
 
     def move(self, item_to_add: Item = None) -> Item:
         if not item_to_add:
-            item_to_add = Item.get_random_input()
-        self.slots.insert(0, item_to_add)
-        return self.slots.pop()
+            item_to_add = self.inputs()
+        return self._slots.shift(item_to_add)
@@ -0,0 +1,210 @@
+import ast
+import os
+import struct
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from factory_simulator import stream
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.tally import Tally
+from factory_simulator.worker import Worker
+
+# Binary snapshot of a factory, little endian throughout:
+#   header      magic, format version, tick counter, belt length, factory assembly ticks
+#   belt        one byte per slot, the value of the item in it
+#   workers     one byte per worker, top row then bottom row, with up to two held items as a nibble each (in order)
+#   assembling  count, then (row, position, ticks remaining) for each worker busy assembling
+#   overrides   count, then (row, position, assembly ticks) for each worker not using the factory's assembly ticks
+#   tally       count of each tallied item, then the tally's tick count, then how many products have been placed
+#   inputs      seed, block size, streams spawned, RNG state, then the rest of the current block, one byte per item
+# Everything bar the RNG state scales with the belt, so a snapshot is about 3 bytes per slot plus ~2.5KB.
+MAGIC = b"FSIM"
+VERSION = 2
+HEADER = struct.Struct("<4sBQII")
+COUNT = struct.Struct("<I")
+WORKER_ENTRY = struct.Struct("<BII")
+TALLY = struct.Struct("<6Q")
+INPUTS_HEADER = struct.Struct("<II")
+RNG_STATE = struct.Struct("<B625I")
+GAUSS_NEXT = struct.Struct("<?d")
+
+ROWS = (Row.TOP, Row.BOTTOM)
+TALLIED_ITEMS = (Item.EMPTY, Item.A, Item.B, Item.P)
+ITEMS_BY_VALUE = {item.value: item for item in TALLIED_ITEMS}
+HELD_CODES = {Item.A: 1, Item.B: 2, Item.P: 3}
+HELD_ITEMS = {code: item for item, code in HELD_CODES.items()}
+# How often, in ticks, the clock is checked for whether a checkpoint is due
+CHECK_TICKS = 1_000
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def pack_held(held: List[Item]) -> int:
+    code = 0
+    for hand, item in enumerate(held):
+        code |= HELD_CODES[item] << 4 * hand
+    return code
+
+
+def unpack_held(code: int) -> List[Item]:
+    held = []
+    while code:
+        held.append(HELD_ITEMS[code & 0xF])
+        code >>= 4
+    return held
+
+
+def _pack_string(value: str) -> bytes:
+    encoded = value.encode()
+    return COUNT.pack(len(encoded)) + encoded
+
+
+def dumps(factory: Factory) -> bytes:
+    inputs = factory.belt.inputs
+    if not isinstance(inputs, RandomInputs):
+        raise CheckpointError("Only factories using RandomInputs can be checkpointed")
+    belt_length = len(factory.belt.slots)
+    parts = [
+        HEADER.pack(MAGIC, VERSION, factory.ticks, belt_length, factory.assembly_ticks),
+        bytes(item.value for item in factory.belt.slots),
+    ]
+    assembling = [
+        WORKER_ENTRY.pack(ROWS.index(row), position, remaining)
+        for row, position, remaining in factory.get_assembling_workers()
+    ]
+    overrides = []
+    for row_index, row in enumerate(ROWS):
+        parts.append(bytes(pack_held(worker.held) for worker in factory.workers[row]))
+        for position, worker in enumerate(factory.workers[row]):
+            if worker.assembly_ticks != factory.assembly_ticks:
+                overrides.append(WORKER_ENTRY.pack(row_index, position, worker.assembly_ticks))
+    for entries in (assembling, overrides):
+        parts.append(COUNT.pack(len(entries)))
+        parts.extend(entries)
+    parts.append(TALLY.pack(
+        *(factory.tally.counts[item] for item in TALLIED_ITEMS), factory.tally.ticks, factory.products_placed
+    ))
+
+    (rng_version, rng_internal_state, gauss_next), remaining, spawned = inputs.get_state()
+    parts.append(_pack_string(repr(inputs.seed)))
+    parts.append(INPUTS_HEADER.pack(inputs.block_size, spawned))
+    parts.append(RNG_STATE.pack(rng_version, *rng_internal_state))
+    parts.append(GAUSS_NEXT.pack(gauss_next is not None, gauss_next or 0.0))
+    parts.append(COUNT.pack(len(remaining)))
+    parts.append(bytes(item.value for item in remaining))
+    return b"".join(parts)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def read(self, size: int) -> bytes:
+        if self.offset + size > len(self.data):
+            raise CheckpointError("Checkpoint is truncated")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        return layout.unpack(self.read(layout.size))
+
+    def read_count(self) -> int:
+        return self.unpack(COUNT)[0]
+
+
+def loads(data: bytes, is_silent: bool = True) -> Factory:
+    reader = _Reader(data)
+    magic, version, ticks, belt_length, assembly_ticks = reader.unpack(HEADER)
+    if magic != MAGIC:
+        raise CheckpointError("Not a factory checkpoint")
+    if version != VERSION:
+        raise CheckpointError(f"Unsupported checkpoint version {version}")
+
+    slots = [ITEMS_BY_VALUE[value] for value in reader.read(belt_length)]
+    workers: Dict[Row, List[Worker]] = {}
+    for row in ROWS:
+        workers[row] = []
+        for position, code in enumerate(reader.read(belt_length)):
+            worker = Worker(position, row, assembly_ticks)
+            worker.held = unpack_held(code)
+            workers[row].append(worker)
+    for _ in range(reader.read_count()):
+        row_index, position, remaining = reader.unpack(WORKER_ENTRY)
+        workers[ROWS[row_index]][position].assembly_ticks_remaining = remaining
+    for _ in range(reader.read_count()):
+        row_index, position, worker_assembly_ticks = reader.unpack(WORKER_ENTRY)
+        workers[ROWS[row_index]][position].assembly_ticks = worker_assembly_ticks
+
+    *counts, tally_ticks, products_placed = reader.unpack(TALLY)
+    tally = Tally()
+    tally.counts.update({item: count for item, count in zip(TALLIED_ITEMS, counts) if count})
+    tally.ticks = tally_ticks
+
+    # Seeds are stored as their repr, so ints and strings both come back as they went in
+    seed = ast.literal_eval(reader.read(reader.read_count()).decode())
+    block_size, spawned = reader.unpack(INPUTS_HEADER)
+    rng_version, *rng_internal_state = reader.unpack(RNG_STATE)
+    has_gauss_next, gauss_next = reader.unpack(GAUSS_NEXT)
+    remaining = [ITEMS_BY_VALUE[value] for value in reader.read(reader.read_count())]
+    inputs = RandomInputs(seed, block_size)
+    inputs.set_state(((rng_version, tuple(rng_internal_state), gauss_next if has_gauss_next else None), remaining, spawned))
+
+    belt = Belt(inputs)
+    belt.slots = slots
+    factory = Factory(belt_length, belt, workers, is_silent, tally, assembly_ticks, ticks)
+    factory.products_placed = products_placed
+    return factory
+
+
+def save(factory: Factory, path: str):
+    # Written to a temporary file in the same directory, then renamed over the old checkpoint, so a run killed mid
+    # write always leaves the previous complete checkpoint behind
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+    try:
+        with os.fdopen(file_descriptor, "wb") as checkpoint_file:
+            checkpoint_file.write(dumps(factory))
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def load(path: str, is_silent: bool = True) -> Factory:
+    with open(path, "rb") as checkpoint_file:
+        return loads(checkpoint_file.read(), is_silent)
+
+
+def run_with_checkpoints(
+        factory: Factory,
+        ticks_to_run: int,
+        path: str,
+        every_seconds: float = None,
+        every_ticks: int = None
+) -> Tuple[Factory, int]:
+    # Runs the factory until it has done ticks_to_run ticks in total, checkpointing whenever either interval has
+    # passed, and once more at the end. Returns the factory and how many checkpoints were written.
+    checkpoints = 0
+    last_saved_tick, last_saved_time = factory.ticks, time.monotonic()
+    chunk_ticks = min(CHECK_TICKS, every_ticks or CHECK_TICKS)
+    for _ in stream.iter_chunks(factory, max(0, ticks_to_run - factory.ticks), chunk_ticks):
+        is_due_by_ticks = every_ticks and factory.ticks - last_saved_tick >= every_ticks
+        is_due_by_time = every_seconds is not None and time.monotonic() - last_saved_time >= every_seconds
+        if is_due_by_ticks or is_due_by_time:
+            save(factory, path)
+            checkpoints += 1
+            last_saved_tick, last_saved_time = factory.ticks, time.monotonic()
+    if last_saved_tick != factory.ticks:
+        save(factory, path)
+        checkpoints += 1
+    return factory, checkpoints
@@ -0,0 +1,177 @@
+"""
+Client for the simulation daemon. Only uses the standard library, so it starts quickly.
+
+Run a job with the same options as python -m factory_simulator, printing its result as JSON:
+    python -m factory_simulator.client run -b 5 -t 100000 --seed 1
+Run a batch of jobs, one line of options per job, printing a JSON line per job as each finishes:
+    python -m factory_simulator.client batch jobs.txt
+Cancel a job by id, or stop the daemon:
+    python -m factory_simulator.client cancel JOB_ID
+    python -m factory_simulator.client stop
+"""
+import argparse
+import json
+import os
+import shlex
+import socket
+import sys
+import tempfile
+import uuid
+from typing import Dict, Iterator, List, Sequence
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "factory_simulator.sock")
+
+
+class DaemonClient:
+    # One connection to the daemon. Jobs sent on it run concurrently, and their results come back as they finish.
+    def __init__(self, socket_path: str = None, port: int = None):
+        if port is not None:
+            self._socket = socket.create_connection(("127.0.0.1", port))
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(socket_path or DEFAULT_SOCKET)
+        self._reader = self._socket.makefile("rb")
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
+
+    def send(self, request: dict):
+        self._socket.sendall(json.dumps(request).encode() + b"\n")
+
+    def receive(self) -> dict:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("The daemon closed the connection")
+        return json.loads(line)
+
+    def submit(self, args: Sequence[str], job_id: str = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        self.send({"type": "run", "id": job_id, "args": list(args)})
+        return job_id
+
+    def submit_batch(self, jobs: Sequence[Sequence[str]]) -> List[str]:
+        # All the jobs go in one request, so a batch costs a single round trip however big it is
+        job_ids = [uuid.uuid4().hex for _ in jobs]
+        self.send({"type": "batch", "jobs": [{"id": job_id, "args": list(args)} for job_id, args in zip(job_ids, jobs)]})
+        return job_ids
+
+    def iter_results(self, job_ids: Sequence[str]) -> Iterator[dict]:
+        # Yields each job's result in the order they finish
+        waiting = set(job_ids)
+        while waiting:
+            response = self.receive()
+            if response["type"] == "result" and response["id"] in waiting:
+                waiting.remove(response["id"])
+                yield response
+
+    def run(self, args: Sequence[str], job_id: str = None) -> dict:
+        return next(self.iter_results([self.submit(args, job_id)]))
+
+    def run_batch(self, jobs: Sequence[Sequence[str]]) -> List[dict]:
+        # Results in the same order as the jobs
+        job_ids = self.submit_batch(jobs)
+        results: Dict[str, dict] = {result["id"]: result for result in self.iter_results(job_ids)}
+        return [results[job_id] for job_id in job_ids]
+
+    def cancel(self, job_id: str) -> bool:
+        self.send({"type": "cancel", "id": job_id})
+        while True:
+            response = self.receive()
+            if response["type"] == "cancel" and response["id"] == job_id:
+                return response["is_cancelled"]
+
+    def ping(self) -> dict:
+        self.send({"type": "ping"})
+        while True:
+            response = self.receive()
+            if response["type"] == "pong":
+                return response
+
+    def shutdown(self):
+        self.send({"type": "shutdown"})
+        self.receive()
+
+
+def _print_response(response: dict):
+    print(json.dumps(response), flush=True)
+
+
+def run(client: DaemonClient, args) -> int:
+    response = client.run(args.args, args.id)
+    _print_response(response)
+    return 0 if response["status"] == "done" else 1
+
+
+def batch(client: DaemonClient, args) -> int:
+    if args.jobs == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.jobs) as jobs_file:
+            lines = jobs_file.read().splitlines()
+    jobs = [shlex.split(line) for line in lines if line.strip() and not line.lstrip().startswith("#")]
+    job_ids = client.submit_batch(jobs)
+    is_ok = True
+    for response in client.iter_results(job_ids):
+        _print_response(response)
+        is_ok = is_ok and response["status"] == "done"
+    return 0 if is_ok else 1
+
+
+def cancel(client: DaemonClient, args) -> int:
+    is_cancelled = client.cancel(args.id)
+    print("Cancelled" if is_cancelled else f"No job {args.id} is running")
+    return 0 if is_cancelled else 1
+
+
+def ping(client: DaemonClient, args) -> int:
+    _print_response(client.ping())
+    return 0
+
+
+def stop(client: DaemonClient, args) -> int:
+    client.shutdown()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m factory_simulator.client")
+    parser.add_argument("--socket", help=f"Unix socket the daemon is listening on, defaults to {DEFAULT_SOCKET}")
+    parser.add_argument("--port", type=int, help="Localhost TCP port the daemon is listening on, instead of a socket")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser(
+        "run", help="Run one job and print its result, taking any other options as the job's",
+        usage="%(prog)s [--id ID] [options for python -m factory_simulator]"
+    )
+    run_parser.add_argument("--id", help="Id for the job, so it can be cancelled from elsewhere")
+    run_parser.set_defaults(handler=run)
+
+    batch_parser = subparsers.add_parser("batch", help="Run a file of jobs, one line of options per job")
+    batch_parser.add_argument("jobs", help="File of jobs, or - to read them from stdin")
+    batch_parser.set_defaults(handler=batch)
+
+    cancel_parser = subparsers.add_parser("cancel", help="Cancel a queued or running job")
+    cancel_parser.add_argument("id", help="Id of the job to cancel")
+    cancel_parser.set_defaults(handler=cancel)
+
+    subparsers.add_parser("ping", help="Check the daemon is up").set_defaults(handler=ping)
+    subparsers.add_parser("stop", help="Shut the daemon down").set_defaults(handler=stop)
+
+    # Anything not recognised is left for the job's own options
+    args, job_args = parser.parse_known_args()
+    if job_args and args.command != "run":
+        parser.error(f"unrecognized arguments: {' '.join(job_args)}")
+    args.args = [arg for arg in job_args if arg != "--"]
+    with DaemonClient(args.socket, args.port) as client:
+        return args.handler(client, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
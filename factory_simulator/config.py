@@ -1,3 +1,6 @@
 BELT_LENGTH = 3
 TICKS_TO_RUN = 100
 ASSEMBLY_TICKS = 1
+CHECKPOINT_SECONDS = 5
+SWEEP_CACHE_DIR = ".sweep_cache"
+SWEEP_CACHE_MAX_BYTES = 64 * 1024 * 1024
@@ -0,0 +1,151 @@
+import math
+from typing import List, Tuple
+
+from factory_simulator import stream
+from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
+from factory_simulator.ensemble import Z_95
+from factory_simulator.enums import Item
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+# The warm-up is found from products counted over short batches of ticks, starting from at least this many ticks, or
+# a few trips along the belt for long belts. The usual 5 tick batches (MSER-5) are too noisy here, as only about one
+# product leaves the belt every 3 ticks.
+WARM_UP_BATCH_TICKS = 10
+MIN_WARM_UP_TICKS = 1_000
+BELT_TRIPS_FOR_WARM_UP = 4
+# After the warm-up, the estimate comes from batches long enough for items to cross the belt many times over, so
+# batch means are close to independent
+BATCH_TICKS = 1_000
+BELT_TRIPS_PER_BATCH = 10
+# Fewest batches, after the warm-up, that a confidence interval is trusted from
+MIN_BATCHES = 20
+MAX_TICKS = 10 ** 9
+
+
+class RunningStats:
+    # Welford's online mean and variance, so the estimate is updated per batch without keeping every batch
+    __slots__ = ("count", "mean", "_sum_of_squares")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._sum_of_squares = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._sum_of_squares += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._sum_of_squares / (self.count - 1) if self.count > 1 else 0.0
+
+    def get_half_width(self) -> float:
+        return Z_95 * math.sqrt(self.variance / self.count) if self.count > 1 else math.inf
+
+
+def get_warm_up(values: List[float]) -> int:
+    # Marginal standard error rule (MSER): the number of leading batches to drop is the one that minimises the
+    # standard error of the mean of what's left. Only the first half is considered, as dropping more than that
+    # leaves too little to judge by; hitting that limit means the warm-up isn't over yet.
+    count = len(values)
+    total, total_of_squares = sum(values), sum(value * value for value in values)
+    best_warm_up, best_error = 0, math.inf
+    for warm_up in range(count // 2 + 1):
+        remaining = count - warm_up
+        error = (total_of_squares - total * total / remaining) / (remaining * remaining)
+        if error < best_error:
+            best_warm_up, best_error = warm_up, error
+        total -= values[warm_up]
+        total_of_squares -= values[warm_up] ** 2
+    return best_warm_up
+
+
+def get_batch_ticks(belt_length: int) -> int:
+    # Always a whole number of warm-up batches, so those after the warm-up can be reused as part of the estimate
+    batch_ticks = max(BATCH_TICKS, BELT_TRIPS_PER_BATCH * belt_length)
+    return -(-batch_ticks // WARM_UP_BATCH_TICKS) * WARM_UP_BATCH_TICKS
+
+
+def find_warm_up(factory: Factory, max_ticks: int) -> Tuple[List[int], int]:
+    # Runs the factory in short batches until MSER finds the end of the warm-up, trying again on twice as many
+    # batches each time it can't yet. Returns the products counted in each batch, and how many are warm-up.
+    counts: List[int] = []
+    next_check = max(MIN_WARM_UP_TICKS, BELT_TRIPS_FOR_WARM_UP * len(factory.belt.slots)) // WARM_UP_BATCH_TICKS
+    warm_up = None
+    for chunk in stream.iter_chunks(factory, max_ticks, WARM_UP_BATCH_TICKS):
+        counts.append(chunk["counts"][Item.P])
+        if len(counts) == next_check:
+            warm_up = get_warm_up(counts)
+            if warm_up < len(counts) // 2:
+                break
+            next_check *= 2
+    if warm_up is None:
+        warm_up = get_warm_up(counts)
+    return counts, warm_up
+
+
+def run_until_converged(
+        factory: Factory,
+        tolerance: float,
+        max_ticks: int = MAX_TICKS,
+        batch_ticks: int = None
+) -> dict:
+    # Runs the factory until the 95% confidence interval of products per tick is within +/- tolerance. The warm-up,
+    # while the empty belt fills up, is found with MSER and left out of the estimate, which then comes from the
+    # means of batches of batch_ticks ticks. Batches are weighted equally, so one cut short by the tick limit is left
+    # out rather than counted as a full batch.
+    start_tick = factory.ticks
+    batch_ticks = batch_ticks or get_batch_ticks(len(factory.belt.slots))
+    warm_up_counts, warm_up = find_warm_up(factory, max_ticks)
+    stats = RunningStats()
+
+    # The short batches after the warm-up make up the first few batches of the estimate
+    warm_up_batches_per_batch = batch_ticks // WARM_UP_BATCH_TICKS
+    kept = warm_up_counts[warm_up:]
+    full_batches = len(kept) // warm_up_batches_per_batch * warm_up_batches_per_batch
+    for start in range(0, full_batches, warm_up_batches_per_batch):
+        stats.add(sum(kept[start:start + warm_up_batches_per_batch]) / batch_ticks)
+    left_over = kept[full_batches:]
+    ticks_to_top_up = batch_ticks - len(left_over) * WARM_UP_BATCH_TICKS
+    if left_over and ticks_to_top_up <= max_ticks - (factory.ticks - start_tick):
+        # Topping up a part finished batch
+        chunk = next(stream.iter_chunks(factory, ticks_to_top_up, ticks_to_top_up))
+        stats.add((sum(left_over) + chunk["counts"][Item.P]) / batch_ticks)
+
+    def is_converged() -> bool:
+        return stats.count >= MIN_BATCHES and stats.get_half_width() <= tolerance
+
+    if not is_converged():
+        for chunk in stream.iter_chunks(factory, max_ticks - (factory.ticks - start_tick), batch_ticks):
+            if chunk["last_tick"] - chunk["first_tick"] + 1 < batch_ticks:
+                break
+            stats.add(chunk["counts"][Item.P] / batch_ticks)
+            if is_converged():
+                break
+
+    half_width = stats.get_half_width()
+    return {
+        "ticks": factory.ticks - start_tick,
+        "warm_up_ticks": warm_up * WARM_UP_BATCH_TICKS,
+        "batch_ticks": batch_ticks,
+        "batches": stats.count,
+        "rate": stats.mean,
+        "half_width": half_width,
+        "confidence_interval": (stats.mean - half_width, stats.mean + half_width),
+        "is_converged": is_converged()
+    }
+
+
+def run_converging_replica(
+        belt_length: int,
+        tolerance: float,
+        seed=None,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        max_ticks: int = MAX_TICKS
+) -> dict:
+    factory = Factory(belt_length, Belt(RandomInputs(seed)), is_silent=True, assembly_ticks=assembly_ticks)
+    return run_until_converged(factory, tolerance, max_ticks)
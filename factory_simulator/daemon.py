@@ -0,0 +1,325 @@
+"""
+Long running simulation daemon, keeping a warm pool of worker processes so each run doesn't pay for interpreter
+start up and imports.
+
+Start it on a Unix socket (the default) or a localhost TCP port:
+    python -m factory_simulator.daemon --socket /tmp/factory_simulator.sock
+    python -m factory_simulator.daemon --port 8765
+Then send it jobs with python -m factory_simulator.client, or DaemonClient from scripts.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from typing import Dict, List
+
+from factory_simulator import convergence, ensemble, markov, stream
+from factory_simulator.__main__ import check_modes, get_parser
+from factory_simulator.belt import Belt
+from factory_simulator.client import DEFAULT_SOCKET
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.main import get_config
+
+# How often, in ticks, a running job checks whether it's been cancelled
+CHECK_TICKS = 10_000
+# Options that only make sense for an interactive run from the command line, or that start processes of their own,
+# which the daemon's pool workers can't
+UNSUPPORTED_OPTIONS = ("is_stepped", "is_verbose", "instrument", "checkpoint", "sweep_belt_lengths", "sweep_ticks",
+                       "sweep_assembly_ticks", "sweep_seeds", "trace", "segments", "batch", "latency",
+                       "arrivals", "recipes", "compare", "antithetic", "control_variate")
+
+# Ids of cancelled jobs, shared with every worker process through a manager
+_cancelled = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _set_up_worker(cancelled):
+    global _cancelled
+    _cancelled = cancelled
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _get_counts(counts) -> Dict[str, int]:
+    return {item.name: counts[item] for item in ensemble.TALLIED_ITEMS}
+
+
+def run_job(job_id: str, job: dict) -> dict:
+    # Runs in a worker process. Set tick runs are done in steps of CHECK_TICKS, so they can be cancelled part way.
+    config, seed = job["config"], job["seed"]
+    if job["is_analytic"]:
+        solution = markov.solve(config["belt_length"])
+        rates = {item.name: rate for item, rate in solution["rates"].items()}
+        return {"config": config, "states": solution["states"], "rates": rates}
+    if job["tolerance"]:
+        result = convergence.run_converging_replica(
+            config["belt_length"], job["tolerance"], seed, config["assembly_ticks"], job["max_ticks"]
+        )
+        return {"config": config, "seed": seed, **result}
+    if job["replicas"]:
+        summary = ensemble.run_ensemble(
+            config["belt_length"], config["ticks_to_run"], job["replicas"], seed, 1,
+            assembly_ticks=config["assembly_ticks"]
+        )
+        return {
+            "config": config,
+            "seed": seed,
+            "replicas": summary["replicas"],
+            "total": _get_counts(summary["total"]),
+            "mean": _get_counts(summary["mean"]),
+            "variance": _get_counts(summary["variance"]),
+            "confidence_interval": _get_counts(summary["confidence_interval"])
+        }
+    factory = Factory(
+        config["belt_length"], Belt(RandomInputs(seed)), is_silent=True, assembly_ticks=config["assembly_ticks"]
+    )
+    for _ in stream.iter_chunks(factory, config["ticks_to_run"], CHECK_TICKS):
+        if _cancelled is not None and job_id in _cancelled:
+            raise JobCancelled(job_id)
+    return {"config": config, "seed": seed, "counts": _get_counts(factory.tally.counts)}
+
+
+def _raise_option_error(message: str):
+    raise ValueError(message)
+
+
+def parse_job(args: List[str]) -> dict:
+    # Parses a job's options with the same parser as the command line, raising a ValueError rather than exiting
+    parser = get_parser()
+    parser.error = _raise_option_error
+    try:
+        parsed = parser.parse_args(args)
+    except SystemExit:
+        # e.g. -h, which prints to the daemon's stdout rather than being any use to the client
+        raise ValueError(f"Invalid options {args}")
+    check_modes(parser, parsed)
+    unsupported = [option for option in UNSUPPORTED_OPTIONS if getattr(parsed, option)]
+    if unsupported:
+        raise ValueError(f"Options not supported by the daemon: {', '.join(unsupported)}")
+    config = get_config(parsed.belt_length, parsed.ticks, parsed.assembly_ticks)
+    if parsed.analytic and config["assembly_ticks"] != 1:
+        raise ValueError("The analytic solver only models products that take 1 tick to assemble")
+    return {
+        "config": config,
+        # Seeds are always picked up front, so every result can be reproduced
+        "seed": parsed.seed if parsed.seed is not None else random.randrange(2 ** 32),
+        "replicas": parsed.replicas,
+        "is_analytic": parsed.analytic,
+        "tolerance": parsed.tolerance,
+        # For a converging run, ticks are only a limit, so the config's default doesn't apply
+        "max_ticks": parsed.ticks or convergence.MAX_TICKS
+    }
+
+
+class SimulationDaemon:
+    # The pool and the jobs it's running, independent of how requests arrive
+    def __init__(self, max_workers: int = None):
+        self._manager = multiprocessing.Manager()
+        self._cancelled = self._manager.dict()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(self.max_workers, initializer=_set_up_worker, initargs=(self._cancelled,))
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Start every worker process now, rather than on the first jobs
+        for future in [self._executor.submit(_warm_up) for _ in range(self.max_workers)]:
+            future.result()
+
+    def submit(self, job_id: str, args: List[str]) -> Future:
+        job = parse_job(args)
+        with self._lock:
+            if job_id in self._jobs:
+                raise ValueError(f"Job {job_id} is already running")
+            future = self._executor.submit(run_job, job_id, job)
+            self._jobs[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return future
+
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        self._cancelled.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        # Jobs still queued are dropped straight away, running ones stop at their next check
+        with self._lock:
+            future = self._jobs.get(job_id)
+            if future is None:
+                return False
+            if not future.cancel():
+                self._cancelled[job_id] = True
+        return True
+
+    def shutdown(self):
+        with self._lock:
+            for job_id, future in self._jobs.items():
+                if not future.cancel():
+                    self._cancelled[job_id] = True
+        self._executor.shutdown(wait=True)
+        self._manager.shutdown()
+
+
+def get_response(job_id: str, future: Future) -> dict:
+    try:
+        return {"type": "result", "id": job_id, "status": "done", "result": future.result()}
+    except (CancelledError, JobCancelled):
+        return {"type": "result", "id": job_id, "status": "cancelled"}
+    except Exception as error:
+        return {"type": "result", "id": job_id, "status": "error", "error": str(error)}
+
+
+def check_request(request: dict):
+    # Raises a ValueError for a run, batch or cancel request missing what it needs, before any of it is acted on,
+    # so a bad request gets an error back rather than ending the connection
+    request_type = request["type"]
+    if request_type == "batch":
+        jobs = request.get("jobs")
+        if not isinstance(jobs, list):
+            raise ValueError("A batch request needs a list of jobs")
+    elif request_type in ("run", "cancel"):
+        jobs = [request]
+    else:
+        return
+    for job in jobs:
+        if not isinstance(job, dict) or job.get("id") is None:
+            raise ValueError(f"Every job in a {request_type} request needs an id")
+        args = job.get("args", [])
+        if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            raise ValueError("A job's args must be a list of strings")
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    # Requests and responses are JSON, one per line. A connection can have any number of jobs running at once, and
+    # each job's result is sent as soon as it finishes, tagged with the job's id:
+    #   {"type": "run", "id": "a", "args": ["-b", "5", "-t", "1000"]}
+    #   {"type": "batch", "jobs": [{"id": "a", "args": [...]}, {"id": "b", "args": [...]}]}
+    #   {"type": "cancel", "id": "a"}
+    #   {"type": "ping"}
+    #   {"type": "shutdown"}
+    def setup(self):
+        super().setup()
+        self._write_lock = threading.Lock()
+
+    def send(self, response: dict):
+        with self._write_lock:
+            try:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError, ValueError):
+                # The client has gone, so there's no one left to tell
+                pass
+
+    def submit(self, job_id: str, args: List[str]):
+        try:
+            future = self.server.daemon.submit(job_id, args)
+        except ValueError as error:
+            self.send({"type": "result", "id": job_id, "status": "error", "error": str(error)})
+            return
+        future.add_done_callback(lambda done: self.send(get_response(job_id, done)))
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                request_type = request["type"]
+            except (ValueError, KeyError, TypeError):
+                self.send({"type": "error", "error": f"Invalid request {line!r}"})
+                continue
+            try:
+                check_request(request)
+            except ValueError as error:
+                self.send({"type": "error", "error": f"Invalid request {line!r}: {error}"})
+                continue
+            if request_type == "run":
+                self.submit(str(request["id"]), request.get("args", []))
+            elif request_type == "batch":
+                for job in request["jobs"]:
+                    self.submit(str(job["id"]), job.get("args", []))
+            elif request_type == "cancel":
+                is_cancelled = self.server.daemon.cancel(str(request["id"]))
+                self.send({"type": "cancel", "id": request["id"], "is_cancelled": is_cancelled})
+            elif request_type == "ping":
+                self.send({"type": "pong", "workers": self.server.daemon.max_workers})
+            elif request_type == "shutdown":
+                self.send({"type": "shutdown"})
+                threading.Thread(target=self.server.shutdown).start()
+                return
+            else:
+                self.send({"type": "error", "error": f"Unknown request type {request_type}"})
+
+
+class UnixDaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class TCPDaemonServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def remove_stale_socket(socket_path: str):
+    # A socket left behind by a daemon that didn't shut down cleanly is removed, but only once connecting to it is
+    # refused, so starting a second daemon never takes over the socket of one that's still running
+    if not os.path.lexists(socket_path):
+        return
+    if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        raise FileExistsError(f"{socket_path} exists and isn't a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise FileExistsError(f"A daemon is already listening on {socket_path}")
+
+
+def serve(socket_path: str = None, port: int = None, max_workers: int = None):
+    if port is not None:
+        # Only ever bound to localhost, as anyone who can connect can run jobs
+        server = TCPDaemonServer(("127.0.0.1", port), RequestHandler)
+        address = f"127.0.0.1:{server.server_address[1]}"
+    else:
+        socket_path = socket_path or DEFAULT_SOCKET
+        remove_stale_socket(socket_path)
+        server = UnixDaemonServer(socket_path, RequestHandler)
+        address = socket_path
+    daemon = SimulationDaemon(max_workers)
+    server.daemon = daemon
+    print(f"Serving on {address} with {daemon.max_workers} worker(s)", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.shutdown()
+        if port is None:
+            os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m factory_simulator.daemon")
+    parser.add_argument("--socket", help=f"Unix socket to listen on, defaults to {DEFAULT_SOCKET}")
+    parser.add_argument("--port", type=int, help="Listen on this localhost TCP port instead of a Unix socket")
+    parser.add_argument("-p", "--processes", type=int, help="How many worker processes to keep, defaults to the CPU count")
+    args = parser.parse_args()
+    try:
+        serve(args.socket, args.port, args.processes)
+    except FileExistsError as error:
+        parser.error(str(error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List, Sequence
+
+from factory_simulator import stream
+from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
+from factory_simulator.enums import Item
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+# Items reported on for every ensemble, in the order they're printed
+TALLIED_ITEMS = (Item.P, Item.A, Item.B, Item.EMPTY)
+# z value for a two-sided 95% confidence interval
+Z_95 = 1.959963984540054
+# Aim for a few chunks per process, so the pool stays balanced without paying IPC costs per replica
+CHUNKS_PER_PROCESS = 4
+
+
+def get_replica_seed(seed: int, replica: int) -> str:
+    # Same scheme as RandomInputs.spawn; streams only depend on the ensemble seed and the replica's index, never on
+    # which process the replica was run in
+    return f"{seed}:{replica}"
+
+
+def run_replica(belt_length: int, ticks_to_run: int, seed, assembly_ticks: int = ASSEMBLY_TICKS) -> Counter:
+    factory = Factory(belt_length, Belt(RandomInputs(seed)), is_silent=True, assembly_ticks=assembly_ticks)
+    for _ in stream.iter_chunks(factory, ticks_to_run):
+        pass
+    return factory.tally.counts
+
+
+def _run_replica_chunk(belt_length: int, ticks_to_run: int, assembly_ticks: int, seeds: Sequence) -> List[Counter]:
+    return [run_replica(belt_length, ticks_to_run, seed, assembly_ticks) for seed in seeds]
+
+
+def summarise_tallies(tallies: Sequence[Counter]) -> dict:
+    replicas = len(tallies)
+    total, mean, variance, confidence_interval = Counter(), {}, {}, {}
+    for item in TALLIED_ITEMS:
+        counts = [tally[item] for tally in tallies]
+        total[item] = sum(counts)
+        mean[item] = total[item] / replicas
+        # Sample variance, undefined for a single replica
+        variance[item] = sum((c - mean[item]) ** 2 for c in counts) / (replicas - 1) if replicas > 1 else 0.0
+        half_width = Z_95 * math.sqrt(variance[item] / replicas)
+        confidence_interval[item] = (mean[item] - half_width, mean[item] + half_width)
+    return {
+        "replicas": replicas,
+        "total": total,
+        "mean": mean,
+        "variance": variance,
+        "confidence_interval": confidence_interval
+    }
+
+
+def run_chunked(
+        run_chunk: Callable[[Sequence], List],
+        runs: Sequence,
+        max_workers: int = None,
+        chunk_size: int = None
+) -> list:
+    # Splits the runs into chunks, a few per process, and gives back every chunk's results in the order of the runs
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, math.ceil(len(runs) / (max_workers * CHUNKS_PER_PROCESS)))
+    chunks = [runs[i:i + chunk_size] for i in range(0, len(runs), chunk_size)]
+    results = []
+    if max_workers == 1:
+        for chunk in chunks:
+            results.extend(run_chunk(chunk))
+    else:
+        # map keeps the chunks in submission order, so the results are identical for any number of workers
+        with ProcessPoolExecutor(max_workers) as executor:
+            for chunk_results in executor.map(run_chunk, chunks):
+                results.extend(chunk_results)
+    return results
+
+
+def run_ensemble(
+        belt_length: int,
+        ticks_to_run: int,
+        replicas: int,
+        seed: int = 0,
+        max_workers: int = None,
+        chunk_size: int = None,
+        assembly_ticks: int = ASSEMBLY_TICKS
+) -> dict:
+    seeds = [get_replica_seed(seed, replica) for replica in range(replicas)]
+    run_chunk = partial(_run_replica_chunk, belt_length, ticks_to_run, assembly_ticks)
+    return summarise_tallies(run_chunked(run_chunk, seeds, max_workers, chunk_size))
@@ -14,8 +14,8 @@ class Item(Flag):
         return self.name
 
     @classmethod
-    def get_random_input(cls) -> INPUT:
-        return random.choice((cls.EMPTY, cls.A, cls.B))
+    def get_random_input(cls, rng: random.Random = random) -> INPUT:
+        return rng.choice((cls.EMPTY, cls.A, cls.B))
 
 
 class Row(Enum):
@@ -1,43 +1,117 @@
-from collections import Counter
-from typing import List
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Tuple
 
-from factory_simulator.enums import Row
+from factory_simulator.config import ASSEMBLY_TICKS
+from factory_simulator.enums import Item, Row
 from factory_simulator.belt import Belt
+from factory_simulator.rendering import format_state, get_snapshot
+from factory_simulator.tally import Tally
 from factory_simulator.worker import Worker
 
 
 class Factory:
-    def __init__(self, belt_length: int):
-        self.belt: Belt = Belt()
-        self.workers: dict = {Row.TOP: [], Row.BOTTOM: []}
-        self.output: List = []
+    # Each factory owns its belt and workers, so any number of them can be run side by side in one process.
+    # Either can be injected, e.g. to resume from a known state; whatever is passed in is topped up to belt_length.
+    def __init__(
+            self,
+            belt_length: int,
+            belt: Belt = None,
+            workers: Dict[Row, List[Worker]] = None,
+            is_silent: bool = False,
+            tally: Tally = None,
+            assembly_ticks: int = ASSEMBLY_TICKS,
+            ticks: int = 0
+    ):
+        self.is_silent = is_silent
+        self.assembly_ticks = assembly_ticks
+        # Ticks run so far, only non-zero when resuming a factory
+        self.ticks: int = ticks
+        self.belt: Belt = belt if belt is not None else Belt()
+        self.workers: Dict[Row, List[Worker]] = workers if workers is not None else {Row.TOP: [], Row.BOTTOM: []}
+        self.tally: Tally = tally if tally is not None else Tally()
+        # Products workers have placed on the belt so far, whether or not they've come off the end yet
+        self.products_placed: int = 0
+        # Workers that can act this tick, by row and belt position. Workers that are busy assembling are parked in
+        # a heap of (tick they finish on, row, position, worker), so they aren't visited until they're finished.
+        self._ready: Dict[Row, Dict[int, Worker]] = {}
+        self._assembling: List[Tuple[int, int, int, Worker]] = []
         self._set_up(belt_length)
 
     def _set_up(self, belt_length: int):
-        while len(self.belt.slots) < belt_length:
-            self.belt.add_empty_item()
-            self.workers[Row.TOP].append(Worker(len(self.workers[Row.TOP]), Row.TOP))
-            self.workers[Row.BOTTOM].append(Worker(len(self.workers[Row.BOTTOM]), Row.BOTTOM))
-        print(f"Empty belt created with {belt_length} slot(s)\nWorkers populated")
+        self.belt.add_empty_items(max(0, belt_length - len(self.belt.slots)))
+        for row, row_workers in self.workers.items():
+            row_workers.extend(
+                Worker(position, row, self.assembly_ticks) for position in range(len(row_workers), belt_length)
+            )
+            self._ready[row] = {}
+            for position, worker in enumerate(row_workers):
+                if worker.is_assembling:
+                    self._park(row, position, worker)
+                else:
+                    self._ready[row][position] = worker
+        if not self.is_silent:
+            print(f"Empty belt created with {belt_length} slot(s)\nWorkers populated")
+
+    def _park(self, row: Row, position: int, worker: Worker):
+        self._ready[row].pop(position, None)
+        finish_tick = self.ticks + worker.assembly_ticks_remaining
+        heappush(self._assembling, (finish_tick, row.value, position, worker))
+
+    def _release_assembled_workers(self):
+        while self._assembling and self._assembling[0][0] <= self.ticks:
+            _, row_value, position, worker = heappop(self._assembling)
+            worker.finish_assembly()
+            self._ready[Row(row_value)][position] = worker
 
     def _action_workers(self):
-        for i, worker in enumerate(self.workers[Row.TOP]):
-            if not worker.take_action(self.belt):
-                self.workers[Row.BOTTOM][i].take_action(self.belt)
+        # Each pair only shares its own slot, so all top workers can go first, then any bottom worker whose top
+        # worker didn't interact with the belt. Busy workers are skipped, as they can't touch the belt anyway.
+        interacted = set()
+        for row in (Row.TOP, Row.BOTTOM):
+            for position, worker in list(self._ready[row].items()):
+                if position in interacted:
+                    continue
+                if worker.take_action(self.belt):
+                    interacted.add(position)
+                    # Workers only ever pick components up, leaving the slot empty, so anything in it was just placed
+                    if self.belt.slots[position] is not Item.EMPTY:
+                        self.products_placed += 1
+                elif worker.is_assembling:
+                    self._park(row, position, worker)
+        self._release_assembled_workers()
+
+    def get_assembling_workers(self) -> List[Tuple[Row, int, int]]:
+        # (row, position, ticks remaining) for each busy worker. Parked workers aren't stepped, so their own
+        # assembly_ticks_remaining is only up to date as of when they were parked.
+        return [
+            (Row(row_value), position, finish_tick - self.ticks)
+            for finish_tick, row_value, position, _ in self._assembling
+        ]
+
+    @property
+    def output(self) -> Optional[List[Item]]:
+        # Every item that came off the belt, only kept if the factory's tally was created with keep_history
+        return self.tally.history
 
-    def tick(self):
-        self.output.append(self.belt.move())
+    def tick(self, item_to_add: Item = None) -> Item:
+        # An item can be given to feed a known input stream, otherwise the belt picks a random input. Subclasses that
+        # measure or track a tick override its phases, _move_belt, _record_output and _action_workers, rather than
+        # this, so the order of a tick is only ever defined here.
+        self.ticks += 1
+        item_removed = self._move_belt(item_to_add)
+        self._record_output(item_removed)
         self._action_workers()
+        return item_removed
 
-    def print_state(self):
-        top_row_workers = [f"{w.belt_position+1}: {w.held}" for w in self.workers[Row.TOP]]
-        belt_slots = [f"{i+1}: [{s.name}]" for i, s in enumerate(self.belt.slots)]
-        bottom_row_workers = [f"{w.belt_position+1}: {w.held}" for w in self.workers[Row.BOTTOM]]
+    def _move_belt(self, item_to_add: Item = None) -> Item:
+        return self.belt.move(item_to_add)
+
+    def _record_output(self, item_removed: Item):
+        self.tally.add(item_removed)
 
-        print(f"{Row.TOP.name} ROW: {top_row_workers}")
-        print(f"BELT: {belt_slots}")
-        print(f"{Row.BOTTOM.name} ROW: {bottom_row_workers}")
-        print("\n***************\n")
+    def print_state(self):
+        # For an occasional look at the factory, see rendering.Renderer for rendering it every tick of a run
+        print(format_state(get_snapshot(self)), end="")
 
     def print_tally(self):
-        print(Counter(self.output))
+        print(self.tally.counts)
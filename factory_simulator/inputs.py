@@ -0,0 +1,258 @@
+import random
+from abc import ABC, abstractmethod
+from itertools import groupby
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
+from factory_simulator.enums import Item
+
+BLOCK_SIZE = 4096
+# One character per input in recordings for ReplayInputs
+ITEMS_BY_CODE = {ord("E"): Item.EMPTY, ord("A"): Item.A, ord("B"): Item.B}
+CODES_BY_ITEM = {item: code for code, item in ITEMS_BY_CODE.items()}
+# Default bursty arrivals: lulls where two thirds of slots are empty, and bursts of back to back components. Bursts
+# start on average every 100 ticks and last 10.
+LULL_MIX = {Item.EMPTY: 4, Item.A: 1, Item.B: 1}
+BURST_MIX = {Item.A: 1, Item.B: 1}
+BURST_START = 0.01
+BURST_END = 0.1
+
+
+class BlockInputs(ABC):
+    # Base for sources of belt inputs, called once per move like Item.get_random_input. Inputs are generated a block
+    # at a time and handed out from a buffer, so each tick only pays for a next() on an iterator rather than an RNG
+    # call or a read.
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self._block: Iterator[Item] = iter(())
+
+    def __call__(self) -> Item:
+        item = next(self._block, None)
+        if item is None:
+            self._block = iter(self.get_block())
+            item = next(self._block)
+        return item
+
+    @abstractmethod
+    def get_block(self) -> List[Item]:
+        pass
+
+
+class RandomInputs(BlockInputs):
+    # EMPTY, A and B equally likely. The same seed always gives the same stream of inputs, whatever the block size.
+    INPUTS = (Item.EMPTY, Item.A, Item.B)
+
+    def __init__(self, seed=None, block_size: int = BLOCK_SIZE):
+        super().__init__(block_size)
+        # Without a seed, one is picked at random so the stream can still be reproduced or spawned from later
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self._spawned = 0
+
+    def get_block(self) -> List[Item]:
+        return self.rng.choices(self.INPUTS, k=self.block_size)
+
+    def get_state(self) -> tuple:
+        # Everything needed to carry on the same stream: the RNG's state, the rest of the current block, and how many
+        # streams have been spawned
+        remaining = list(self._block)
+        self._block = iter(remaining)
+        return self.rng.getstate(), remaining, self._spawned
+
+    def set_state(self, state: tuple):
+        rng_state, remaining, self._spawned = state
+        self.rng.setstate(rng_state)
+        self._block = iter(list(remaining))
+
+    def spawn(self, count: int) -> List["RandomInputs"]:
+        # Child streams are seeded from this stream's seed and how many have been spawned, never from its position,
+        # so they're independent of each other and of how far this stream has been read
+        children = [
+            RandomInputs(f"{self.seed}:{self._spawned + i}", self.block_size)
+            for i in range(count)
+        ]
+        self._spawned += count
+        return children
+
+
+class AliasSampler:
+    # Walker's alias method: after an O(n) set up, each draw is one random number and one table lookup whatever the
+    # number of categories, rather than a search through cumulative weights
+    __slots__ = ("items", "probabilities", "aliases")
+
+    def __init__(self, items: Sequence, weights: Sequence[float]):
+        if len(items) != len(weights) or not items:
+            raise ValueError("There must be one weight per item")
+        if any(weight < 0 for weight in weights) or not sum(weights):
+            raise ValueError("Weights must be non-negative, and not all zero")
+        count, total = len(weights), sum(weights)
+        scaled = [weight * count / total for weight in weights]
+        self.items = list(items)
+        self.probabilities = [1.0] * count
+        self.aliases = list(items)
+        small = [index for index, weight in enumerate(scaled) if weight < 1]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = items[more]
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+
+    def pick(self, uniform: float):
+        # The item for a uniform random number in [0, 1)
+        offset = uniform * len(self.items)
+        index = int(offset)
+        return self.items[index] if offset - index < self.probabilities[index] else self.aliases[index]
+
+    def draw(self, rng: random.Random, count: int) -> list:
+        # Same as count calls to pick, inlined as this is what every tick of a block pays for
+        items, probabilities, aliases, uniform = self.items, self.probabilities, self.aliases, rng.random
+        size = len(items)
+        drawn = []
+        for _ in range(count):
+            offset = uniform() * size
+            index = int(offset)
+            drawn.append(items[index] if offset - index < probabilities[index] else aliases[index])
+        return drawn
+
+
+class WeightedInputs(BlockInputs):
+    # Inputs drawn independently each tick from a fixed mix, e.g. weights {Item.EMPTY: 2, Item.A: 1, Item.B: 1}
+    def __init__(self, weights: Dict[Item, float], seed=None, block_size: int = BLOCK_SIZE):
+        super().__init__(block_size)
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.sampler = AliasSampler(list(weights), list(weights.values()))
+
+    def get_block(self) -> List[Item]:
+        return self.sampler.draw(self.rng, self.block_size)
+
+
+class MarkovInputs(BlockInputs):
+    # Markov modulated arrivals: the line is in one of several regimes, each with its own mix of inputs, and moves
+    # between them at random, switching[i][j] being the chance of going from regime i to regime j after a tick. That
+    # gives bursts and lulls, with inputs correlated over time, which independent draws can't.
+    def __init__(
+            self,
+            mixes: Sequence[Dict[Item, float]],
+            switching: Sequence[Sequence[float]],
+            seed=None,
+            block_size: int = BLOCK_SIZE,
+            regime: int = 0
+    ):
+        super().__init__(block_size)
+        if len(switching) != len(mixes) or any(len(row) != len(mixes) for row in switching):
+            raise ValueError("Switching needs a row and column per regime")
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.regime = regime
+        self._samplers = [AliasSampler(list(mix), list(mix.values())) for mix in mixes]
+        self._next_regime = [AliasSampler(range(len(mixes)), row) for row in switching]
+
+    def get_block(self) -> List[Item]:
+        # Regimes are drawn for the whole block first, then inputs for each run of ticks spent in the same regime
+        draw, regime, regimes = self.rng.random, self.regime, []
+        for _ in range(self.block_size):
+            regimes.append(regime)
+            regime = self._next_regime[regime].pick(draw())
+        self.regime = regime
+        block = []
+        for run_regime, run in groupby(regimes):
+            block.extend(self._samplers[run_regime].draw(self.rng, sum(1 for _ in run)))
+        return block
+
+
+class ReplayInputs(BlockInputs):
+    # Inputs read back from a recording, one character per tick (E, A or B, see write_inputs), with anything else
+    # such as line breaks ignored. The file is read a block at a time, so recordings of any length can be replayed,
+    # and starts again from the beginning once it runs out unless is_looped is False. The file is kept open until
+    # close is called, or the end of a with block.
+    def __init__(self, path: str, block_size: int = BLOCK_SIZE, is_looped: bool = True):
+        super().__init__(block_size)
+        self.path = path
+        self.is_looped = is_looped
+        self._file = open(path, "rb")
+        # Since the start of the file, so a file with no inputs in it is caught rather than looped over forever
+        self._items_read = 0
+
+    def get_block(self) -> List[Item]:
+        block: List[Item] = []
+        while len(block) < self.block_size:
+            data = self._file.read(self.block_size - len(block))
+            if data:
+                items = [ITEMS_BY_CODE[code] for code in data if code in ITEMS_BY_CODE]
+                self._items_read += len(items)
+                block.extend(items)
+                continue
+            if not self._items_read:
+                raise ValueError(f"{self.path} has no inputs to replay")
+            if not self.is_looped:
+                if block:
+                    return block
+                raise EOFError(f"Ran out of inputs to replay from {self.path}")
+            self._file.seek(0)
+            self._items_read = 0
+        return block
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "ReplayInputs":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_inputs(path: str, items: Iterable[Item], line_length: int = 80):
+    # Records inputs in the format ReplayInputs reads back
+    codes = bytes(CODES_BY_ITEM[item] for item in items)
+    with open(path, "wb") as inputs_file:
+        for start in range(0, len(codes), line_length):
+            inputs_file.write(codes[start:start + line_length] + b"\n")
+
+
+def _parse_weights(options: str) -> Dict[Item, float]:
+    weights = {}
+    for name, weight in _parse_options(options).items():
+        item = Item.__members__.get(name.strip().upper())
+        if item not in RandomInputs.INPUTS:
+            raise ValueError(f"Unknown input {name}, expected EMPTY, A or B")
+        weights[item] = float(weight)
+    return weights
+
+
+def make_inputs(spec: str = None, seed=None, block_size: int = BLOCK_SIZE) -> Callable[[], Item]:
+    # Builds the arrival model described by a spec from the command line:
+    #   uniform                          EMPTY, A and B equally likely, as RandomInputs (the default)
+    #   weighted:EMPTY=2,A=1,B=1         a fixed, skewed mix
+    #   bursty:on=0.01,off=0.1           lulls of mostly empty slots, and bursts of nothing but components, starting
+    #                                    with chance on and ending with chance off after each tick
+    #   replay:PATH                      inputs read back from a recording, see ReplayInputs
+    kind, _, options = (spec or "uniform").partition(":")
+    try:
+        if kind == "uniform" and not options:
+            return RandomInputs(seed, block_size)
+        if kind == "weighted" and options:
+            return WeightedInputs(_parse_weights(options), seed, block_size)
+        if kind == "bursty":
+            rates = {"on": BURST_START, "off": BURST_END}
+            for name, value in _parse_options(options).items():
+                if name not in rates:
+                    raise ValueError(f"Unknown bursty option {name}, expected on or off")
+                rates[name] = float(value)
+            return MarkovInputs(
+                [LULL_MIX, BURST_MIX],
+                [[1 - rates["on"], rates["on"]], [rates["off"], 1 - rates["off"]]],
+                seed,
+                block_size
+            )
+        if kind == "replay" and options:
+            return ReplayInputs(options, block_size)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid arrivals {spec}: {error}") from error
+    raise ValueError(f"Invalid arrivals {spec}, expected uniform, weighted:..., bursty[:...] or replay:PATH")
+
+
+def _parse_options(options: str) -> Dict[str, str]:
+    return dict(option.partition("=")[::2] for option in options.split(",")) if options else {}
@@ -0,0 +1,131 @@
+import cProfile
+import pstats
+import time
+from typing import Dict, List, Tuple
+
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.transitions import SLOT_BITS, TRANSITIONS, encode_held
+from factory_simulator.worker import Worker
+
+PHASES = ("belt_move", "action_workers")
+
+
+class WorkerStats:
+    # Per-worker counts of how each tick was spent
+    __slots__ = (
+        "idle_ticks", "waiting_for_component_ticks", "blocked_ticks", "assembling_ticks",
+        "products_assembled", "products_placed", "components_picked_up", "contention_losses"
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class InstrumentedFactory(Factory):
+    # Factory that also times each phase of a tick, and tracks what every worker did. It's a separate class, rather
+    # than checks inside Factory, so running without instrumentation costs nothing.
+    #
+    # Each tick, a worker that doesn't act is idle, and is either waiting for a component or, if holding a product,
+    # blocked waiting for an empty slot to place it in. A bottom worker that would have acted, but didn't get the
+    # chance because the top worker used the slot first, counts a contention loss instead.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.phase_seconds: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.worker_stats: Dict[Row, List[WorkerStats]] = {
+            row: [WorkerStats() for _ in row_workers] for row, row_workers in self.workers.items()
+        }
+
+    def _move_belt(self, item_to_add: Item = None) -> Item:
+        start = time.perf_counter()
+        item_removed = super()._move_belt(item_to_add)
+        self.phase_seconds["belt_move"] += time.perf_counter() - start
+        return item_removed
+
+    def _action_workers(self):
+        slots_before = list(self.belt.slots)
+        workers_before = self._get_worker_states()
+        start = time.perf_counter()
+        super()._action_workers()
+        self.phase_seconds["action_workers"] += time.perf_counter() - start
+        self._record_worker_stats(slots_before, workers_before)
+
+    def _get_worker_states(self) -> Dict[Row, List[Tuple[List[Item], bool]]]:
+        return {
+            row: [(list(worker.held), worker.is_assembling) for worker in row_workers]
+            for row, row_workers in self.workers.items()
+        }
+
+    def _record_worker_stats(self, slots_before: List[Item], workers_before: Dict[Row, List[Tuple[List[Item], bool]]]):
+        for position, slot_before in enumerate(slots_before):
+            top_interacted = self._record_worker(Row.TOP, position, workers_before, slot_before, False)
+            self._record_worker(Row.BOTTOM, position, workers_before, slot_before, top_interacted)
+
+    def _record_worker(
+            self,
+            row: Row,
+            position: int,
+            workers_before: Dict[Row, List[Tuple[List[Item], bool]]],
+            slot_before: Item,
+            lost_turn: bool
+    ) -> bool:
+        worker: Worker = self.workers[row][position]
+        stats = self.worker_stats[row][position]
+        held_before, was_assembling = workers_before[row][position]
+        if was_assembling:
+            stats.assembling_ticks += 1
+        elif Item.P in held_before and Item.P not in worker.held:
+            stats.products_placed += 1
+            return True
+        elif len(worker.held) > len(held_before):
+            stats.components_picked_up += 1
+            return True
+        elif worker.is_assembling or (Item.P in worker.held and Item.P not in held_before):
+            stats.products_assembled += 1
+        else:
+            stats.idle_ticks += 1
+            _, _, would_have_interacted = TRANSITIONS[encode_held(held_before) << SLOT_BITS | slot_before.value]
+            if lost_turn and would_have_interacted:
+                stats.contention_losses += 1
+            elif Item.P in held_before:
+                stats.blocked_ticks += 1
+            else:
+                stats.waiting_for_component_ticks += 1
+        return False
+
+    def get_report(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "phase_seconds": dict(self.phase_seconds),
+            "workers": [
+                {"row": row.name, "position": position + 1, **stats.as_dict()}
+                for row, row_stats in self.worker_stats.items()
+                for position, stats in enumerate(row_stats)
+            ],
+        }
+
+    def print_report(self):
+        report = self.get_report()
+        print(f"Ticks: {report['ticks']}")
+        for phase, seconds in report["phase_seconds"].items():
+            print(f"{phase}: {seconds:.6f}s")
+        for worker in report["workers"]:
+            counts = ", ".join(f"{name}={count}" for name, count in worker.items() if name not in ("row", "position"))
+            print(f"{worker['row']} {worker['position']}: {counts}")
+
+
+def profile(factory: Factory, ticks_to_run: int, output_path: str = None) -> pstats.Stats:
+    # Runs ticks under cProfile for a one off deep dive. The stats can be sorted and printed, or saved to a file for
+    # the usual tools (e.g. snakeviz or python -m pstats).
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(ticks_to_run):
+        factory.tick()
+    profiler.disable()
+    if output_path:
+        profiler.dump_stats(output_path)
+    return pstats.Stats(profiler)
@@ -0,0 +1,117 @@
+import json
+import os
+import random
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from factory_simulator import batch, transitions, vector
+from factory_simulator.ensemble import TALLIED_ITEMS, run_replica
+
+# A jobs file has one JSON object per line, e.g.
+#   {"id": "short", "belt_length": 3, "ticks": 1000, "assembly_ticks": 2, "seed": 7, "engine": "object"}
+# Every key is optional: missing values take the config's defaults, and a missing seed is picked at random and
+# reported with the result, so every result can be reproduced. Each job gives one JSON line back, in the same order.
+JOB_KEYS = ("id", "belt_length", "ticks", "assembly_ticks", "seed", "engine")
+# object steps Factory, table the transition table engine, batch the NumPy engine for many replicas and vector the NumPy
+# engine for one long belt. table and batch only model 1 tick assembly, and batch draws its inputs with NumPy, so its
+# results differ from the others' for a seed.
+ENGINES = ("object", "table", "batch", "vector")
+DEFAULT_ENGINE = "object"
+# Jobs are sent to worker processes in chunks, to keep IPC costs per chunk rather than per job, with a few chunks per
+# process in flight so none of them sit idle while results are written out in order
+JOBS_PER_CHUNK = 16
+CHUNKS_PER_PROCESS = 2
+
+# (line number, line) of a job in the jobs file
+NumberedLine = Tuple[int, str]
+
+
+def parse_job(line: str, get_config: Callable[[int, int, int], dict]) -> dict:
+    # Raises a ValueError for anything that isn't a valid job, rather than failing the whole batch
+    job = json.loads(line)
+    if not isinstance(job, dict):
+        raise ValueError("A job must be a JSON object")
+    unknown = sorted(set(job) - set(JOB_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown job key(s): {', '.join(unknown)}")
+    # Sizes are checked here, as get_config would take 0 to mean the default
+    for key, minimum in (("belt_length", 1), ("ticks", 1), ("assembly_ticks", 1), ("seed", 0)):
+        value = job.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < minimum):
+            raise ValueError(f"{key} must be a whole number, at least {minimum}")
+    engine = job.get("engine") or DEFAULT_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}, expected one of {', '.join(ENGINES)}")
+    config = get_config(job.get("belt_length"), job.get("ticks"), job.get("assembly_ticks"))
+    if engine in ("table", "batch") and config["assembly_ticks"] != 1:
+        raise ValueError(f"The {engine} engine only models products that take 1 tick to assemble")
+    if engine == "vector" and config["assembly_ticks"] > vector.MAX_ASSEMBLY_TICKS:
+        raise ValueError(f"The vector engine only models assembly taking up to {vector.MAX_ASSEMBLY_TICKS} ticks")
+    return {
+        "id": job.get("id"),
+        "config": config,
+        "seed": job["seed"] if job.get("seed") is not None else random.randrange(2 ** 32),
+        "engine": engine
+    }
+
+
+def run_job(job: dict) -> Counter:
+    config, seed = job["config"], job["seed"]
+    if job["engine"] == "table":
+        return transitions.run_table_replica(config["belt_length"], config["ticks_to_run"], seed)
+    if job["engine"] == "vector":
+        return vector.run_vector_replica(config["belt_length"], config["ticks_to_run"], seed, config["assembly_ticks"])
+    if job["engine"] == "batch":
+        return batch.run_batch(config["belt_length"], config["ticks_to_run"], 1, seed)[0]
+    return run_replica(config["belt_length"], config["ticks_to_run"], seed, config["assembly_ticks"])
+
+
+def get_result(line_number: int, line: str, get_config: Callable[[int, int, int], dict]) -> dict:
+    result: Dict[str, object] = {"line": line_number}
+    try:
+        job = parse_job(line, get_config)
+    except ValueError as error:
+        return {**result, "error": str(error)}
+    if job["id"] is not None:
+        result["id"] = job["id"]
+    result.update(config=job["config"], seed=job["seed"], engine=job["engine"])
+    # A job that fails to run, e.g. running out of memory, is reported with what's needed to reproduce it, rather than
+    # failing the whole batch
+    try:
+        counts = run_job(job)
+    except Exception as error:
+        return {**result, "error": f"{type(error).__name__}: {error}"}
+    return {**result, "counts": {item.name: counts[item] for item in TALLIED_ITEMS}}
+
+
+def _run_chunk(get_config: Callable[[int, int, int], dict], lines: List[NumberedLine]) -> List[dict]:
+    return [get_result(line_number, line, get_config) for line_number, line in lines]
+
+
+def iter_results(
+        lines: Iterable[str],
+        get_config: Callable[[int, int, int], dict],
+        max_workers: int = None,
+        jobs_per_chunk: int = JOBS_PER_CHUNK
+) -> Iterator[dict]:
+    # Yields one result per non-blank line, in order, as soon as it and every result before it are ready. Lines are
+    # only read as far ahead as the chunks in flight, so a jobs file of any length runs in bounded memory. The same
+    # worker processes are used for every job, so they only pay for start up and imports once.
+    numbered = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+    chunks = iter(lambda: list(islice(numbered, jobs_per_chunk)), [])
+    run_chunk = partial(_run_chunk, get_config)
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        for chunk in chunks:
+            yield from run_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers) as executor:
+        in_flight = deque(executor.submit(run_chunk, chunk) for chunk in islice(chunks, max_workers * CHUNKS_PER_PROCESS))
+        while in_flight:
+            results = in_flight.popleft().result()
+            for chunk in islice(chunks, 1):
+                in_flight.append(executor.submit(run_chunk, chunk))
+            yield from results
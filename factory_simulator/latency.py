@@ -0,0 +1,317 @@
+import math
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.tally import Tally
+from factory_simulator.worker import Worker
+
+# Quantiles reported for every latency
+QUANTILES = (0.5, 0.9, 0.99)
+# Histogram buckets are exact below 2 ** SUB_BUCKET_BITS ticks, and within 1 / 2 ** SUB_BUCKET_BITS of the value above
+SUB_BUCKET_BITS = 5
+# Tick stored for an item or worker with nothing to track
+UNTRACKED = -1
+LATENCIES = ("pickup_delay", "product_dwell", "product_latency")
+
+
+class LogHistogram:
+    # Streaming histogram of whole numbers of ticks with log-linear buckets, as in HdrHistogram. Each power of two is
+    # split into 2 ** sub_bucket_bits buckets, so there are never more than a couple of thousand buckets however long
+    # the run or large the values, and any quantile is within the relative error of one bucket.
+    __slots__ = ("sub_bucket_bits", "counts", "count", "total", "min", "max")
+
+    def __init__(self, sub_bucket_bits: int = SUB_BUCKET_BITS):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _get_index(self, value: int) -> int:
+        sub_buckets = 1 << self.sub_bucket_bits
+        if value < 2 * sub_buckets:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits - 1
+        return ((shift + 1) << self.sub_bucket_bits) + (value >> shift) - sub_buckets
+
+    def get_bounds(self, index: int) -> Tuple[int, int]:
+        # The smallest and largest values that go in a bucket
+        sub_buckets = 1 << self.sub_bucket_bits
+        if index < 2 * sub_buckets:
+            return index, index
+        shift = (index >> self.sub_bucket_bits) - 1
+        low = (sub_buckets + (index & (sub_buckets - 1))) << shift
+        return low, low + (1 << shift) - 1
+
+    def add(self, value: int):
+        index = self._get_index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def get_quantile(self, quantile: float) -> Optional[int]:
+        # The largest value in the bucket holding the quantile, capped at the largest value seen
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(quantile * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.get_bounds(index)[1], self.max)
+        return self.max
+
+    def get_buckets(self) -> List[Tuple[int, int, int]]:
+        # (smallest value, largest value, count) of every bucket with anything in it
+        return [(*self.get_bounds(index), count) for index, count in enumerate(self.counts) if count]
+
+
+class P2Quantile:
+    # Jain and Chlamtac's P-square estimate of a single quantile, from five markers updated as each value arrives, so
+    # it takes constant memory and time per value. Exact until there are more than five values.
+    __slots__ = ("quantile", "heights", "positions", "desired", "increments")
+
+    def __init__(self, quantile: float):
+        self.quantile = quantile
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            self._adjust(i)
+
+    def _adjust(self, i: int):
+        heights, positions = self.heights, self.positions
+        offset = self.desired[i] - positions[i]
+        can_move_up = offset >= 1 and positions[i + 1] - positions[i] > 1
+        can_move_down = offset <= -1 and positions[i - 1] - positions[i] < -1
+        if can_move_up or can_move_down:
+            step = 1 if offset > 0 else -1
+            height = self._get_parabolic(i, step)
+            if not heights[i - 1] < height < heights[i + 1]:
+                height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+            heights[i] = height
+            positions[i] += step
+
+    def _get_parabolic(self, i: int, step: int) -> float:
+        heights, positions = self.heights, self.positions
+        below, above = positions[i] - positions[i - 1], positions[i + 1] - positions[i]
+        return heights[i] + step / (below + above) * (
+            (below + step) * (heights[i + 1] - heights[i]) / above
+            + (above - step) * (heights[i] - heights[i - 1]) / below
+        )
+
+    def get(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            ordered = sorted(self.heights)
+            return ordered[min(len(ordered) - 1, max(0, math.ceil(self.quantile * len(ordered)) - 1))]
+        return self.heights[2]
+
+
+class LatencyStats:
+    # A histogram of one latency, with a P-square sketch for each reported quantile
+    __slots__ = ("histogram", "sketches")
+
+    def __init__(self, quantiles: Sequence[float] = QUANTILES, sub_bucket_bits: int = SUB_BUCKET_BITS):
+        self.histogram = LogHistogram(sub_bucket_bits)
+        self.sketches = [P2Quantile(quantile) for quantile in quantiles]
+
+    def add(self, ticks: int):
+        self.histogram.add(ticks)
+        for sketch in self.sketches:
+            sketch.add(ticks)
+
+    def get_summary(self) -> dict:
+        histogram = self.histogram
+        return {
+            "count": histogram.count,
+            "mean": histogram.mean,
+            "min": histogram.min,
+            "max": histogram.max,
+            "quantiles": {sketch.quantile: sketch.get() for sketch in self.sketches}
+        }
+
+
+class LatencyTracker:
+    # Tags every item on the belt with the tick it was put there, and every product with the tick its first component
+    # was picked up, in arrays running in parallel to the belt's slots and the rows of workers, rather than giving
+    # items identities of their own. Memory only grows with the belt, however long the run.
+    #
+    # pickup_delay     ticks from a component going on the belt to a worker picking it up
+    # product_dwell    ticks from a product being placed on the belt to it coming off the end
+    # product_latency  ticks from the first of a product's components being picked up to it coming off the end
+    def __init__(
+            self,
+            belt_length: int,
+            quantiles: Sequence[float] = QUANTILES,
+            sub_bucket_bits: int = SUB_BUCKET_BITS
+    ):
+        self.tick = 0
+        # Indexed the same way as the belt's slots, so a move shifts the head offset like BeltSlots
+        self._entered = array("q", [UNTRACKED]) * belt_length
+        self._origin = array("q", [UNTRACKED]) * belt_length
+        self._head = 0
+        # Per worker: when the first component they're holding was picked up, and the origin of a held product
+        self._first_pickup: Dict[Row, array] = {row: array("q", [UNTRACKED]) * belt_length for row in Row}
+        self._product_origin: Dict[Row, array] = {row: array("q", [UNTRACKED]) * belt_length for row in Row}
+        self.latencies: Dict[str, LatencyStats] = {
+            name: LatencyStats(quantiles, sub_bucket_bits) for name in LATENCIES
+        }
+        # Components that came off the end without ever being picked up
+        self.components_missed = 0
+
+    def _get_index(self, position: int) -> int:
+        return (self._head + position) % len(self._entered)
+
+    def move(self, tick: int, item_removed: Item):
+        # Called after the belt moves, with the item that came off the end
+        self.tick = tick
+        if not self._entered:
+            return
+        self._head = (self._head - 1) % len(self._entered)
+        if item_removed is Item.P:
+            # Products already on the belt when tracking started have no entry tick, or origin
+            if self._entered[self._head] != UNTRACKED:
+                self.latencies["product_dwell"].add(tick - self._entered[self._head])
+            if self._origin[self._head] != UNTRACKED:
+                self.latencies["product_latency"].add(tick - self._origin[self._head])
+        elif item_removed in Item.COMPONENT and self._entered[self._head] != UNTRACKED:
+            self.components_missed += 1
+        self._entered[self._head] = tick
+        self._origin[self._head] = UNTRACKED
+
+    def pick_up(self, row: Row, position: int):
+        entered = self._entered[self._get_index(position)]
+        # Items already on the belt when tracking started have no entry tick
+        if entered != UNTRACKED:
+            self.latencies["pickup_delay"].add(self.tick - entered)
+        if self._first_pickup[row][position] == UNTRACKED:
+            self._first_pickup[row][position] = self.tick
+
+    def assemble(self, row: Row, position: int):
+        self._product_origin[row][position] = self._first_pickup[row][position]
+        self._first_pickup[row][position] = UNTRACKED
+
+    def place(self, row: Row, position: int):
+        index = self._get_index(position)
+        self._entered[index] = self.tick
+        self._origin[index] = self._product_origin[row][position]
+        self._product_origin[row][position] = UNTRACKED
+
+    def get_report(self) -> dict:
+        return {
+            "components_missed": self.components_missed,
+            **{name: stats.get_summary() for name, stats in self.latencies.items()}
+        }
+
+
+class TrackedWorker(Worker):
+    # Worker that tells the tracker whenever it picks a component up, starts assembling or places a product
+    def __init__(self, belt_position: int, row: Row, tracker: LatencyTracker, assembly_ticks: int = ASSEMBLY_TICKS):
+        super().__init__(belt_position, row, assembly_ticks)
+        self.tracker = tracker
+
+    def _place_product(self, belt: Belt) -> bool:
+        if super()._place_product(belt):
+            self.tracker.place(self.row, self.belt_position)
+            return True
+        return False
+
+    def _pick_up_component(self, belt: Belt) -> bool:
+        if super()._pick_up_component(belt):
+            self.tracker.pick_up(self.row, self.belt_position)
+            return True
+        return False
+
+    def _assemble(self) -> bool:
+        if super()._assemble():
+            self.tracker.assemble(self.row, self.belt_position)
+            return True
+        return False
+
+
+class TrackedFactory(Factory):
+    # Factory that also tracks how long items take to get through it, see LatencyTracker. Like InstrumentedFactory,
+    # it's a separate class so running without tracking costs nothing. Only the events of each tick are tracked, so
+    # it costs little more than Factory itself.
+    # Takes the same arguments as Factory, with the quantiles to report as a keyword. Workers passed in are replaced
+    # with TrackedWorkers in the same state, and any missing are added, so every worker reports to the tracker.
+    def __init__(
+            self,
+            belt_length: int,
+            belt: Belt = None,
+            workers: Dict[Row, List[Worker]] = None,
+            is_silent: bool = False,
+            tally: Tally = None,
+            assembly_ticks: int = ASSEMBLY_TICKS,
+            ticks: int = 0,
+            *,
+            quantiles: Sequence[float] = QUANTILES
+    ):
+        self.latency = LatencyTracker(belt_length, quantiles)
+        self.latency.tick = ticks
+        tracked_workers = {row: [] for row in (Row.TOP, Row.BOTTOM)}
+        for row, row_workers in tracked_workers.items():
+            given = (workers or {}).get(row, [])
+            for position in range(belt_length):
+                tracked = TrackedWorker(position, row, self.latency, assembly_ticks)
+                if position < len(given):
+                    tracked.held = given[position].held
+                    tracked.assembly_ticks = given[position].assembly_ticks
+                    tracked.assembly_ticks_remaining = given[position].assembly_ticks_remaining
+                row_workers.append(tracked)
+        super().__init__(belt_length, belt, tracked_workers, is_silent, tally, assembly_ticks, ticks)
+
+    def _record_output(self, item_removed: Item):
+        super()._record_output(item_removed)
+        self.latency.move(self.ticks, item_removed)
+
+    def print_report(self):
+        report = self.latency.get_report()
+        print(f"Components missed: {report['components_missed']}")
+        for name in LATENCIES:
+            summary = report[name]
+            if not summary["count"]:
+                print(f"{name}: none")
+                continue
+            quantiles = ", ".join(
+                f"p{quantile * 100:g} {value:.1f}" for quantile, value in summary["quantiles"].items()
+            )
+            print(
+                f"{name}: {summary['count']} item(s), mean {summary['mean']:.2f}, min {summary['min']}, "
+                f"max {summary['max']} ticks, {quantiles}"
+            )
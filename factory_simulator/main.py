@@ -1,30 +1,297 @@
-from factory_simulator.config import BELT_LENGTH, TICKS_TO_RUN, ASSEMBLY_TICKS
+import json
+import os
+import random
+import sys
+from contextlib import ExitStack
+from typing import Sequence
+
+from factory_simulator import (
+    checkpoint, convergence, ensemble, inputs, jobs, markov, recipes, segmented, stream, sweep, variance
+)
+from factory_simulator.belt import Belt
+from factory_simulator.config import (
+    BELT_LENGTH, TICKS_TO_RUN, ASSEMBLY_TICKS, CHECKPOINT_SECONDS, SWEEP_CACHE_DIR, SWEEP_CACHE_MAX_BYTES
+)
 from factory_simulator.factory import Factory
+from factory_simulator.instrumentation import InstrumentedFactory
+from factory_simulator.latency import TrackedFactory
+from factory_simulator.rendering import Renderer
+from factory_simulator.trace import TraceRecorder
 
 
-def run_stepped_simulation(belt_length: int):
-    factory = Factory(belt_length)
-    cancel = input("What do you want to do? Press enter to step through to the next tick, or any other input to exit\n")
-    while not cancel:
-        factory.tick()
-        factory.print_state()
-        cancel = input("What do you want to do now? Same options as before!\n")
+def get_belt(arrivals: str = None, seed: int = None) -> Belt:
+    # A belt fed by the arrival model in the spec, see inputs.make_inputs, from the seed if there is one, so the run
+    # can be reproduced. None, for the factory's default belt, if neither is given.
+    return Belt(inputs.make_inputs(arrivals, seed)) if arrivals or seed is not None else None
+
+
+def close_belt(belt: Belt = None):
+    # Replayed inputs keep their recording open until closed
+    if belt is not None and isinstance(belt.inputs, inputs.ReplayInputs):
+        belt.inputs.close()
+
+
+def run_stepped_simulation(
+        belt_length: int,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        arrivals: str = None,
+        seed: int = None
+):
+    belt = get_belt(arrivals, seed)
+    try:
+        factory = Factory(belt_length, belt, assembly_ticks=assembly_ticks)
+        events = stream.iter_ticks(factory)
+        cancel = input(
+            "What do you want to do? Press enter to step through to the next tick, or any other input to exit\n"
+        )
+        while not cancel:
+            next(events)
+            factory.print_state()
+            cancel = input("What do you want to do now? Same options as before!\n")
+    finally:
+        close_belt(belt)
+    factory.print_tally()
+
+
+def run_set_tick_simulation(
+        belt_length: int,
+        ticks_to_run: int,
+        is_verbose: bool = False,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        is_instrumented: bool = False,
+        checkpoint_path: str = None,
+        checkpoint_seconds: float = CHECKPOINT_SECONDS,
+        render_options: dict = None,
+        trace_path: str = None,
+        is_latency_tracked: bool = False,
+        arrivals: str = None,
+        seed: int = None
+):
+    if checkpoint_path:
+        # Checkpoints only store the state of RandomInputs, seeded afresh, and of a plain Factory
+        if arrivals and arrivals != "uniform":
+            raise ValueError("Only uniform arrivals can be checkpointed")
+        unsupported = {
+            "-v": is_verbose, "-i": is_instrumented, "--trace": trace_path, "--latency": is_latency_tracked,
+            "--seed": seed is not None
+        }
+        if any(unsupported.values()):
+            options = ", ".join(option for option, value in unsupported.items() if value)
+            raise ValueError(f"Checkpointed runs can't be used with {options}")
+        run_checkpointed_simulation(belt_length, ticks_to_run, assembly_ticks, checkpoint_path, checkpoint_seconds)
+        return
+    factory_class = TrackedFactory if is_latency_tracked else InstrumentedFactory if is_instrumented else Factory
+    # Everything opened for the run is closed however it ends, in reverse order
+    with ExitStack() as resources:
+        belt = get_belt(arrivals, seed)
+        resources.callback(close_belt, belt)
+        factory = factory_class(belt_length, belt, assembly_ticks=assembly_ticks)
+        # Options for the renderer, e.g. to only render every so many ticks, see rendering.Renderer
+        renderer = Renderer(**(render_options or {})) if is_verbose else None
+        if renderer:
+            resources.callback(renderer.close)
+        recorder = TraceRecorder(trace_path, factory) if trace_path else None
+        if recorder:
+            resources.callback(recorder.close)
+        print("Running...")
+        for _ in stream.iter_ticks(factory, ticks_to_run):
+            if renderer:
+                renderer.render(factory)
+            if recorder:
+                recorder.record()
+    print("Finished")
+    factory.print_tally()
+    if is_instrumented or is_latency_tracked:
+        factory.print_report()
+
+
+def run_checkpointed_simulation(
+        belt_length: int,
+        ticks_to_run: int,
+        assembly_ticks: int,
+        checkpoint_path: str,
+        checkpoint_seconds: float = CHECKPOINT_SECONDS
+):
+    # Picks up from the checkpoint if there is one, so a killed run can be restarted with the same command
+    if os.path.exists(checkpoint_path):
+        factory = checkpoint.load(checkpoint_path)
+        # The command must be the same as the one that started the run, or the result would be neither run's
+        if (len(factory.belt.slots), factory.assembly_ticks) != (belt_length, assembly_ticks):
+            raise ValueError(
+                f"{checkpoint_path} is of a run with a belt length of {len(factory.belt.slots)} and"
+                f" {factory.assembly_ticks} assembly tick(s), not {belt_length} and {assembly_ticks}"
+            )
+        print(f"Resuming from tick {factory.ticks}...")
+    else:
+        factory = Factory(belt_length, assembly_ticks=assembly_ticks, is_silent=True)
+        print("Running...")
+    factory, checkpoints = checkpoint.run_with_checkpoints(
+        factory, ticks_to_run, checkpoint_path, every_seconds=checkpoint_seconds
+    )
+    print(f"Finished, writing {checkpoints} checkpoint(s) to {checkpoint_path}")
+    factory.print_tally()
+
+
+def run_segmented_simulation(
+        belt_length: int,
+        ticks_to_run: int,
+        segments: int,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        arrivals: str = None,
+        seed: int = None
+):
+    # One long belt split over several processes, with the same result as a set tick run on one. Inputs are drawn in
+    # this process, so any arrival model works.
+    belt = get_belt(arrivals, seed)
+    try:
+        factory = Factory(belt_length, belt, assembly_ticks=assembly_ticks, is_silent=True)
+        bounds = segmented.get_segment_bounds(belt_length, segments)
+        print(f"Running over {len(bounds)} segment(s)...")
+        factory = segmented.run_segmented(factory, ticks_to_run, len(bounds))
+    finally:
+        close_belt(belt)
+    print("Finished")
     factory.print_tally()
 
 
-def run_set_tick_simulation(belt_length: int, ticks_to_run: int, is_verbose: bool = False):
-    factory = Factory(belt_length)
+def run_recipe_simulation(
+        belt_length: int,
+        ticks_to_run: int,
+        recipes_path: str,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        seed: int = None
+):
+    # Products made to the recipes in a JSON file, see recipes.load_recipes, rather than just P from A and B
+    definition = recipes.load_recipes(recipes_path)
+    book = recipes.RecipeBook(definition["recipes"], definition["hands"])
+    factory = recipes.RecipeFactory(
+        belt_length, book, book.make_inputs(seed, definition.get("inputs")), assembly_ticks=assembly_ticks
+    )
     print("Running...")
-    ticks = 0
-    while ticks < ticks_to_run:
+    for _ in range(ticks_to_run):
         factory.tick()
-        ticks += 1
-        if is_verbose:
-            factory.print_state()
     print("Finished")
     factory.print_tally()
 
 
+def run_ensemble_simulation(
+        belt_length: int,
+        ticks_to_run: int,
+        replicas: int,
+        seed: int = None,
+        max_workers: int = None,
+        assembly_ticks: int = ASSEMBLY_TICKS
+):
+    # Without a seed one is picked at random, but it's always printed so the ensemble can be reproduced
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    print(f"Running {replicas} replica(s) with seed {seed}...")
+    summary = ensemble.run_ensemble(
+        belt_length, ticks_to_run, replicas, seed, max_workers, assembly_ticks=assembly_ticks
+    )
+    print("Finished")
+    print(summary["total"])
+    for item in ensemble.TALLIED_ITEMS:
+        low, high = summary["confidence_interval"][item]
+        print(
+            f"{item.name}: mean {summary['mean'][item]:.3f}, variance {summary['variance'][item]:.3f}, "
+            f"95% CI [{low:.3f}, {high:.3f}]"
+        )
+
+
+def run_variance_reduced_simulation(
+        belt_length: int,
+        ticks_to_run: int,
+        replicas: int,
+        seed: int = None,
+        max_workers: int = None,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        comparison: dict = None,
+        is_antithetic: bool = False,
+        is_controlled: bool = False
+):
+    # Products per replica, and the difference a change of configuration makes, with fewer replicas for the same
+    # precision, see variance.run_variance_reduced
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    techniques = [
+        name for name, is_used in (
+            ("common random numbers", comparison), ("antithetic pairs", is_antithetic),
+            ("control variates", is_controlled)
+        ) if is_used
+    ]
+    print(f"Running {replicas} replica(s) with seed {seed}, using {', '.join(techniques)}...")
+    summary = variance.run_variance_reduced(
+        belt_length, ticks_to_run, replicas, seed, max_workers, assembly_ticks, comparison, is_antithetic,
+        is_controlled
+    )
+    print(f"Finished {summary['replicas']} replica(s) per configuration")
+    estimates = [
+        (f"belt length {config['belt_length']}, {config['assembly_ticks']} assembly tick(s)", products)
+        for config, products in zip(summary["configs"], summary["products"])
+    ]
+    if summary["difference"]:
+        estimates.append(("Difference", summary["difference"]))
+    for label, estimate in estimates:
+        low, high = estimate["confidence_interval"]
+        print(
+            f"{label}: P mean {estimate['mean']:.3f}, 95% CI [{low:.3f}, {high:.3f}], "
+            f"variance reduced {estimate['variance_reduction']:.2f}x"
+        )
+
+
+def run_converging_simulation(
+        belt_length: int,
+        tolerance: float,
+        seed: int = None,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        max_ticks: int = None
+):
+    # Runs for as long as it takes to pin products per tick down to within the tolerance, rather than a set time
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    print(f"Running until products per tick is within +/-{tolerance} with seed {seed}...")
+    result = convergence.run_converging_replica(
+        belt_length, tolerance, seed, assembly_ticks, max_ticks or convergence.MAX_TICKS
+    )
+    print("Finished" if result["is_converged"] else f"Stopped at the limit of {result['ticks']} ticks")
+    low, high = result["confidence_interval"]
+    print(
+        f"P: {result['rate']:.6f} per tick, 95% CI [{low:.6f}, {high:.6f}] (+/-{result['half_width']:.6f})\n"
+        f"Ran {result['ticks']} ticks, dropping {result['warm_up_ticks']} of warm-up, "
+        f"then {result['batches']} batch(es) of {result['batch_ticks']}"
+    )
+
+
+def run_analytic_simulation(belt_length: int, ticks_to_run: int, assembly_ticks: int = ASSEMBLY_TICKS):
+    # Exact long run rates from the factory's Markov chain, rather than simulating ticks
+    if assembly_ticks != 1:
+        raise ValueError("The analytic solver only models products that take 1 tick to assemble")
+    print("Solving...")
+    solution = markov.solve(belt_length)
+    print(f"Solved over {solution['states']} reachable state(s) in {solution['iterations']} iteration(s)")
+    for item, rate in solution["rates"].items():
+        print(f"{item.name}: {rate:.6f} per tick, {rate * ticks_to_run:.3f} per {ticks_to_run} ticks")
+
+
+def run_sweep_simulation(
+        belt_lengths: Sequence[int],
+        ticks_to_run: Sequence[int],
+        assembly_ticks: Sequence[int],
+        seeds: Sequence[int],
+        max_workers: int = None,
+        cache_dir: str = SWEEP_CACHE_DIR,
+        cache_max_bytes: int = SWEEP_CACHE_MAX_BYTES
+):
+    # Runs every combination of the given values, reusing any results already in the cache
+    points = sweep.expand_grid(get_config, belt_lengths, ticks_to_run, assembly_ticks, seeds)
+    print(f"Sweeping {len(points)} point(s)...")
+    results = sweep.run_sweep(points, sweep.ResultCache(cache_dir, cache_max_bytes), max_workers)
+    cached = sum(result["is_cached"] for result in results)
+    print(f"Finished, {len(points) - cached} run and {cached} from the cache")
+    print(sweep.format_table(results))
+
+
 def get_config(belt_length: int = None, ticks_to_run: int = None, assembly_ticks: int = None) -> dict:
     belt_length = belt_length or BELT_LENGTH
     ticks_to_run = ticks_to_run or TICKS_TO_RUN
@@ -32,15 +299,103 @@ def get_config(belt_length: int = None, ticks_to_run: int = None, assembly_ticks
     return {"belt_length": belt_length, "ticks_to_run": ticks_to_run, "assembly_ticks": assembly_ticks}
 
 
+def run_batch_jobs(jobs_path: str, output_path: str = None, max_workers: int = None):
+    # Runs every job in a JSON lines file, or stdin for -, writing nothing but one JSON line per job, so the output
+    # can be piped straight into something else
+    jobs_file = sys.stdin if jobs_path == "-" else open(jobs_path)
+    output_file = open(output_path, "w") if output_path else sys.stdout
+    try:
+        for result in jobs.iter_results(jobs_file, get_config, max_workers):
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+    except BrokenPipeError:
+        # Whatever was reading the results has gone, e.g. head, so there's no one left to tell. Python's own flush of
+        # stdout on exit would fail the same way, so it's pointed at devnull.
+        if output_file is sys.stdout:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if jobs_file is not sys.stdin:
+            jobs_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
 def run(
+        *,
         is_stepped: bool = False,
         belt_length: int = None,
         ticks_to_run: int = None,
         assembly_ticks: int = None,
-        is_verbose: bool = False
+        is_verbose: bool = False,
+        replicas: int = None,
+        seed: int = None,
+        max_workers: int = None,
+        is_analytic: bool = False,
+        is_instrumented: bool = False,
+        checkpoint_path: str = None,
+        checkpoint_seconds: float = None,
+        sweep_grid: dict = None,
+        render_options: dict = None,
+        trace_path: str = None,
+        tolerance: float = None,
+        segments: int = None,
+        batch_path: str = None,
+        batch_output_path: str = None,
+        is_latency_tracked: bool = False,
+        arrivals: str = None,
+        recipes_path: str = None,
+        comparison: dict = None,
+        is_antithetic: bool = False,
+        is_controlled: bool = False
 ):
     config = get_config(belt_length, ticks_to_run, assembly_ticks)
-    if is_stepped:
-        run_stepped_simulation(config["belt_length"])
+    if batch_path:
+        run_batch_jobs(batch_path, batch_output_path, max_workers)
+    elif sweep_grid:
+        # Any value not being swept over is fixed at the one given for a single run
+        run_sweep_simulation(
+            sweep_grid.get("belt_lengths") or [belt_length],
+            sweep_grid.get("ticks_to_run") or [ticks_to_run],
+            sweep_grid.get("assembly_ticks") or [assembly_ticks],
+            sweep_grid.get("seeds") or [seed or 0],
+            max_workers
+        )
+    elif is_stepped:
+        run_stepped_simulation(config["belt_length"], config["assembly_ticks"], arrivals, seed)
+    elif is_analytic:
+        run_analytic_simulation(config["belt_length"], config["ticks_to_run"], config["assembly_ticks"])
+    elif tolerance:
+        # Ticks are only a limit here, so there's no default
+        run_converging_simulation(config["belt_length"], tolerance, seed, config["assembly_ticks"], ticks_to_run)
+    elif segments:
+        run_segmented_simulation(
+            config["belt_length"], config["ticks_to_run"], segments, config["assembly_ticks"], arrivals, seed
+        )
+    elif recipes_path:
+        run_recipe_simulation(
+            config["belt_length"], config["ticks_to_run"], recipes_path, config["assembly_ticks"], seed
+        )
+    elif replicas and (comparison or is_antithetic or is_controlled):
+        run_variance_reduced_simulation(
+            config["belt_length"], config["ticks_to_run"], replicas, seed, max_workers, config["assembly_ticks"],
+            comparison, is_antithetic, is_controlled
+        )
+    elif replicas:
+        run_ensemble_simulation(
+            config["belt_length"], config["ticks_to_run"], replicas, seed, max_workers, config["assembly_ticks"]
+        )
     else:
-        run_set_tick_simulation(config["belt_length"], config["ticks_to_run"], is_verbose)
+        run_set_tick_simulation(
+            config["belt_length"],
+            config["ticks_to_run"],
+            is_verbose,
+            config["assembly_ticks"],
+            is_instrumented,
+            checkpoint_path,
+            checkpoint_seconds or CHECKPOINT_SECONDS,
+            render_options,
+            trace_path,
+            is_latency_tracked,
+            arrivals,
+            seed
+        )
@@ -0,0 +1,78 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from factory_simulator.enums import Item
+from factory_simulator.transitions import ITEMS_BY_VALUE, SLOT_BITS, TRANSITIONS
+from factory_simulator.inputs import RandomInputs
+
+# A state is (belt slots, top row hands, bottom row hands), each a tuple encoded the same way as TableFactory
+State = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+INPUT_VALUES = tuple(item.value for item in RandomInputs.INPUTS)
+TOLERANCE = 1e-13
+MAX_ITERATIONS = 1_000_000
+
+
+def get_empty_state(belt_length: int) -> State:
+    return (Item.EMPTY.value,) * belt_length, (0,) * belt_length, (0,) * belt_length
+
+
+def step(state: State, input_value: int) -> State:
+    # One tick of the factory from a given state, following the same transition table as TableFactory
+    slots, top_hands, bottom_hands = state
+    slots = [input_value, *slots][:len(slots)]
+    top_hands, bottom_hands = list(top_hands), list(bottom_hands)
+    for position, slot in enumerate(slots):
+        top_hands[position], slot, interacted = TRANSITIONS[top_hands[position] << SLOT_BITS | slot]
+        if not interacted:
+            bottom_hands[position], slot, interacted = TRANSITIONS[bottom_hands[position] << SLOT_BITS | slot]
+        slots[position] = slot
+    return tuple(slots), tuple(top_hands), tuple(bottom_hands)
+
+
+def build_chain(belt_length: int) -> Tuple[List[State], np.ndarray]:
+    # Enumerates every state reachable from the empty factory. The sparse transition matrix is kept as one array of
+    # next state indexes per input, as each input is equally likely and leads to exactly one state.
+    states = [get_empty_state(belt_length)]
+    indexes: Dict[State, int] = {states[0]: 0}
+    next_states: List[List[int]] = [[] for _ in INPUT_VALUES]
+    for state in states:
+        for input_index, input_value in enumerate(INPUT_VALUES):
+            next_state = step(state, input_value)
+            if next_state not in indexes:
+                indexes[next_state] = len(states)
+                states.append(next_state)
+            next_states[input_index].append(indexes[next_state])
+    return states, np.array(next_states, dtype=np.int64)
+
+
+def solve_stationary_distribution(next_states: np.ndarray) -> Tuple[np.ndarray, int]:
+    # Power iteration from the empty factory. There's always a self loop on the empty state (an empty input with no
+    # one holding anything), so the chain is aperiodic and this converges to the long run distribution.
+    state_count = next_states.shape[1]
+    weight = 1 / next_states.shape[0]
+    distribution = np.zeros(state_count)
+    distribution[0] = 1.0
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        new_distribution = sum(
+            np.bincount(input_next_states, weights=distribution * weight, minlength=state_count)
+            for input_next_states in next_states
+        )
+        if np.abs(new_distribution - distribution).max() < TOLERANCE:
+            return new_distribution, iteration
+        distribution = new_distribution
+    raise RuntimeError(f"Stationary distribution did not converge in {MAX_ITERATIONS} iterations")
+
+
+def solve(belt_length: int) -> dict:
+    # The item leaving the belt each tick is whatever is in the last slot, so the long run rate of each output is
+    # the stationary probability of being in a state with that item at the end of the belt
+    states, next_states = build_chain(belt_length)
+    distribution, iterations = solve_stationary_distribution(next_states)
+    if belt_length:
+        last_slots = np.array([slots[-1] for slots, _, _ in states])
+        rates = {item: float(distribution[last_slots == value].sum()) for value, item in ITEMS_BY_VALUE.items()}
+    else:
+        # With no belt, the inputs go straight off the end
+        rates = {item: 1 / len(INPUT_VALUES) if item.value in INPUT_VALUES else 0.0 for item in ITEMS_BY_VALUE.values()}
+    return {"states": len(states), "iterations": iterations, "rates": rates}
@@ -0,0 +1,233 @@
+import json
+from enum import Flag
+from typing import Callable, Dict, List, Optional, Sequence
+
+from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import WeightedInputs
+from factory_simulator.tally import Tally
+from factory_simulator.worker import Worker
+
+# Recipes are declared as data, e.g. a product S made from A, B and C, then P made from S and D in 3 ticks:
+#   {"hands": 3, "recipes": [{"product": "S", "components": ["A", "B", "C"]},
+#                            {"product": "P", "components": ["S", "D"], "ticks": 3}]}
+# Every part gets its own bit, so the components a worker holds are one integer, and a recipe book compiles what each
+# combination of held components still needs, and which recipe it completes, into tables indexed by that integer.
+# Products are placed on the belt like P, so a product that is another recipe's component is picked up further down.
+# Parts never produced by a recipe are the factory's inputs, along with empty slots.
+DEFAULT_RECIPES = {"hands": Worker.NUMBER_OF_HANDS, "recipes": [{"product": "P", "components": ["A", "B"]}]}
+# Tables have 2 ** (components + 1) entries, so this keeps them to a few thousand
+MAX_COMPONENTS = 12
+RECIPE_KEYS = ("product", "components", "ticks")
+
+
+class Part(Flag):
+    # Base for each recipe book's own parts. Empty slots are still Item.EMPTY, whose value is bit 0, so parts start at
+    # bit 1 and an empty slot never matches anything a worker needs.
+    def __repr__(self):
+        return self.name
+
+
+class Recipe:
+    __slots__ = ("product", "components", "ticks", "mask")
+
+    def __init__(self, product: Part, components: Sequence[Part], ticks: Optional[int] = None):
+        self.product = product
+        self.components = tuple(components)
+        # None for the factory's assembly ticks
+        self.ticks = ticks
+        self.mask = 0
+        for component in components:
+            self.mask |= component.value
+
+
+def _check_recipes(recipes: Sequence[dict], hands: int):
+    if not recipes:
+        raise ValueError("There must be at least one recipe")
+    products = [recipe.get("product") for recipe in recipes]
+    if len(set(products)) != len(products):
+        raise ValueError("Each product can only have one recipe")
+    for recipe in recipes:
+        unknown = sorted(set(recipe) - set(RECIPE_KEYS))
+        if unknown:
+            raise ValueError(f"Unknown recipe key(s): {', '.join(unknown)}")
+        components = recipe.get("components") or []
+        names = [recipe.get("product"), *components]
+        if not all(isinstance(name, str) and name.isidentifier() and name != Item.EMPTY.name for name in names):
+            raise ValueError(f"Part names must be identifiers other than {Item.EMPTY.name}: {names}")
+        if not components or len(set(components)) != len(components):
+            raise ValueError(f"{recipe['product']} needs at least one component, each one different")
+        if len(components) > hands:
+            raise ValueError(f"{recipe['product']} needs more components than the {hands} hand(s) workers have")
+        ticks = recipe.get("ticks")
+        if ticks is not None and (not isinstance(ticks, int) or isinstance(ticks, bool) or ticks < 1):
+            raise ValueError(f"{recipe['product']} must take a whole number of ticks, at least 1")
+    # Every product must be makeable from inputs, so products can't be built from each other in a cycle
+    makeable = {component for recipe in recipes for component in recipe["components"]} - set(products)
+    remaining = list(recipes)
+    while remaining:
+        ready = [recipe for recipe in remaining if set(recipe["components"]) <= makeable]
+        if not ready:
+            raise ValueError(f"Products can't be made from the inputs: {', '.join(r['product'] for r in remaining)}")
+        makeable.update(recipe["product"] for recipe in ready)
+        remaining = [recipe for recipe in remaining if recipe not in ready]
+
+
+class RecipeBook:
+    # The parts and recipes of a factory, compiled into lookup tables indexed by the mask of a worker's held
+    # components:
+    #   needs      the components they could still pick up, towards any recipe their held ones are part of, or none
+    #              once their components fill their hands
+    #   completes  the recipe their held components make, or None
+    # so what a worker needs and whether they can assemble are each an index and an AND, however many parts there are.
+    # If one recipe's components are part of a bigger one's, workers holding them keep picking up towards the bigger
+    # one for as long as there's something they need in their slot.
+    def __init__(self, recipes: Sequence[dict], hands: int = Worker.NUMBER_OF_HANDS):
+        _check_recipes(recipes, hands)
+        self.hands = hands
+        products = [recipe["product"] for recipe in recipes]
+        components = list(dict.fromkeys(component for recipe in recipes for component in recipe["components"]))
+        if len(components) > MAX_COMPONENTS:
+            raise ValueError(f"Recipes can use at most {MAX_COMPONENTS} different components")
+        # Components first, so their bits are the lowest and index the tables, then products only ever placed
+        names = components + [product for product in products if product not in components]
+        self.parts = Part("Parts", [(name, 1 << bit) for bit, name in enumerate(names, 1)])
+        self.inputs: List[Part] = [self.parts[name] for name in components if name not in products]
+        self.products: List[Part] = [self.parts[name] for name in products]
+        self.recipes: List[Recipe] = [
+            Recipe(
+                self.parts[recipe["product"]],
+                [self.parts[component] for component in recipe["components"]],
+                recipe.get("ticks")
+            )
+            for recipe in recipes
+        ]
+        size = 1 << (len(components) + 1)
+        self.needs: List[int] = [0] * size
+        self.completes: List[Optional[Recipe]] = [None] * size
+        for recipe in self.recipes:
+            self.completes[recipe.mask] = recipe
+            # Every subset of the recipe's components, held, still needs the rest of them
+            held = recipe.mask
+            while True:
+                if bin(held).count("1") < hands:
+                    self.needs[held] |= recipe.mask & ~held
+                if not held:
+                    break
+                held = (held - 1) & recipe.mask
+
+    def get_needed(self, held: Sequence[Part]) -> List[Part]:
+        # Readable version of the needs table, for a list of held components
+        mask = 0
+        for part in held:
+            mask |= part.value
+        return [part for part in self.parts if part.value & self.needs[mask]]
+
+    def make_inputs(self, seed=None, weights: Dict[str, float] = None) -> WeightedInputs:
+        # Empty slots and each input equally likely unless weighted by name, e.g. {"EMPTY": 2, "A": 1, "B": 1}
+        items = [Item.EMPTY, *self.inputs]
+        if weights is None:
+            return WeightedInputs(dict.fromkeys(items, 1), seed)
+        unknown = sorted(set(weights) - {item.name for item in items})
+        if unknown:
+            raise ValueError(f"Unknown input(s): {', '.join(unknown)}")
+        return WeightedInputs({item: weights.get(item.name, 0) for item in items}, seed)
+
+
+def load_recipes(path: str) -> dict:
+    # A JSON file like DEFAULT_RECIPES, optionally with input weights by name under "inputs"
+    with open(path) as recipes_file:
+        definition = json.load(recipes_file)
+    if not isinstance(definition, dict) or not isinstance(definition.get("recipes"), list):
+        raise ValueError(f"{path} must be a JSON object with a list of recipes")
+    unknown = sorted(set(definition) - {"hands", "recipes", "inputs"})
+    if unknown:
+        raise ValueError(f"Unknown key(s) in {path}: {', '.join(unknown)}")
+    hands = definition.setdefault("hands", Worker.NUMBER_OF_HANDS)
+    if not isinstance(hands, int) or isinstance(hands, bool) or hands < 1:
+        raise ValueError("Workers must have a whole number of hands, at least 1")
+    return definition
+
+
+class RecipeWorker(Worker):
+    # Worker following a recipe book rather than Worker's fixed A and B. Held items are always any products waiting
+    # to be placed, then components, as components are only picked up after those products and all of them are used
+    # up by assembly. The held components are also kept as a mask, for the book's tables.
+    def __init__(self, belt_position: int, row: Row, book: RecipeBook, assembly_ticks: int = ASSEMBLY_TICKS):
+        super().__init__(belt_position, row, assembly_ticks)
+        self.book = book
+        self.held_mask = 0
+        self.products_held = 0
+        self.recipe: Optional[Recipe] = None
+
+    def _can_place_product(self, belt: Belt) -> bool:
+        return self.products_held > 0 and belt.slots[self.belt_position] is Item.EMPTY
+
+    def _can_pick_up_component(self, item) -> bool:
+        return len(self.held) < self.book.hands and item.value & self.book.needs[self.held_mask] != 0
+
+    def _can_assemble(self) -> bool:
+        return self.book.completes[self.held_mask] is not None
+
+    def _place_product(self, belt: Belt) -> bool:
+        if self._can_place_product(belt):
+            belt.slots[self.belt_position] = self.held.pop(0)
+            self.products_held -= 1
+            return True
+        return False
+
+    def _pick_up_component(self, belt: Belt) -> bool:
+        item = belt.slots[self.belt_position]
+        if self._can_pick_up_component(item):
+            self.held.append(item)
+            self.held_mask |= item.value
+            belt.slots[self.belt_position] = Item.EMPTY
+            return True
+        return False
+
+    def _assemble(self) -> bool:
+        if not self._can_assemble():
+            return False
+        self.recipe = self.book.completes[self.held_mask]
+        self.assembly_ticks_remaining = (self.recipe.ticks or self.assembly_ticks) - 1
+        if not self.is_assembling:
+            self._finish_product()
+        return True
+
+    def _finish_product(self):
+        del self.held[self.products_held:]
+        self.held.append(self.recipe.product)
+        self.products_held += 1
+        self.held_mask = 0
+        self.recipe = None
+
+    def continue_assembly(self):
+        self.assembly_ticks_remaining -= 1
+        if not self.is_assembling:
+            self._finish_product()
+
+    def finish_assembly(self):
+        self.assembly_ticks_remaining = 0
+        self._finish_product()
+
+
+class RecipeFactory(Factory):
+    # Factory of RecipeWorkers, fed the book's inputs. Everything else, including parking busy workers, is Factory's.
+    def __init__(
+            self,
+            belt_length: int,
+            book: RecipeBook = None,
+            inputs: Callable[[], object] = None,
+            is_silent: bool = False,
+            tally: Tally = None,
+            assembly_ticks: int = ASSEMBLY_TICKS
+    ):
+        self.book = book if book is not None else RecipeBook(DEFAULT_RECIPES["recipes"])
+        workers = {
+            row: [RecipeWorker(position, row, self.book, assembly_ticks) for position in range(belt_length)]
+            for row in (Row.TOP, Row.BOTTOM)
+        }
+        belt = Belt(inputs if inputs is not None else self.book.make_inputs())
+        super().__init__(belt_length, belt, workers, is_silent, tally, assembly_ticks)
@@ -0,0 +1,160 @@
+import io
+import queue
+import sys
+import threading
+from typing import List, Optional, Sequence, TextIO, Tuple
+
+from factory_simulator.enums import Item, Row
+
+# Characters buffered before anything is written out, so rendering to a file or pipe costs a write per ~1MB rather
+# than per tick
+BUFFER_SIZE = 1 << 20
+# Snapshots are handed to the background writer in batches, so the queue's locking is paid per batch not per tick.
+# The writer can fall behind by QUEUE_SIZE batches before the simulation waits for it.
+QUEUE_BATCH_SIZE = 256
+QUEUE_SIZE = 16
+# How long to wait on a full queue before checking the writer is still running
+PUT_TIMEOUT_SECONDS = 0.1
+# ANSI codes to move the cursor up to the start of the previous frame and clear everything below it
+CURSOR_UP = "\x1b[{}F"
+CLEAR_DOWN = "\x1b[J"
+
+# (tick, belt slots, top row held items, bottom row held items), copied out of the factory so it can be formatted
+# later, or on another thread, while the factory carries on
+Snapshot = Tuple[int, List[Item], List[List[Item]], List[List[Item]]]
+
+
+def get_snapshot(factory) -> Snapshot:
+    return (
+        factory.ticks,
+        list(factory.belt.slots),
+        [list(worker.held) for worker in factory.workers[Row.TOP]],
+        [list(worker.held) for worker in factory.workers[Row.BOTTOM]],
+    )
+
+
+def _format_row(entries: Sequence[str]) -> str:
+    return "[" + ", ".join(f"'{position}: [{entry}]'" for position, entry in enumerate(entries, 1)) + "]"
+
+
+def _format_held(held: List[Item]) -> str:
+    return ", ".join(item.name for item in held)
+
+
+def format_state(snapshot: Snapshot) -> str:
+    # The same text print_state has always printed, built as one string rather than over four prints
+    _, slots, top_held, bottom_held = snapshot
+    return (
+        f"{Row.TOP.name} ROW: {_format_row([_format_held(held) for held in top_held])}\n"
+        f"BELT: {_format_row([item.name for item in slots])}\n"
+        f"{Row.BOTTOM.name} ROW: {_format_row([_format_held(held) for held in bottom_held])}\n"
+        "\n***************\n\n"
+    )
+
+
+class Renderer:
+    # Renders the factory's state every `every` ticks, to a stream or a file.
+    # Output is buffered up to buffer_size characters, unless redrawing in place, where each frame replaces the
+    # last one on the terminal and so is written straight away. With is_threaded, only the snapshot is taken on the
+    # simulation's thread, and formatting and writing happen on a background thread fed by a bounded queue.
+    def __init__(
+            self,
+            stream: TextIO = None,
+            path: str = None,
+            every: int = 1,
+            is_redraw: bool = False,
+            is_threaded: bool = False,
+            buffer_size: int = BUFFER_SIZE,
+            queue_size: int = QUEUE_SIZE
+    ):
+        self._file: Optional[TextIO] = open(path, "w") if path else None
+        self.stream: TextIO = self._file or stream or sys.stdout
+        self.every = every
+        self.is_redraw = is_redraw
+        self.buffer_size = buffer_size
+        self._buffer = io.StringIO()
+        self._previous_frame_lines = 0
+        self._queue: Optional[queue.Queue] = None
+        self._batch: List[Snapshot] = []
+        self._thread: Optional[threading.Thread] = None
+        # Whatever stopped the background writer, raised again on the simulation's thread
+        self._error: Optional[BaseException] = None
+        if is_threaded:
+            self._queue = queue.Queue(queue_size)
+            self._thread = threading.Thread(target=self._write_queued, daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> "Renderer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def render(self, factory):
+        if factory.ticks % self.every:
+            return
+        snapshot = get_snapshot(factory)
+        if self._queue is not None:
+            self._batch.append(snapshot)
+            if len(self._batch) >= QUEUE_BATCH_SIZE:
+                self._put(self._batch)
+                self._batch = []
+        else:
+            self._write(snapshot)
+
+    def _put(self, batch: Optional[List[Snapshot]]):
+        # Never waits on a writer that has stopped, as nothing would ever take from the queue again
+        while True:
+            if not self._thread.is_alive():
+                raise RuntimeError("The renderer's writer thread stopped") from self._error
+            try:
+                self._queue.put(batch, timeout=PUT_TIMEOUT_SECONDS)
+                return
+            except queue.Full:
+                pass
+
+    def _write_queued(self):
+        try:
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    return
+                for snapshot in batch:
+                    self._write(snapshot)
+        except BaseException as error:
+            self._error = error
+
+    def _write(self, snapshot: Snapshot):
+        frame = format_state(snapshot)
+        if self.is_redraw:
+            frame = f"Tick {snapshot[0]}\n{frame}"
+            if self._previous_frame_lines:
+                frame = CURSOR_UP.format(self._previous_frame_lines) + CLEAR_DOWN + frame
+            self._previous_frame_lines = frame.count("\n")
+            self.stream.write(frame)
+            self.stream.flush()
+            return
+        self._buffer.write(frame)
+        if self._buffer.tell() >= self.buffer_size:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        self.stream.write(self._buffer.getvalue())
+        self._buffer = io.StringIO()
+
+    def close(self):
+        # Waits for the writer to catch up, then writes out whatever is still buffered. The file is closed even if
+        # the writer failed.
+        try:
+            if self._thread is not None:
+                self._put(self._batch)
+                self._put(None)
+                self._thread.join()
+                self._thread = None
+                if self._error is not None:
+                    raise RuntimeError("The renderer's writer thread stopped") from self._error
+            self._flush_buffer()
+            self.stream.flush()
+        finally:
+            if self._file is not None:
+                self._file.close()
@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import queue
+from multiprocessing.sharedctypes import RawArray
+from typing import Dict, List, Tuple
+
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.worker import Worker
+
+# Items only move one slot per tick, and workers only touch their own slot, so a belt can be cut into contiguous
+# segments, each run as its own Factory in its own process. All a segment needs from the one before it is the item
+# that came off its end each tick, which is the segment's input for the same tick. Those items are passed along
+# through ring buffers in shared memory, a block of ticks at a time, so every segment works on a different block
+# at once like stages of a pipeline. The parent process is the first and last stage: it draws the factory's inputs
+# and tallies what comes off the end of the last segment.
+ROWS = (Row.TOP, Row.BOTTOM)
+ITEMS_BY_VALUE = {item.value: item for item in (Item.EMPTY, Item.A, Item.B, Item.P)}
+# Ticks per block handed between segments, and blocks each ring buffer holds, so a segment can get that far ahead of
+# the one after it
+BLOCK_TICKS = 256
+BUFFER_BLOCKS = 4
+# How often, in seconds, a wait on another stage checks that no segment process has died
+POLL_SECONDS = 1.0
+
+# (held items, assembly ticks, assembly ticks remaining) for a worker, enough to rebuild it in another process
+WorkerState = Tuple[List[Item], int, int]
+
+
+class SegmentError(RuntimeError):
+    pass
+
+
+class _Boundary:
+    # Ring buffer of the items passed from one stage to the next, one byte per tick, with a pair of semaphores
+    # counting the blocks ready to read and free to write
+    def __init__(self, block_ticks: int, blocks: int):
+        self.block_ticks = block_ticks
+        self.blocks = blocks
+        self.items = RawArray("B", block_ticks * blocks)
+        self.filled = multiprocessing.Semaphore(0)
+        self.free = multiprocessing.Semaphore(blocks)
+
+    def get_block(self, block: int, ticks: int) -> memoryview:
+        start = block % self.blocks * self.block_ticks
+        return memoryview(self.items).cast("B")[start:start + ticks]
+
+
+def _get_worker_states(factory: Factory, start: int, stop: int) -> Dict[Row, List[WorkerState]]:
+    # Parked workers' remaining ticks are only up to date in the factory's heap, see Factory.get_assembling_workers
+    remaining = {(row, position): ticks for row, position, ticks in factory.get_assembling_workers()}
+    return {
+        row: [
+            (list(worker.held), worker.assembly_ticks, remaining.get((row, position), 0))
+            for position, worker in enumerate(factory.workers[row][start:stop], start)
+        ]
+        for row in ROWS
+    }
+
+
+def _build_workers(states: Dict[Row, List[WorkerState]]) -> Dict[Row, List[Worker]]:
+    workers = {}
+    for row in ROWS:
+        workers[row] = []
+        for position, (held, assembly_ticks, remaining) in enumerate(states[row]):
+            worker = Worker(position, row, assembly_ticks)
+            worker.held = held
+            worker.assembly_ticks_remaining = remaining
+            workers[row].append(worker)
+    return workers
+
+
+def _run_segment(
+        index: int,
+        slots: List[Item],
+        worker_states: Dict[Row, List[WorkerState]],
+        assembly_ticks: int,
+        ticks: int,
+        ticks_to_run: int,
+        inbound: _Boundary,
+        outbound: _Boundary,
+        results
+):
+    belt = Belt(lambda: None)
+    belt.slots = slots
+    factory = Factory(len(slots), belt, _build_workers(worker_states), True, assembly_ticks=assembly_ticks, ticks=ticks)
+    tick, block_ticks = factory.tick, inbound.block_ticks
+    for block, first in enumerate(range(0, ticks_to_run, block_ticks)):
+        block_size = min(block_ticks, ticks_to_run - first)
+        inbound.filled.acquire()
+        items_in = bytes(inbound.get_block(block, block_size))
+        inbound.free.release()
+        items_out = bytes([tick(ITEMS_BY_VALUE[value]).value for value in items_in])
+        outbound.free.acquire()
+        outbound.get_block(block, block_size)[:] = items_out
+        outbound.filled.release()
+    results.put((
+        index,
+        [item.value for item in factory.belt.slots],
+        _get_worker_states(factory, 0, len(slots)),
+        factory.products_placed
+    ))
+
+
+def _check_processes(processes: List[multiprocessing.Process]):
+    failed = [process for process in processes if process.exitcode]
+    if failed:
+        raise SegmentError(f"A segment process exited with code {failed[0].exitcode}")
+
+
+def _acquire(semaphore, processes: List[multiprocessing.Process]):
+    while not semaphore.acquire(timeout=POLL_SECONDS):
+        _check_processes(processes)
+
+
+def get_segment_bounds(belt_length: int, segments: int) -> List[Tuple[int, int]]:
+    # Contiguous (start, stop) slot ranges, as even as possible, with at least one slot each
+    segments = max(1, min(segments, belt_length))
+    size, extra = divmod(belt_length, segments)
+    bounds, start = [], 0
+    for index in range(segments):
+        stop = start + size + (index < extra)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def run_segmented(
+        factory: Factory,
+        ticks_to_run: int,
+        segments: int = None,
+        block_ticks: int = BLOCK_TICKS,
+        buffer_blocks: int = BUFFER_BLOCKS
+) -> Factory:
+    # Runs the factory for ticks_to_run ticks with its belt split over this many processes, defaulting to the CPU
+    # count. The result is the same as running the factory itself: its inputs are drawn and its tally updated as usual,
+    # and the factory returned, which shares its belt and tally, is in the exact state it would have been in. Only the
+    # returned factory should be used afterwards, as the workers of the one passed in aren't updated.
+    belt_length = len(factory.belt.slots)
+    if not belt_length or ticks_to_run <= 0:
+        return factory
+    bounds = get_segment_bounds(belt_length, segments or os.cpu_count() or 1)
+    boundaries = [_Boundary(block_ticks, buffer_blocks) for _ in range(len(bounds) + 1)]
+    results = multiprocessing.Queue()
+    slots = list(factory.belt.slots)
+    processes = [
+        multiprocessing.Process(
+            target=_run_segment,
+            args=(
+                index, slots[start:stop], _get_worker_states(factory, start, stop), factory.assembly_ticks,
+                factory.ticks, ticks_to_run, boundaries[index], boundaries[index + 1], results
+            ),
+            daemon=True
+        )
+        for index, (start, stop) in enumerate(bounds)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        inputs, tally, first_boundary, last_boundary = factory.belt.inputs, factory.tally, boundaries[0], boundaries[-1]
+        blocks = -(-ticks_to_run // block_ticks)
+        fed = read = 0
+        while read < blocks:
+            # Keep the first segment fed for as long as there's room, only waiting on the last one when there isn't
+            if fed < blocks and first_boundary.free.acquire(block=False):
+                block_size = min(block_ticks, ticks_to_run - fed * block_ticks)
+                first_boundary.get_block(fed, block_size)[:] = bytes([inputs().value for _ in range(block_size)])
+                first_boundary.filled.release()
+                fed += 1
+                continue
+            _acquire(last_boundary.filled, processes)
+            block_size = min(block_ticks, ticks_to_run - read * block_ticks)
+            for value in bytes(last_boundary.get_block(read, block_size)):
+                tally.add(ITEMS_BY_VALUE[value])
+            last_boundary.free.release()
+            read += 1
+
+        segment_results = []
+        while len(segment_results) < len(processes):
+            try:
+                segment_results.append(results.get(timeout=POLL_SECONDS))
+            except queue.Empty:
+                _check_processes(processes)
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    segment_results.sort(key=lambda result: result[0])
+    worker_states = {row: [] for row in ROWS}
+    slots, products_placed = [], factory.products_placed
+    for _, segment_slots, segment_workers, segment_products_placed in segment_results:
+        slots.extend(ITEMS_BY_VALUE[value] for value in segment_slots)
+        for row in ROWS:
+            worker_states[row].extend(segment_workers[row])
+        products_placed += segment_products_placed
+
+    belt = factory.belt
+    belt.slots = slots
+    result = Factory(
+        belt_length, belt, _build_workers(worker_states), True, tally, factory.assembly_ticks, factory.ticks + ticks_to_run
+    )
+    result.is_silent = factory.is_silent
+    result.products_placed = products_placed
+    return result
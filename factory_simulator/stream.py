@@ -0,0 +1,47 @@
+from collections import Counter
+from typing import Iterator
+
+from factory_simulator.factory import Factory
+
+# Ticks per event when streaming in chunks, which keeps the cost of the stream itself negligible
+CHUNK_TICKS = 1_000
+
+
+def iter_ticks(factory: Factory, ticks_to_run: int = None) -> Iterator[dict]:
+    # Runs the factory lazily, one tick per event, for ticks_to_run ticks or for as long as the caller keeps asking.
+    # Stopping early leaves the factory as it was after the last event. The tally in each event is the factory's
+    # own running count, so it's only up to date until the next event; copy it to keep it.
+    tick, tally = factory.tick, factory.tally.counts
+    ticks_run = 0
+    while ticks_to_run is None or ticks_run < ticks_to_run:
+        products_placed = factory.products_placed
+        item = tick()
+        ticks_run += 1
+        yield {
+            "tick": factory.ticks,
+            "item": item,
+            "products_placed": factory.products_placed - products_placed,
+            "tally": tally
+        }
+
+
+def iter_chunks(factory: Factory, ticks_to_run: int = None, chunk_ticks: int = CHUNK_TICKS) -> Iterator[dict]:
+    # As iter_ticks, but one event per chunk_ticks ticks (the last one can be shorter), with the counts of the items
+    # that left the belt during the chunk
+    tick, tally = factory.tick, factory.tally.counts
+    ticks_run = 0
+    while ticks_to_run is None or ticks_run < ticks_to_run:
+        ticks_in_chunk = chunk_ticks if ticks_to_run is None else min(chunk_ticks, ticks_to_run - ticks_run)
+        first_tick, products_placed, counts_before = factory.ticks + 1, factory.products_placed, tally.copy()
+        for _ in range(ticks_in_chunk):
+            tick()
+        ticks_run += ticks_in_chunk
+        counts = Counter(tally)
+        counts.subtract(counts_before)
+        yield {
+            "first_tick": first_tick,
+            "last_tick": factory.ticks,
+            "counts": +counts,
+            "products_placed": factory.products_placed - products_placed,
+            "tally": tally
+        }
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from factory_simulator.ensemble import TALLIED_ITEMS, run_replica
+
+# Bump whenever a change to the simulation would change the result of a run, so cached results from the old engine
+# are never reused
+ENGINE_VERSION = 1
+COLUMNS = ("belt_length", "assembly_ticks", "ticks_to_run", "seed", *(item.name for item in TALLIED_ITEMS), "cached")
+ITEMS_BY_NAME = {item.name: item for item in TALLIED_ITEMS}
+
+# A point is a config from main.get_config and the seed to run it with
+Point = Tuple[dict, int]
+
+
+def get_cache_key(config: dict, seed: int) -> str:
+    key = {"config": config, "seed": seed, "engine_version": ENGINE_VERSION}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    # One small JSON file per result, named by its cache key. A file's modification time is bumped whenever it's
+    # read, so the least recently used results can be evicted once the cache grows past max_bytes.
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Counter]:
+        path = self._get_path(key)
+        try:
+            with open(path) as cache_file:
+                counts = json.load(cache_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(path)
+        return Counter({ITEMS_BY_NAME[name]: count for name, count in counts.items()})
+
+    def put(self, key: str, counts: Counter):
+        # Written to a temporary file then renamed, so a reader never sees half a result
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix=".result-")
+        with os.fdopen(file_descriptor, "w") as cache_file:
+            json.dump({item.name: count for item, count in counts.items()}, cache_file)
+        os.replace(temporary_path, self._get_path(key))
+
+    def evict(self):
+        entries = []
+        with os.scandir(self.directory) as directory:
+            for entry in directory:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            os.remove(path)
+            size -= entry_size
+
+
+def expand_grid(
+        get_config: Callable[[int, int, int], dict],
+        belt_lengths: Sequence[int],
+        ticks_to_run: Sequence[int],
+        assembly_ticks: Sequence[int],
+        seeds: Sequence[int]
+) -> List[Point]:
+    # Every combination of the given values, with None standing in for the config's default
+    return [
+        (get_config(belt_length, ticks, assembly), seed)
+        for belt_length, ticks, assembly, seed in product(belt_lengths, ticks_to_run, assembly_ticks, seeds)
+    ]
+
+
+def run_point(point: Point) -> Counter:
+    config, seed = point
+    return run_replica(config["belt_length"], config["ticks_to_run"], seed, config["assembly_ticks"])
+
+
+def run_sweep(points: Sequence[Point], cache: ResultCache, max_workers: int = None) -> List[dict]:
+    # Only points missing from the cache are run; results come back in the same order as the points
+    keys = [get_cache_key(config, seed) for config, seed in points]
+    cached = [cache.get(key) for key in keys]
+    missing = [index for index, counts in enumerate(cached) if counts is None]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    missing_points = [points[index] for index in missing]
+    if max_workers == 1 or len(missing_points) <= 1:
+        computed = [run_point(point) for point in missing_points]
+    else:
+        with ProcessPoolExecutor(min(max_workers, len(missing_points))) as executor:
+            computed = list(executor.map(run_point, missing_points))
+    for index, counts in zip(missing, computed):
+        cache.put(keys[index], counts)
+    cache.evict()
+
+    computed_by_index = dict(zip(missing, computed))
+    return [
+        {
+            "config": config,
+            "seed": seed,
+            "counts": computed_by_index.get(index, cached[index]),
+            "is_cached": cached[index] is not None
+        }
+        for index, (config, seed) in enumerate(points)
+    ]
+
+
+def format_table(results: Sequence[dict]) -> str:
+    rows = [COLUMNS] + [
+        (
+            result["config"]["belt_length"],
+            result["config"]["assembly_ticks"],
+            result["config"]["ticks_to_run"],
+            result["seed"],
+            *(result["counts"][item] for item in TALLIED_ITEMS),
+            "yes" if result["is_cached"] else "no"
+        )
+        for result in results
+    ]
+    rows = [[str(value) for value in row] for row in rows]
+    widths = [max(len(row[column]) for row in rows) for column in range(len(COLUMNS))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
@@ -0,0 +1,43 @@
+from collections import Counter, deque
+from typing import Deque, List, Optional
+
+from factory_simulator.enums import Item
+
+# Intervals kept by default, so counting per interval stays bounded however long the run
+MAX_INTERVALS = 1000
+
+
+class Tally:
+    # Running count of the items that come off the end of the belt, updated as each one leaves, so memory doesn't grow
+    # with the number of ticks run. Recent history can be kept in bounded form, either as the last `window` items or
+    # as counts per `interval` ticks (keeping the last `max_intervals`). The full list of every item is opt-in only.
+    def __init__(
+            self,
+            window: int = None,
+            interval: int = None,
+            max_intervals: int = MAX_INTERVALS,
+            keep_history: bool = False
+    ):
+        if interval and not max_intervals:
+            raise ValueError("max_intervals must be set to keep counts per interval")
+        self.counts: Counter = Counter()
+        self.ticks: int = 0
+        self.recent: Optional[Deque[Item]] = deque(maxlen=window) if window else None
+        self.interval: Optional[int] = interval
+        self.intervals: Optional[Deque[Counter]] = deque(maxlen=max_intervals) if interval else None
+        self.history: Optional[List[Item]] = [] if keep_history else None
+
+    def add(self, item: Item):
+        self.counts[item] += 1
+        if self.recent is not None:
+            self.recent.append(item)
+        if self.intervals is not None:
+            if self.ticks % self.interval == 0:
+                self.intervals.append(Counter())
+            self.intervals[-1][item] += 1
+        if self.history is not None:
+            self.history.append(item)
+        self.ticks += 1
+
+    def get_recent_counts(self) -> Counter:
+        return Counter(self.recent) if self.recent is not None else Counter()
@@ -0,0 +1,248 @@
+"""
+Tick by tick trace of a run, for post-mortems.
+
+Jump to any recorded tick and print the factory's state, or the trace's range of ticks without one:
+    python -m factory_simulator.trace run.trace 7345211
+    python -m factory_simulator.trace run.trace
+"""
+import argparse
+import mmap
+import struct
+import sys
+from bisect import bisect_right
+from itertools import permutations
+from typing import Dict, List, Tuple
+
+from factory_simulator import checkpoint
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+
+# Trace file layout, little endian throughout:
+#   header  magic, format version, belt length, ticks between keyframes
+#   records each a (type, first tick, payload length) header then the payload, either
+#           frames     one frame per tick: the belt's slots, then the top row's then the bottom row's held items,
+#                      at one byte per slot or worker (held items packed as for checkpoints)
+#           keyframe   a full checkpoint of the factory at the first tick
+#   index   once the trace is closed, the (type, first tick, payload offset, payload length) of every record,
+#           followed by its offset and a closing magic
+# Frames are enough to look at any tick directly. Keyframes also hold what frames leave out, like busy workers and
+# the input stream, so the exact Factory at any tick can be rebuilt from the keyframe before it.
+MAGIC = b"FTRC"
+INDEX_MAGIC = b"FTRI"
+VERSION = 1
+HEADER = struct.Struct("<4sBII")
+RECORD = struct.Struct("<BQQ")
+INDEX_ENTRY = struct.Struct("<BQQQ")
+FOOTER = struct.Struct("<Q4s")
+FRAMES, KEYFRAME = 1, 2
+
+KEYFRAME_TICKS = 100_000
+# Frames are gathered into chunks of about this many bytes before being written, so recording costs a write per
+# chunk rather than per tick
+CHUNK_BYTES = 1 << 22
+# Every order of held items a worker could have, packed, so a tick's hands are packed with one lookup per worker
+PACKED_HELD: Dict[Tuple[Item, ...], int] = {
+    held: checkpoint.pack_held(list(held))
+    for hands_used in range(3)
+    for held in permutations((Item.A, Item.B, Item.P), hands_used)
+}
+
+# (type, first tick, payload offset, payload length)
+IndexEntry = Tuple[int, int, int, int]
+
+
+class TraceError(ValueError):
+    pass
+
+
+class TraceRecorder:
+    # Appends a frame for every tick the factory runs, and a keyframe every keyframe_ticks ticks, starting with the
+    # factory's current state. Only factories that can be checkpointed can be traced.
+    def __init__(
+            self,
+            path: str,
+            factory: Factory,
+            keyframe_ticks: int = KEYFRAME_TICKS,
+            chunk_bytes: int = CHUNK_BYTES
+    ):
+        self.factory = factory
+        self.keyframe_ticks = keyframe_ticks
+        self.belt_length = len(factory.belt.slots)
+        if not self.belt_length:
+            raise TraceError("There's nothing to trace without a belt")
+        self.frame_size = 3 * self.belt_length
+        self._chunk_ticks = max(1, chunk_bytes // max(1, self.frame_size))
+        self._chunk = bytearray(self._chunk_ticks * self.frame_size)
+        self._chunk_first_tick = factory.ticks
+        self._chunk_count = 0
+        self._index: List[IndexEntry] = []
+        self._last_keyframe_tick = None
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.belt_length, keyframe_ticks))
+        self._write_keyframe()
+        self.record()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_record(self, record_type: int, first_tick: int, payload):
+        self._file.write(RECORD.pack(record_type, first_tick, len(payload)))
+        self._index.append((record_type, first_tick, self._file.tell(), len(payload)))
+        self._file.write(payload)
+
+    def _write_keyframe(self):
+        self._last_keyframe_tick = self.factory.ticks
+        self._write_record(KEYFRAME, self.factory.ticks, checkpoint.dumps(self.factory))
+
+    def _write_frames(self):
+        if self._chunk_count:
+            self._write_record(
+                FRAMES, self._chunk_first_tick, memoryview(self._chunk)[:self._chunk_count * self.frame_size]
+            )
+        self._chunk_first_tick += self._chunk_count
+        self._chunk_count = 0
+
+    def record(self):
+        # Called after each tick of the factory
+        factory, size = self.factory, self.belt_length
+        offset = self._chunk_count * self.frame_size
+        chunk = self._chunk
+        chunk[offset:offset + size] = bytes([item.value for item in factory.belt.slots])
+        chunk[offset + size:offset + 2 * size] = bytes([PACKED_HELD[tuple(w.held)] for w in factory.workers[Row.TOP]])
+        chunk[offset + 2 * size:offset + 3 * size] = bytes(
+            [PACKED_HELD[tuple(w.held)] for w in factory.workers[Row.BOTTOM]]
+        )
+        self._chunk_count += 1
+        if self._chunk_count == self._chunk_ticks:
+            self._write_frames()
+        if factory.ticks % self.keyframe_ticks == 0 and factory.ticks != self._last_keyframe_tick:
+            self._write_keyframe()
+
+    def close(self):
+        self._write_frames()
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(FOOTER.pack(index_offset, INDEX_MAGIC))
+        self._file.close()
+
+
+class TraceReader:
+    # Reads a trace through a memory map, so frames are sliced straight out of the file without copying. Any
+    # memoryviews from get_frame have to be released before the reader is closed.
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if len(self._map) < HEADER.size:
+            raise TraceError("Trace is truncated")
+        magic, version, self.belt_length, self.keyframe_ticks = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise TraceError("Not a factory trace")
+        if version != VERSION:
+            raise TraceError(f"Unsupported trace version {version}")
+        self.frame_size = 3 * self.belt_length
+        index = self._read_index()
+        self._frames = [(tick, offset, length // self.frame_size) for kind, tick, offset, length in index
+                        if kind == FRAMES]
+        self._keyframes = [(tick, offset, length) for kind, tick, offset, length in index if kind == KEYFRAME]
+        self._frame_ticks = [tick for tick, _, _ in self._frames]
+        self._keyframe_ticks = [tick for tick, _, _ in self._keyframes]
+        if not self._frames:
+            raise TraceError("Trace has no frames")
+        self.first_tick = self._frames[0][0]
+        self.last_tick = self._frames[-1][0] + self._frames[-1][2] - 1
+        self.keyframe_count = len(self._keyframes)
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_index(self) -> List[IndexEntry]:
+        if len(self._map) >= HEADER.size + FOOTER.size:
+            index_offset, index_magic = FOOTER.unpack_from(self._map, len(self._map) - FOOTER.size)
+            if index_magic == INDEX_MAGIC:
+                return list(INDEX_ENTRY.iter_unpack(self._view[index_offset:len(self._map) - FOOTER.size]))
+        return self._scan_records()
+
+    def _scan_records(self) -> List[IndexEntry]:
+        # A trace that was never closed, e.g. from a run that was killed, has no index, so it's rebuilt from the
+        # records themselves. Anything after the last complete record is ignored.
+        index, offset = [], HEADER.size
+        while offset + RECORD.size <= len(self._map):
+            record_type, first_tick, length = RECORD.unpack_from(self._map, offset)
+            offset += RECORD.size
+            if record_type not in (FRAMES, KEYFRAME) or offset + length > len(self._map):
+                break
+            index.append((record_type, first_tick, offset, length))
+            offset += length
+        return index
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def get_frame(self, tick: int) -> Tuple[memoryview, memoryview, memoryview]:
+        # The belt's slots and the top and bottom rows' packed held items after the given tick, without copying
+        position = bisect_right(self._frame_ticks, tick) - 1
+        if position < 0 or tick > self.last_tick:
+            raise IndexError(f"Tick {tick} isn't in the trace, which has ticks {self.first_tick} to {self.last_tick}")
+        first_tick, offset, count = self._frames[position]
+        if tick >= first_tick + count:
+            raise IndexError(f"Tick {tick} is missing from the trace")
+        start = offset + (tick - first_tick) * self.frame_size
+        size = self.belt_length
+        return (
+            self._view[start:start + size],
+            self._view[start + size:start + 2 * size],
+            self._view[start + 2 * size:start + 3 * size],
+        )
+
+    def get_slots(self, tick: int) -> List[Item]:
+        slots, _, _ = self.get_frame(tick)
+        return [checkpoint.ITEMS_BY_VALUE[value] for value in slots]
+
+    def get_held(self, tick: int, row: Row) -> List[List[Item]]:
+        _, top, bottom = self.get_frame(tick)
+        return [checkpoint.unpack_held(code) for code in (top if row is Row.TOP else bottom)]
+
+    def get_factory(self, tick: int) -> Factory:
+        # The exact factory after the given tick, rebuilt from the last keyframe at or before it and run forward
+        position = bisect_right(self._keyframe_ticks, tick) - 1
+        if position < 0 or tick > self.last_tick:
+            raise IndexError(f"Tick {tick} isn't in the trace, which has ticks {self.first_tick} to {self.last_tick}")
+        _, offset, length = self._keyframes[position]
+        factory = checkpoint.loads(bytes(self._view[offset:offset + length]))
+        while factory.ticks < tick:
+            factory.tick()
+        return factory
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m factory_simulator.trace")
+    parser.add_argument("path", help="Trace file to read")
+    parser.add_argument("tick", type=int, nargs="?", help="Tick to print the factory's state after")
+    args = parser.parse_args()
+    with TraceReader(args.path) as reader:
+        if args.tick is None:
+            print(f"Belt length {reader.belt_length}, ticks {reader.first_tick} to {reader.last_tick}, "
+                  f"{reader.keyframe_count} keyframe(s)")
+            return 0
+        try:
+            factory = reader.get_factory(args.tick)
+        except IndexError as error:
+            parser.error(str(error))
+    print(f"Tick {factory.ticks}")
+    factory.print_state()
+    factory.print_tally()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
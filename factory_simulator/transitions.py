@@ -0,0 +1,106 @@
+from collections import Counter
+from itertools import chain, combinations
+from typing import Callable, List, Tuple
+
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.tally import Tally
+from factory_simulator.worker import Worker
+
+# Hands are encoded as the bitmask of the items' flag values, and slots as the value of the item in them.
+# A worker's state and the slot in front of them then pack into a single table index.
+HOLDABLE_ITEMS = (Item.A, Item.B, Item.P)
+ITEMS_BY_VALUE = {item.value: item for item in (Item.EMPTY, Item.A, Item.B, Item.P)}
+SLOT_BITS = max(ITEMS_BY_VALUE).bit_length()
+
+
+def encode_held(held: List[Item]) -> int:
+    return sum(item.value for item in held)
+
+
+def decode_hands(hands: int) -> List[Item]:
+    return [item for item in HOLDABLE_ITEMS if hands & item.value]
+
+
+def get_index(hands: int, slot: int) -> int:
+    return hands << SLOT_BITS | slot
+
+
+def _build_transitions() -> List[Tuple[int, int, bool]]:
+    # Runs the reference Worker over every combination of hands and belt slot it could ever see, so the table always
+    # agrees with Worker.take_action. Each entry is (new hands, new slot, whether the belt was interacted with).
+    table = [(0, 0, False)] * get_index(encode_held(HOLDABLE_ITEMS) + 1, 0)
+    for hands_used in range(Worker.NUMBER_OF_HANDS + 1):
+        for held in combinations(HOLDABLE_ITEMS, hands_used):
+            for slot_item in ITEMS_BY_VALUE.values():
+                worker = Worker(0, Row.TOP)
+                worker.held = list(held)
+                belt = Belt()
+                belt.slots = [slot_item]
+                interacted = worker.take_action(belt)
+                table[get_index(encode_held(held), slot_item.value)] = (
+                    encode_held(worker.held), belt.slots[0].value, interacted
+                )
+    return table
+
+
+TRANSITIONS = _build_transitions()
+
+
+class TableFactory:
+    # Fast equivalent of Factory. Workers are small integers in one list per row, and each worker's action is a
+    # single TRANSITIONS lookup instead of Worker.take_action's chain of checks. Belt slots are a circular buffer of
+    # item values, moved by shifting the head offset like BeltSlots.
+    __slots__ = ("inputs", "tally", "slots", "hands", "_head")
+
+    def __init__(self, belt_length: int, inputs: Callable[[], Item] = None, tally: Tally = None):
+        self.inputs: Callable[[], Item] = inputs if inputs is not None else RandomInputs()
+        self.tally: Tally = tally if tally is not None else Tally()
+        self.slots: List[int] = [Item.EMPTY.value] * belt_length
+        self.hands: dict = {Row.TOP: [0] * belt_length, Row.BOTTOM: [0] * belt_length}
+        self._head: int = 0
+
+    def _move_belt(self, item_to_add: Item) -> Item:
+        slots = self.slots
+        if not slots:
+            return item_to_add
+        self._head = (self._head - 1) % len(slots)
+        item_removed = ITEMS_BY_VALUE[slots[self._head]]
+        slots[self._head] = item_to_add.value
+        return item_removed
+
+    def _action_workers(self):
+        slots, table = self.slots, TRANSITIONS
+        top_hands, bottom_hands = self.hands[Row.TOP], self.hands[Row.BOTTOM]
+        indexes = chain(range(self._head, len(slots)), range(self._head))
+        for position, index in enumerate(indexes):
+            hands, slot, interacted = table[top_hands[position] << SLOT_BITS | slots[index]]
+            top_hands[position] = hands
+            if not interacted:
+                hands, slot, interacted = table[bottom_hands[position] << SLOT_BITS | slot]
+                bottom_hands[position] = hands
+            slots[index] = slot
+
+    def tick(self, item_to_add: Item = None) -> Item:
+        item_removed = self._move_belt(item_to_add or self.inputs())
+        self.tally.add(item_removed)
+        self._action_workers()
+        return item_removed
+
+    def get_slots(self) -> List[Item]:
+        return [ITEMS_BY_VALUE[self.slots[(self._head + i) % len(self.slots)]] for i in range(len(self.slots))]
+
+    def get_held(self, row: Row) -> List[List[Item]]:
+        return [decode_hands(hands) for hands in self.hands[row]]
+
+    def print_tally(self):
+        print(self.tally.counts)
+
+
+def run_table_replica(belt_length: int, ticks_to_run: int, seed) -> Counter:
+    # Same as ensemble.run_replica, using the transition table instead of Worker objects
+    factory = TableFactory(belt_length, RandomInputs(seed))
+    for _ in range(ticks_to_run):
+        factory.tick()
+    return factory.tally.counts
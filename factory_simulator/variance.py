@@ -0,0 +1,188 @@
+import math
+from functools import partial
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from factory_simulator import stream
+from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
+from factory_simulator.ensemble import Z_95, get_replica_seed, run_chunked
+from factory_simulator.enums import Item
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+# Variance reduction for ensembles of products made, each technique cutting the replicas needed for a given precision:
+#   common random numbers  every configuration compared is fed the same input streams, so their difference only
+#                          reflects the configurations, not the luck of their inputs
+#   antithetic pairs       replicas run in pairs, the second fed the mirror image of the first's inputs, averaged
+#   control variates       each replica's products are adjusted by how far the components fed to it were from the
+#                          number the input mix gives on average, known exactly, scaled by the fitted slope
+# The variance reduction reported is how many times more runs independent replicas would have needed for the same
+# precision, estimated from the same runs.
+#
+# RandomInputs picks INPUTS[floor(u * 3)] for each uniform u, so the antithetic item, for 1 - u, is the mirror image
+ANTITHETIC_ITEMS = dict(zip(RandomInputs.INPUTS, reversed(RandomInputs.INPUTS)))
+COMPONENT_CHANCE = sum(1 for item in RandomInputs.INPUTS if item in Item.COMPONENT) / len(RandomInputs.INPUTS)
+# Options a compared configuration can change
+COMPARABLE_KEYS = ("belt_length", "assembly_ticks")
+
+# (products, components fed) for one run
+RunResult = Tuple[int, int]
+
+
+class CountedInputs:
+    # Inputs that count the components they've fed to the belt, for the control variate, optionally mirrored into the
+    # antithetic stream
+    def __init__(self, inputs: Callable[[], Item], is_antithetic: bool = False):
+        self.inputs = inputs
+        self.is_antithetic = is_antithetic
+        self.components = 0
+
+    def __call__(self) -> Item:
+        item = self.inputs()
+        if self.is_antithetic:
+            item = ANTITHETIC_ITEMS[item]
+        if item is not Item.EMPTY:
+            self.components += 1
+        return item
+
+
+def parse_comparison(value: str) -> Dict[str, int]:
+    # A configuration to compare against, from the command line, e.g. belt_length=4 or assembly_ticks=4
+    comparison = {}
+    for option in value.split(","):
+        key, _, number = option.partition("=")
+        if key.strip() not in COMPARABLE_KEYS or not number.strip().isdigit() or int(number) < 1:
+            raise ValueError(f"Expected {' or '.join(COMPARABLE_KEYS)}=N, got {option}")
+        comparison[key.strip()] = int(number)
+    return comparison
+
+
+def run_counted_replica(config: dict, ticks_to_run: int, seed, is_antithetic: bool = False) -> RunResult:
+    inputs = CountedInputs(RandomInputs(seed), is_antithetic)
+    factory = Factory(config["belt_length"], Belt(inputs), is_silent=True, assembly_ticks=config["assembly_ticks"])
+    for _ in stream.iter_chunks(factory, ticks_to_run):
+        pass
+    return factory.tally.counts[Item.P], inputs.components
+
+
+def _run_chunk(
+        configs: Sequence[dict],
+        ticks_to_run: int,
+        runs: Sequence[Tuple[str, bool]]
+) -> List[List[RunResult]]:
+    # Every configuration is run from the same seed, so they all see the same inputs
+    return [
+        [run_counted_replica(config, ticks_to_run, seed, is_antithetic) for config in configs]
+        for seed, is_antithetic in runs
+    ]
+
+
+def _get_variance(values: Sequence[float], lost_degrees: int = 1) -> float:
+    if len(values) <= lost_degrees:
+        return 0.0
+    mean = sum(values) / len(values)
+    return sum((value - mean) ** 2 for value in values) / (len(values) - lost_degrees)
+
+
+def _get_covariance(xs: Sequence[float], ys: Sequence[float]) -> float:
+    if len(xs) < 2:
+        return 0.0
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / (len(xs) - 1)
+
+
+def estimate_mean(
+        values: Sequence[float],
+        controls: Sequence[float],
+        control_mean: float,
+        baseline_variance: float,
+        is_controlled: bool = False
+) -> dict:
+    # Mean of the values, one per replica or antithetic pair, with the variance of that mean, adjusted by the control
+    # variate if asked. Fitting its slope costs a degree of freedom.
+    control_variance = _get_variance(controls)
+    if is_controlled and len(values) > 2 and control_variance:
+        slope = _get_covariance(values, controls) / control_variance
+        values = [value - slope * (control - control_mean) for value, control in zip(values, controls)]
+        variance = _get_variance(values, 2) / len(values)
+    else:
+        variance = _get_variance(values) / len(values)
+    mean = sum(values) / len(values)
+    half_width = Z_95 * math.sqrt(variance)
+    if variance:
+        reduction = baseline_variance / variance
+    else:
+        reduction = math.inf if baseline_variance else 1.0
+    return {
+        "mean": mean,
+        "variance": variance,
+        "confidence_interval": (mean - half_width, mean + half_width),
+        "variance_reduction": reduction
+    }
+
+
+def _pair_up(values: Sequence[float], pair_size: int) -> List[float]:
+    return [sum(values[i:i + pair_size]) / pair_size for i in range(0, len(values), pair_size)]
+
+
+def run_variance_reduced(
+        belt_length: int,
+        ticks_to_run: int,
+        replicas: int,
+        seed: int = 0,
+        max_workers: int = None,
+        assembly_ticks: int = ASSEMBLY_TICKS,
+        comparison: Dict[str, int] = None,
+        is_antithetic: bool = False,
+        is_controlled: bool = False,
+        chunk_size: int = None
+) -> dict:
+    # Products per replica for the configuration, and for it with the comparison's changes, along with their
+    # difference (compared minus base), run with common random numbers. Antithetic runs come in pairs, so need an
+    # even number of replicas.
+    if replicas < 1:
+        raise ValueError("There must be at least one replica")
+    if is_antithetic and replicas % 2:
+        raise ValueError(f"Antithetic replicas run in pairs, so there must be an even number of them, not {replicas}")
+    configs = [{"belt_length": belt_length, "assembly_ticks": assembly_ticks}]
+    if comparison:
+        configs.append({**configs[0], **comparison})
+    pair_size = 2 if is_antithetic else 1
+    runs = [
+        (get_replica_seed(seed, unit), is_mirrored)
+        for unit in range(replicas // pair_size)
+        for is_mirrored in (False, True)[:pair_size]
+    ]
+    run_chunk = partial(_run_chunk, configs, ticks_to_run)
+    results: List[List[RunResult]] = run_chunked(run_chunk, runs, max_workers, chunk_size)
+
+    # Every configuration is fed the same inputs, so the controls are the same for all of them
+    controls = _pair_up([run[0][1] for run in results], pair_size)
+    control_mean = ticks_to_run * COMPONENT_CHANCE
+    products = [[run[index][0] for run in results] for index in range(len(configs))]
+    summary = {
+        "replicas": len(results),
+        "configs": configs,
+        "products": [
+            estimate_mean(
+                _pair_up(config_products, pair_size),
+                controls,
+                control_mean,
+                _get_variance(config_products) / len(results),
+                is_controlled
+            )
+            for config_products in products
+        ],
+        "difference": None
+    }
+    if comparison:
+        # Against independent replicas of each, whose variances would add
+        differences = [compared - base for base, compared in zip(products[0], products[1])]
+        summary["difference"] = estimate_mean(
+            _pair_up(differences, pair_size),
+            controls,
+            control_mean,
+            (_get_variance(products[0]) + _get_variance(products[1])) / len(results),
+            is_controlled
+        )
+    return summary
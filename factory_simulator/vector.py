@@ -0,0 +1,177 @@
+from collections import Counter
+from functools import lru_cache
+from itertools import combinations
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
+from factory_simulator.enums import Item, Row
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.tally import Tally
+from factory_simulator.worker import Worker
+
+# A worker's state is what they hold and, while assembling, the ticks left. Every state a worker can be in gets a small
+# id, and a slot's pair of workers packs into one integer, so the worker phase of a tick is a lookup per slot in a
+# table built from the reference Worker: one gather for every slot's new workers and another for its new item.
+HOLDABLE_ITEMS = (Item.A, Item.B, Item.P)
+ITEMS_BY_VALUE = {item.value: item for item in (Item.EMPTY, Item.A, Item.B, Item.P)}
+SLOT_BITS = max(ITEMS_BY_VALUE).bit_length()
+# The table grows with the square of the assembly ticks, to about 10MB at this many
+MAX_ASSEMBLY_TICKS = 256
+
+# (held items, ticks of assembly left)
+WorkerState = Tuple[Tuple[Item, ...], int]
+
+
+def get_worker_states(assembly_ticks: int) -> List[WorkerState]:
+    # Workers never hold two of the same item, and only assemble while holding both components
+    held_states = [held for hands_used in range(Worker.NUMBER_OF_HANDS + 1)
+                   for held in combinations(HOLDABLE_ITEMS, hands_used)]
+    return [(held, 0) for held in held_states] + [
+        ((Item.A, Item.B), remaining) for remaining in range(1, assembly_ticks)
+    ]
+
+
+def _get_state(worker: Worker) -> WorkerState:
+    return tuple(item for item in HOLDABLE_ITEMS if item in worker.held), worker.assembly_ticks_remaining
+
+
+def _make_worker(state: WorkerState, assembly_ticks: int) -> Worker:
+    held, remaining = state
+    worker = Worker(0, Row.TOP, assembly_ticks)
+    worker.held = list(held)
+    worker.assembly_ticks_remaining = remaining
+    return worker
+
+
+def _build_worker_transitions(
+        states: List[WorkerState],
+        assembly_ticks: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Runs the reference Worker from every state over every item in their slot, giving their new state, the slot's new
+    # item and whether they interacted with the belt, indexed by [state id, item value]. Also gives each worker's
+    # state after a tick where they didn't get to act, in which only a busy worker's assembly moves on.
+    ids = {state: state_id for state_id, state in enumerate(states)}
+    shape = (len(states), 1 << SLOT_BITS)
+    next_states, next_slots = np.zeros(shape, dtype=np.intp), np.zeros(shape, dtype=np.uint8)
+    interacted = np.zeros(shape, dtype=bool)
+    passed = np.arange(len(states), dtype=np.intp)
+    for state_id, state in enumerate(states):
+        for slot_item in ITEMS_BY_VALUE.values():
+            worker = _make_worker(state, assembly_ticks)
+            belt = Belt()
+            belt.slots = [slot_item]
+            interacted[state_id, slot_item.value] = worker.take_action(belt)
+            next_states[state_id, slot_item.value] = ids[_get_state(worker)]
+            next_slots[state_id, slot_item.value] = belt.slots[0].value
+        worker = _make_worker(state, assembly_ticks)
+        if worker.is_assembling:
+            worker.continue_assembly()
+        passed[state_id] = ids[_get_state(worker)]
+    return next_states, next_slots, interacted, passed
+
+
+@lru_cache(maxsize=None)
+def build_transitions(assembly_ticks: int) -> Tuple[np.ndarray, np.ndarray, List[WorkerState]]:
+    # Steps a pair of workers from every combination of their states and the item in their slot, as
+    # Factory._action_workers would: the bottom worker only acts if the top one didn't touch the belt, but a busy
+    # worker's assembly carries on either way. Indexes are the pair's packed state with the slot's item value in the
+    # low bits. Tables are only built once per assembly ticks, and shared by every factory using them.
+    if not 1 <= assembly_ticks <= MAX_ASSEMBLY_TICKS:
+        raise ValueError(f"Assembly ticks must be between 1 and {MAX_ASSEMBLY_TICKS}")
+    states = get_worker_states(assembly_ticks)
+    next_states, next_slots, interacted, passed = _build_worker_transitions(states, assembly_ticks)
+    top, bottom, slot = (
+        combination.ravel() for combination in np.indices((len(states), len(states), 1 << SLOT_BITS))
+    )
+    top_interacted = interacted[top, slot]
+    slot_after_top = next_slots[top, slot]
+    next_top = next_states[top, slot]
+    next_bottom = np.where(top_interacted, passed[bottom], next_states[bottom, slot_after_top])
+    next_slot = np.where(top_interacted, slot_after_top, next_slots[bottom, slot_after_top])
+    # Indexes are laid out in the same order as np.indices, so entry i is for the combination at position i
+    return (next_top * len(states) + next_bottom) << SLOT_BITS, next_slot.astype(np.uint8), states
+
+
+class VectorFactory:
+    # Equivalent of Factory for one long belt, with every slot's workers stepped at once with NumPy. Belt slots are a
+    # circular buffer of item values moved by shifting the head offset, as in BeltSlots, so a move is O(1) and the
+    # worker phase is done in two runs of slots, either side of the head, with no copying. Each worker pair is one
+    # integer, see build_transitions. Held items are only tracked as a set, so come back in a fixed order.
+    def __init__(
+            self,
+            belt_length: int,
+            inputs: Callable[[], Item] = None,
+            tally: Tally = None,
+            assembly_ticks: int = ASSEMBLY_TICKS
+    ):
+        self.inputs: Callable[[], Item] = inputs if inputs is not None else RandomInputs()
+        self.tally: Tally = tally if tally is not None else Tally()
+        self.assembly_ticks = assembly_ticks
+        self.ticks: int = 0
+        self._next_workers, self._next_slots, self._states = build_transitions(assembly_ticks)
+        self.slots: np.ndarray = np.full(belt_length, Item.EMPTY.value, dtype=np.uint8)
+        # Indexed by belt position, with both workers of each position empty handed to start with
+        self.workers: np.ndarray = np.zeros(belt_length, dtype=np.intp)
+        self._index: np.ndarray = np.empty(belt_length, dtype=np.intp)
+        self._head: int = 0
+
+    def _action_run(self, workers: np.ndarray, slots: np.ndarray, index: np.ndarray):
+        np.bitwise_or(workers, slots, out=index)
+        np.take(self._next_workers, index, out=workers, mode="clip")
+        np.take(self._next_slots, index, out=slots, mode="clip")
+
+    def _action_workers(self):
+        # Belt position p is at slots[(head + p) % length], so positions from 0 are the slots from the head to the end
+        # of the buffer, then the slots from the start of the buffer to the head
+        head, split = self._head, len(self.slots) - self._head
+        self._action_run(self.workers[:split], self.slots[head:], self._index[:split])
+        if head:
+            self._action_run(self.workers[split:], self.slots[:head], self._index[split:])
+
+    def tick(self, item_to_add: Item = None) -> Item:
+        self.ticks += 1
+        item_to_add = item_to_add or self.inputs()
+        if not len(self.slots):
+            item_removed = item_to_add
+        else:
+            self._head = (self._head - 1) % len(self.slots)
+            item_removed = ITEMS_BY_VALUE[int(self.slots[self._head])]
+            self.slots[self._head] = item_to_add.value
+        self.tally.add(item_removed)
+        self._action_workers()
+        return item_removed
+
+    def get_slots(self) -> List[Item]:
+        return [ITEMS_BY_VALUE[int(value)] for value in np.roll(self.slots, -self._head)]
+
+    def _get_row_states(self, row: Row) -> List[WorkerState]:
+        pairs = self.workers >> SLOT_BITS
+        ids = pairs // len(self._states) if row is Row.TOP else pairs % len(self._states)
+        return [self._states[state_id] for state_id in ids.tolist()]
+
+    def get_held(self, row: Row) -> List[List[Item]]:
+        return [list(held) for held, _ in self._get_row_states(row)]
+
+    def get_assembling_workers(self) -> List[Tuple[Row, int, int]]:
+        # Same as Factory.get_assembling_workers, ordered by row then position
+        return [
+            (row, position, remaining)
+            for row in (Row.TOP, Row.BOTTOM)
+            for position, (_, remaining) in enumerate(self._get_row_states(row))
+            if remaining
+        ]
+
+    def print_tally(self):
+        print(self.tally.counts)
+
+
+def run_vector_replica(belt_length: int, ticks_to_run: int, seed, assembly_ticks: int = ASSEMBLY_TICKS) -> Counter:
+    # Same as ensemble.run_replica, stepping every slot at once
+    factory = VectorFactory(belt_length, RandomInputs(seed), assembly_ticks=assembly_ticks)
+    for _ in range(ticks_to_run):
+        factory.tick()
+    return factory.tally.counts
+
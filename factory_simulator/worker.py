@@ -1,14 +1,22 @@
 from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
 from factory_simulator.enums import Item, Row
 
 
 class Worker:
     NUMBER_OF_HANDS = 2
 
-    def __init__(self, belt_position: int, row: Row):
+    def __init__(self, belt_position: int, row: Row, assembly_ticks: int = ASSEMBLY_TICKS):
         self.belt_position = belt_position
         self.row = row
         self.held = []
+        self.assembly_ticks = assembly_ticks
+        # Ticks left after the current one before the product being assembled is finished
+        self.assembly_ticks_remaining = 0
+
+    @property
+    def is_assembling(self) -> bool:
+        return self.assembly_ticks_remaining > 0
 
     def _can_place_product(self, belt: Belt) -> bool:
         return Item.P in self.held and belt.slots[self.belt_position] is Item.EMPTY
@@ -34,14 +42,30 @@ class Worker:
         return False
 
     def _assemble(self) -> bool:
+        # Assembly starts this tick, so a single tick assembly finishes straight away
         if self._can_assemble():
-            self.held = [Item.P]
+            self.assembly_ticks_remaining = self.assembly_ticks - 1
+            if not self.is_assembling:
+                self.held = [Item.P]
             return True
         return False
 
+    def continue_assembly(self):
+        self.assembly_ticks_remaining -= 1
+        if not self.is_assembling:
+            self.held = [Item.P]
+
+    def finish_assembly(self):
+        # Skips straight to the end of assembly, for when the worker hasn't been stepped while busy
+        self.assembly_ticks_remaining = 0
+        self.held = [Item.P]
+
     def take_action(self, belt: Belt) -> bool:
         # Bool returned represents whether the belt was interacted with during action
-        if self._place_product(belt):
+        if self.is_assembling:
+            self.continue_assembly()
+            return False
+        elif self._place_product(belt):
             return True
         elif self._pick_up_component(belt):
             return True
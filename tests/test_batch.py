@@ -0,0 +1,90 @@
+import random
+
+import numpy as np
+import pytest
+
+from factory_simulator.batch import BatchFactory, run_batch, EMPTY, A, B, P
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+
+
+def held_as_bitmask(held: list) -> int:
+    return sum(item.value for item in held)
+
+
+def test_batch_factory_is_initialised_correctly():
+    # WHEN
+    factory = BatchFactory(4, 3)
+    # THEN
+    assert factory.replicas == 4
+    assert (factory.slots == EMPTY).all()
+    assert factory.hands.shape == (2, 4, 3)
+    assert not factory.hands.any()
+    assert not factory.tally.any()
+
+
+def test_batch_factory_can_move_belt():
+    # GIVEN
+    factory = BatchFactory(2, 3)
+    factory.slots[:] = [[EMPTY, A, P], [B, EMPTY, A]]
+    # WHEN
+    output = factory._move_belt(np.array([B, EMPTY], dtype=np.int8))
+    # THEN
+    assert output.tolist() == [P, A]
+    assert factory.slots.tolist() == [[B, EMPTY, A], [EMPTY, B, EMPTY]]
+
+
+@pytest.mark.parametrize(
+    "top, bottom, slot, expected_top, expected_bottom, expected_slot",
+    [
+        (P, 0, EMPTY, 0, 0, P),  # Top places product
+        (0, 0, A, A, 0, EMPTY),  # Top picks up component
+        (A, 0, A, A, A, EMPTY),  # Top already holds A, so bottom picks it up
+        (A | B, 0, A, P, A, EMPTY),  # Top assembles without touching the belt, so bottom can pick up
+        (P | A, B, B, P | A, B, B),  # Neither can pick up
+        (P | A, P, EMPTY, A, P, P),  # Top places, so bottom can't
+    ]
+)
+def test_batch_factory_follows_worker_order_of_preference(
+        top, bottom, slot, expected_top, expected_bottom, expected_slot
+):
+    # GIVEN
+    factory = BatchFactory(1, 1)
+    factory.hands[:, 0, 0] = [top, bottom]
+    factory.slots[0, 0] = slot
+    # WHEN
+    factory._action_workers()
+    # THEN
+    assert factory.hands[:, 0, 0].tolist() == [expected_top, expected_bottom]
+    assert factory.slots[0, 0] == expected_slot
+
+
+def test_batch_factory_matches_factory_tick_for_tick():
+    # GIVEN
+    replicas, belt_length, ticks = 8, 4, 300
+    rng = random.Random(3)
+    factories = [Factory(belt_length, is_silent=True) for _ in range(replicas)]
+    batch_factory = BatchFactory(replicas, belt_length)
+    for _ in range(ticks):
+        inputs = [Item.get_random_input(rng) for _ in range(replicas)]
+        # WHEN
+        batch_output = batch_factory.tick(np.array([item.value for item in inputs]))
+        factory_outputs = [factory.tick(item) for factory, item in zip(factories, inputs)]
+        # THEN
+        for replica, factory in enumerate(factories):
+            assert batch_output[replica] == factory_outputs[replica].value
+            assert batch_factory.slots[replica].tolist() == [item.value for item in factory.belt.slots]
+            for row_index, row in enumerate((Row.TOP, Row.BOTTOM)):
+                assert batch_factory.hands[row_index, replica].tolist() == [
+                    held_as_bitmask(worker.held) for worker in factory.workers[row]
+                ]
+    assert batch_factory.get_tallies() == [factory.tally.counts for factory in factories]
+
+
+def test_batch_run_is_reproducible_with_a_seed():
+    # WHEN
+    tallies = run_batch(3, 100, 5, seed=1)
+    # THEN
+    assert tallies == run_batch(3, 100, 5, seed=1)
+    assert len(tallies) == 5
+    assert all(sum(tally.values()) == 100 for tally in tallies)
@@ -1,19 +1,22 @@
-from unittest.mock import patch
+from unittest.mock import Mock
+
+import pytest
 
 from factory_simulator.belt import Belt
 from factory_simulator.enums import Item
+from factory_simulator.inputs import RandomInputs
 
 
-def test_belt_is_singleton():
+def test_belts_are_independent_instances():
     # GIVEN
     belt = Belt()
     # WHEN
     new_belt = Belt()
     # THEN
-    assert belt is new_belt
+    assert belt is not new_belt
 
 
-def test_belt_slots_are_shared_across_variables():
+def test_belt_slots_are_not_shared_between_belts():
     # GIVEN
     belt = Belt()
     new_belt = Belt()
@@ -21,7 +24,8 @@ def test_belt_slots_are_shared_across_variables():
     # WHEN
     new_belt.slots.append(Item.B)
     # THEN
-    assert belt.slots == new_belt.slots
+    assert belt.slots == [Item.A]
+    assert new_belt.slots == [Item.B]
 
 
 def test_belt_can_add_empty_item():
@@ -45,14 +49,104 @@ def test_belt_can_move():
     assert belt.slots[0] is Item.A
 
 
-@patch.object(Item, 'get_random_input', return_value=Item.A)
-def test_belt_can_move_using_random_input_as_default(mock_get_random_input):
-    # GIVEN
+def test_belt_uses_random_inputs_by_default():
+    # WHEN
     belt = Belt()
+    # THEN
+    assert isinstance(belt.inputs, RandomInputs)
+
+
+def test_belt_can_move_using_its_inputs_as_default():
+    # GIVEN
+    inputs = Mock(return_value=Item.A)
+    belt = Belt(inputs)
     belt.slots = [Item.EMPTY, Item.EMPTY, Item.P]
     # WHEN
     output = belt.move()
     # THEN
-    mock_get_random_input.assert_called_once()
+    inputs.assert_called_once_with()
     assert output is Item.P
     assert belt.slots[0] is Item.A
+
+
+def test_belts_with_the_same_seed_move_identically():
+    # GIVEN
+    belt = Belt(RandomInputs(5))
+    other_belt = Belt(RandomInputs(5))
+    # WHEN
+    outputs = [belt.move() for _ in range(100)]
+    # THEN
+    assert outputs == [other_belt.move() for _ in range(100)]
+
+
+def test_belt_move_wraps_around_the_end_of_the_belt():
+    # GIVEN
+    belt = Belt()
+    belt.slots = [Item.EMPTY, Item.EMPTY, Item.EMPTY]
+    # WHEN
+    outputs = [belt.move(item) for item in (Item.A, Item.B, Item.P, Item.A, Item.EMPTY)]
+    # THEN
+    assert outputs == [Item.EMPTY, Item.EMPTY, Item.EMPTY, Item.A, Item.B]
+    assert belt.slots == [Item.EMPTY, Item.A, Item.P]
+
+
+def test_belt_slots_are_indexed_from_the_start_of_the_belt_after_moving():
+    # GIVEN
+    belt = Belt()
+    belt.slots = [Item.EMPTY, Item.EMPTY, Item.EMPTY]
+    belt.move(Item.A)
+    belt.move(Item.B)
+    # WHEN
+    belt.slots[1] = Item.P
+    # THEN
+    assert belt.slots[0] is Item.B
+    assert belt.slots[1] is Item.P
+    assert belt.slots[-1] is Item.EMPTY
+    assert belt.slots[1:] == [Item.P, Item.EMPTY]
+    assert len(belt.slots) == 3
+
+
+def test_belt_can_add_empty_item_after_moving():
+    # GIVEN
+    belt = Belt()
+    belt.slots = [Item.EMPTY, Item.EMPTY]
+    belt.move(Item.A)
+    # WHEN
+    belt.add_empty_item()
+    # THEN
+    assert belt.slots == [Item.A, Item.EMPTY, Item.EMPTY]
+
+
+def test_empty_belt_move_returns_the_item_added():
+    # GIVEN
+    belt = Belt()
+    # WHEN
+    output = belt.move(Item.A)
+    # THEN
+    assert output is Item.A
+    assert belt.slots == []
+
+
+def test_belt_can_add_many_empty_items_at_once_after_moving():
+    # GIVEN
+    belt = Belt()
+    belt.slots = [Item.EMPTY, Item.EMPTY]
+    belt.move(Item.A)
+    # WHEN
+    belt.add_empty_items(3)
+    # THEN
+    assert belt.slots == [Item.A, Item.EMPTY, Item.EMPTY, Item.EMPTY, Item.EMPTY]
+
+
+def test_belt_slot_indexes_out_of_range_raise_index_error():
+    # GIVEN
+    belt = Belt()
+    belt.slots = [Item.A, Item.B]
+    belt.move(Item.EMPTY)
+    # THEN
+    assert belt.slots[-2] is Item.EMPTY
+    for index in (2, -3):
+        with pytest.raises(IndexError):
+            belt.slots[index]
+        with pytest.raises(IndexError):
+            belt.slots[index] = Item.P
@@ -0,0 +1,139 @@
+import time
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.compare import compare_results
+from benchmarks.engines import BATCH_MAX_SLOTS, RUN_REPLICAS, RUN_TICKS, make_batch_factory
+from benchmarks.suite import _run_ticks, get_cases, get_case_name, measure_latency, run_case, run_suite
+
+
+def get_run(ticks_per_second: float, peak_memory_bytes: int) -> dict:
+    return {"results": [{"name": "table/belt=3/ticks=100/silent",
+                         "ticks_per_second": ticks_per_second,
+                         "peak_memory_bytes": peak_memory_bytes}]}
+
+
+def test_benchmark_cases_only_include_verbose_for_short_object_model_runs():
+    # GIVEN
+    preset = {"engines": ("factory", "table"), "belt_lengths": (3,), "ticks": (10, 100), "verbose": (False, True)}
+    # WHEN
+    names = [get_case_name(case) for case in get_cases(preset)]
+    # THEN
+    assert names == [
+        "factory/belt=3/ticks=10/silent",
+        "factory/belt=3/ticks=10/verbose",
+        "factory/belt=3/ticks=100/silent",
+        "table/belt=3/ticks=10/silent",
+        "table/belt=3/ticks=100/silent",
+    ]
+
+
+def test_benchmark_cases_only_include_short_runs_of_ensembles():
+    # GIVEN
+    preset = {"engines": ("ensemble", "variance"), "belt_lengths": (3, 1_000_000), "ticks": (10, 100),
+              "verbose": (False, True)}
+    # WHEN
+    names = [get_case_name(case) for case in get_cases(preset)]
+    # THEN
+    assert names == ["ensemble/belt=3/ticks=10/silent", "variance/belt=3/ticks=10/silent"]
+
+
+def test_benchmark_ensemble_cases_count_replica_ticks(capfd):
+    # GIVEN
+    case = {"engine": "variance", "belt_length": 3, "ticks": 2, "is_verbose": False}
+    # WHEN
+    result = run_case(case, 5.0)
+    # THEN
+    assert result["ticks_run"] == 2
+    replica_ticks_per_call = RUN_TICKS * RUN_REPLICAS * 2
+    assert result["replica_ticks_per_second"] == pytest.approx(result["ticks_per_second"] * replica_ticks_per_call)
+
+
+def test_benchmark_case_records_throughput_latency_and_memory(capfd):
+    # GIVEN
+    case = {"engine": "factory", "belt_length": 3, "ticks": 50, "is_verbose": True}
+    # WHEN
+    result = run_case(case, 5.0)
+    out, err = capfd.readouterr()
+    # THEN
+    assert result["name"] == "factory/belt=3/ticks=50/verbose"
+    assert result["ticks_run"] == 50
+    assert result["ticks_per_second"] > 0
+    assert result["latency_ns"]["p50"] <= result["latency_ns"]["p99"] <= result["latency_ns"]["max"]
+    assert result["peak_memory_bytes"] > 0
+    assert out == ""
+
+
+def test_benchmark_comparison_flags_slow_downs():
+    # WHEN
+    comparisons = compare_results(get_run(100, 1000), get_run(80, 1000), threshold=0.1)
+    # THEN
+    assert comparisons[0]["speed_ratio"] == 0.8
+    assert comparisons[0]["is_regression"] is True
+
+
+def test_benchmark_comparison_flags_memory_growth():
+    # WHEN
+    comparisons = compare_results(get_run(100, 1000), get_run(100, 1200), threshold=0.1)
+    # THEN
+    assert comparisons[0]["is_regression"] is True
+
+
+def test_benchmark_comparison_allows_noise_within_threshold():
+    # WHEN
+    comparisons = compare_results(get_run(100, 1000), get_run(95, 1050), threshold=0.1)
+    # THEN
+    assert comparisons[0]["is_regression"] is False
+
+
+def test_benchmark_comparison_skips_cases_missing_from_the_baseline():
+    assert compare_results({"results": []}, get_run(100, 1000)) == []
+
+
+def test_benchmark_ticks_stop_at_the_time_budget_however_slow_a_tick_is():
+    # GIVEN
+    tick = partial(time.sleep, 0.05)
+    # WHEN
+    start = time.perf_counter()
+    ticks_run = _run_ticks(tick, 1000, 0.1)
+    # THEN
+    assert 1 <= ticks_run <= 4
+    assert time.perf_counter() - start < 0.5
+
+
+def test_benchmark_latency_without_samples_is_empty():
+    # GIVEN
+    case = {"engine": "table", "belt_length": 3, "ticks": 0, "is_verbose": False}
+    # WHEN
+    latency = measure_latency(case, 1.0)
+    # THEN
+    assert latency == {"p50": None, "p90": None, "p99": None, "max": None}
+
+
+@patch('benchmarks.suite.run_case')
+def test_benchmark_suite_records_failed_cases_and_carries_on(mock_run_case):
+    # GIVEN
+    preset = {"engines": ("table",), "belt_lengths": (3, 4), "ticks": (10,), "verbose": (False,), "max_seconds": 1.0}
+    mock_run_case.side_effect = [MemoryError("out of memory"), {"name": "table/belt=4/ticks=10/silent"}]
+    # WHEN
+    results = run_suite(preset)["results"]
+    # THEN
+    assert results[0]["error"] == "MemoryError: out of memory"
+    assert results[1] == {"name": "table/belt=4/ticks=10/silent"}
+
+
+def test_benchmark_batch_engine_cuts_replicas_on_long_belts():
+    # WHEN
+    _, replicas = make_batch_factory(1_000_000)
+    # THEN
+    assert replicas == BATCH_MAX_SLOTS // 1_000_000
+
+
+def test_benchmark_comparison_flags_cases_that_now_fail():
+    # WHEN
+    comparisons = compare_results(get_run(100, 1000), {"results": [{"name": "table/belt=3/ticks=100/silent",
+                                                                     "error": "MemoryError"}]})
+    # THEN
+    assert comparisons[0]["is_regression"] is True
@@ -0,0 +1,151 @@
+import pytest
+
+from factory_simulator import checkpoint
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+
+def get_factory(belt_length: int = 5, assembly_ticks: int = 1, seed=1) -> Factory:
+    return Factory(belt_length, Belt(RandomInputs(seed, 16)), is_silent=True, assembly_ticks=assembly_ticks)
+
+
+def run(factory: Factory, ticks_to_run: int) -> list:
+    return [factory.tick() for _ in range(ticks_to_run)]
+
+
+@pytest.mark.parametrize("held", [[], [Item.A], [Item.B, Item.A], [Item.P], [Item.B, Item.P]])
+def test_checkpoint_can_pack_and_unpack_held_items_in_order(held):
+    # WHEN
+    code = checkpoint.pack_held(held)
+    # THEN
+    assert code < 256
+    assert checkpoint.unpack_held(code) == held
+
+
+def test_checkpoint_round_trips_factory_state():
+    # GIVEN
+    factory = get_factory(assembly_ticks=3)
+    run(factory, 50)
+    # WHEN
+    loaded = checkpoint.loads(checkpoint.dumps(factory))
+    # THEN
+    assert loaded.ticks == factory.ticks == 50
+    assert list(loaded.belt.slots) == list(factory.belt.slots)
+    for row in (Row.TOP, Row.BOTTOM):
+        assert [worker.held for worker in loaded.workers[row]] == [worker.held for worker in factory.workers[row]]
+    assert sorted(loaded.get_assembling_workers()) == sorted(factory.get_assembling_workers())
+    assert loaded.tally.counts == factory.tally.counts
+    assert loaded.tally.ticks == factory.tally.ticks
+    assert loaded.products_placed == factory.products_placed > 0
+
+
+@pytest.mark.parametrize("assembly_ticks", [1, 4])
+@pytest.mark.parametrize("seed", [7, "7:3"])
+def test_checkpoint_resumes_with_identical_output(assembly_ticks, seed):
+    # GIVEN
+    factory = get_factory(8, assembly_ticks, seed)
+    run(factory, 123)
+    loaded = checkpoint.loads(checkpoint.dumps(factory))
+    # WHEN
+    resumed = run(loaded, 500)
+    # THEN
+    assert resumed == run(factory, 500)
+    assert loaded.tally.counts == factory.tally.counts
+
+
+def test_checkpoint_is_a_few_bytes_per_slot():
+    # GIVEN
+    factory = get_factory(10_000)
+    run(factory, 100)
+    # WHEN
+    data = checkpoint.dumps(factory)
+    # THEN
+    assert len(data) < 10_000 * 3 + 4_000
+
+
+def test_checkpoint_keeps_workers_assembly_ticks_overrides():
+    # GIVEN
+    factory = get_factory()
+    factory.workers[Row.BOTTOM][2].assembly_ticks = 6
+    # WHEN
+    loaded = checkpoint.loads(checkpoint.dumps(factory))
+    # THEN
+    assert loaded.workers[Row.BOTTOM][2].assembly_ticks == 6
+    assert loaded.workers[Row.TOP][2].assembly_ticks == 1
+
+
+def test_checkpoint_requires_random_inputs():
+    # GIVEN
+    factory = Factory(3, Belt(lambda: Item.A), is_silent=True)
+    # THEN
+    with pytest.raises(checkpoint.CheckpointError):
+        checkpoint.dumps(factory)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: b"NOPE" + data[4:],
+    lambda data: data[:4] + bytes([checkpoint.VERSION + 1]) + data[5:],
+    lambda data: data[:-1],
+])
+def test_checkpoint_rejects_bad_data(corrupt):
+    # GIVEN
+    data = checkpoint.dumps(get_factory())
+    # THEN
+    with pytest.raises(checkpoint.CheckpointError):
+        checkpoint.loads(corrupt(data))
+
+
+def test_checkpoint_can_save_and_load(tmp_path):
+    # GIVEN
+    path = tmp_path / "run.ckpt"
+    path.write_bytes(b"previous")
+    factory = get_factory()
+    run(factory, 20)
+    # WHEN
+    checkpoint.save(factory, str(path))
+    loaded = checkpoint.load(str(path))
+    # THEN
+    assert loaded.ticks == 20
+    assert [entry.name for entry in tmp_path.iterdir()] == ["run.ckpt"]
+
+
+def test_checkpoint_save_leaves_previous_checkpoint_when_it_fails(tmp_path):
+    # GIVEN
+    path = tmp_path / "run.ckpt"
+    path.write_bytes(b"previous")
+    factory = Factory(3, Belt(lambda: Item.A), is_silent=True)
+    # WHEN
+    with pytest.raises(checkpoint.CheckpointError):
+        checkpoint.save(factory, str(path))
+    # THEN
+    assert path.read_bytes() == b"previous"
+    assert [entry.name for entry in tmp_path.iterdir()] == ["run.ckpt"]
+
+
+def test_checkpoint_can_run_with_checkpoints_every_few_ticks(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "run.ckpt")
+    factory = get_factory()
+    # WHEN
+    factory, checkpoints = checkpoint.run_with_checkpoints(factory, 25, path, every_ticks=10)
+    # THEN
+    assert factory.ticks == 25
+    assert checkpoints == 3
+    assert checkpoint.load(path).ticks == 25
+
+
+def test_checkpoint_can_resume_a_run_with_checkpoints(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "run.ckpt")
+    factory = get_factory()
+    uninterrupted = get_factory()
+    checkpoint.run_with_checkpoints(factory, 30, path, every_ticks=10)
+    # WHEN
+    resumed, checkpoints = checkpoint.run_with_checkpoints(checkpoint.load(path), 60, path, every_ticks=10)
+    # THEN
+    run(uninterrupted, 60)
+    assert checkpoints == 3
+    assert resumed.tally.counts == uninterrupted.tally.counts
+    assert list(resumed.belt.slots) == list(uninterrupted.belt.slots)
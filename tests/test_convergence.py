@@ -0,0 +1,86 @@
+import math
+import statistics
+
+import pytest
+
+from factory_simulator import convergence, markov
+from factory_simulator.belt import Belt
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+
+def test_convergence_running_stats_match_batch_statistics():
+    # GIVEN
+    values = [0.3, 0.25, 0.4, 0.31, 0.28, 0.33]
+    stats = convergence.RunningStats()
+    # WHEN
+    for value in values:
+        stats.add(value)
+    # THEN
+    assert stats.count == 6
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.variance == pytest.approx(statistics.variance(values))
+    assert stats.get_half_width() == pytest.approx(convergence.Z_95 * math.sqrt(statistics.variance(values) / 6))
+
+
+def test_convergence_half_width_is_unbounded_without_enough_values():
+    # GIVEN
+    stats = convergence.RunningStats()
+    stats.add(1.0)
+    # THEN
+    assert stats.get_half_width() == math.inf
+
+
+@pytest.mark.parametrize(
+    "values, expected_warm_up",
+    [
+        ([3, 3, 2, 3, 4, 3, 3, 2, 3, 4], 0),
+        ([0, 0, 0, 0, 3, 3, 2, 3, 4, 3, 3, 2, 3, 4], 4),
+        ([0, 1, 2, 3, 4, 5, 6, 7, 8, 9], 5),
+    ]
+)
+def test_convergence_finds_warm_up(values, expected_warm_up):
+    assert convergence.get_warm_up(values) == expected_warm_up
+
+
+def test_convergence_batches_are_whole_numbers_of_warm_up_batches():
+    assert convergence.get_batch_ticks(3) == convergence.BATCH_TICKS
+    assert convergence.get_batch_ticks(1001) % convergence.WARM_UP_BATCH_TICKS == 0
+
+
+def test_convergence_drops_the_warm_up_of_a_long_belt():
+    # GIVEN
+    factory = Factory(40, Belt(RandomInputs(1)), is_silent=True)
+    # WHEN
+    counts, warm_up = convergence.find_warm_up(factory, 10 ** 6)
+    # THEN
+    assert warm_up * convergence.WARM_UP_BATCH_TICKS >= 40
+    assert warm_up < len(counts) // 2
+
+
+def test_convergence_stops_once_precise_enough():
+    # WHEN
+    result = convergence.run_converging_replica(3, 0.01, seed=4)
+    # THEN
+    assert result["is_converged"]
+    assert result["half_width"] <= 0.01
+    assert result["batches"] >= convergence.MIN_BATCHES
+    assert result["ticks"] == result["warm_up_ticks"] + result["batches"] * result["batch_ticks"]
+    low, high = result["confidence_interval"]
+    assert low - 0.01 <= markov.solve(3)["rates"][markov.Item.P] <= high + 0.01
+
+
+def test_convergence_stops_at_the_tick_limit():
+    # WHEN
+    result = convergence.run_converging_replica(3, 1e-6, seed=4, max_ticks=5_000)
+    # THEN
+    assert not result["is_converged"]
+    assert result["ticks"] == 5_000
+
+
+def test_convergence_leaves_out_batches_cut_short():
+    # WHEN
+    result = convergence.run_converging_replica(3, 1e-6, seed=4, max_ticks=5_500)
+    # THEN
+    assert result["ticks"] == 5_500
+    assert result["batches"] == (result["ticks"] - result["warm_up_ticks"]) // result["batch_ticks"]
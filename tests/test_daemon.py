@@ -0,0 +1,182 @@
+import os
+import socket
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from factory_simulator import daemon, ensemble
+from factory_simulator.client import DaemonClient
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # Serves on a Unix socket from a thread, with a single warm worker process
+    path = str(tmp_path / "daemon.sock")
+    server = daemon.UnixDaemonServer(path, daemon.RequestHandler)
+    server.daemon = daemon.SimulationDaemon(1)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield path
+    server.shutdown()
+    thread.join()
+    server.server_close()
+    server.daemon.shutdown()
+
+
+def test_daemon_parses_jobs_with_the_command_line_options():
+    # WHEN
+    job = daemon.parse_job(["-b", "4", "-t", "50", "-a", "2", "--seed", "3"])
+    # THEN
+    assert job == {
+        "config": {"belt_length": 4, "ticks_to_run": 50, "assembly_ticks": 2},
+        "seed": 3,
+        "replicas": None,
+        "is_analytic": False,
+        "tolerance": None,
+        "max_ticks": 50
+    }
+
+
+def test_daemon_picks_a_seed_for_unseeded_jobs():
+    # WHEN
+    job = daemon.parse_job([])
+    # THEN
+    assert isinstance(job["seed"], int)
+
+
+@pytest.mark.parametrize(
+    "args", [["-q"], ["-b", "x"], ["-s"], ["-v"], ["-h"], ["--analytic", "-a", "2"], ["-r", "2", "--tolerance", "0.1"]]
+)
+def test_daemon_rejects_invalid_or_unsupported_options(args):
+    with pytest.raises(ValueError):
+        daemon.parse_job(args)
+
+
+def test_daemon_set_tick_job_matches_a_replica():
+    # WHEN
+    result = daemon.run_job("a", daemon.parse_job(["-b", "3", "-t", "50", "--seed", "7"]))
+    # THEN
+    expected = ensemble.run_replica(3, 50, 7)
+    assert result["counts"] == {item.name: expected[item] for item in ensemble.TALLIED_ITEMS}
+
+
+def test_daemon_can_run_converging_jobs():
+    # WHEN
+    result = daemon.run_job("a", daemon.parse_job(["--tolerance", "0.5", "--seed", "1"]))
+    # THEN
+    assert result["is_converged"]
+    assert result["half_width"] <= 0.5
+
+
+def test_daemon_running_job_stops_when_cancelled(monkeypatch):
+    # GIVEN
+    monkeypatch.setattr(daemon, "_cancelled", {"a": True})
+    # THEN
+    with pytest.raises(daemon.JobCancelled):
+        daemon.run_job("a", daemon.parse_job(["-t", "100"]))
+
+
+def test_daemon_response_reports_errors():
+    # GIVEN
+    future = Future()
+    future.set_exception(RuntimeError("broken"))
+    # WHEN
+    response = daemon.get_response("a", future)
+    # THEN
+    assert response == {"type": "result", "id": "a", "status": "error", "error": "broken"}
+
+
+def test_daemon_can_run_jobs_from_a_client(socket_path):
+    # GIVEN
+    with DaemonClient(socket_path) as client:
+        # WHEN
+        response = client.run(["-b", "3", "-t", "50", "--seed", "7"], "a")
+        # THEN
+        assert response["id"] == "a"
+        assert response["status"] == "done"
+        assert response["result"]["seed"] == 7
+        assert sum(response["result"]["counts"].values()) == 50
+
+
+def test_daemon_can_run_a_batch_of_jobs(socket_path):
+    # GIVEN
+    jobs = [["-t", "20", "--seed", "1"], ["-t", "20", "-r", "3", "--seed", "2"], ["-s"], ["-b", "1", "--analytic"]]
+    with DaemonClient(socket_path) as client:
+        # WHEN
+        responses = client.run_batch(jobs)
+    # THEN
+    assert [response["status"] for response in responses] == ["done", "done", "error", "done"]
+    assert responses[1]["result"]["replicas"] == 3
+    assert sum(responses[3]["result"]["rates"].values()) == pytest.approx(1)
+
+
+def test_daemon_can_cancel_a_job(socket_path):
+    # GIVEN
+    with DaemonClient(socket_path) as client:
+        job_id = client.submit(["-t", "1000000000"])
+        # WHEN
+        is_cancelled = client.cancel(job_id)
+        response = next(client.iter_results([job_id]))
+        # THEN
+        assert is_cancelled
+        assert response["status"] == "cancelled"
+        assert not client.cancel(job_id)
+
+
+def test_daemon_replies_to_pings_and_bad_requests(socket_path):
+    with DaemonClient(socket_path) as client:
+        assert client.ping()["workers"] == 1
+        client.send({"type": "nonsense"})
+        assert client.receive()["type"] == "error"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"type": "run"},
+        {"type": "run", "id": "a", "args": "-t 5"},
+        {"type": "batch"},
+        {"type": "batch", "jobs": [{"args": []}]},
+        {"type": "cancel"},
+    ]
+)
+def test_daemon_rejects_malformed_requests(message):
+    with pytest.raises(ValueError):
+        daemon.check_request(message)
+
+
+def test_daemon_replies_to_malformed_requests_and_carries_on(socket_path):
+    with DaemonClient(socket_path) as client:
+        client.send({"type": "cancel"})
+        assert client.receive()["type"] == "error"
+        assert client.ping()["type"] == "pong"
+
+
+def test_daemon_wont_take_the_socket_of_a_running_daemon(socket_path):
+    with pytest.raises(FileExistsError):
+        daemon.remove_stale_socket(socket_path)
+    with DaemonClient(socket_path) as client:
+        assert client.ping()["type"] == "pong"
+
+
+def test_daemon_removes_a_stale_socket(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "stale.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    # WHEN
+    daemon.remove_stale_socket(path)
+    # THEN
+    assert not os.path.exists(path)
+
+
+def test_daemon_leaves_other_files_alone(tmp_path):
+    # GIVEN
+    path = tmp_path / "not.sock"
+    path.write_text("keep me")
+    # THEN
+    with pytest.raises(FileExistsError):
+        daemon.remove_stale_socket(str(path))
+    assert path.read_text() == "keep me"
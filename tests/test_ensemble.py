@@ -0,0 +1,73 @@
+from collections import Counter
+
+import pytest
+
+from factory_simulator import ensemble
+from factory_simulator.enums import Item
+
+
+def test_ensemble_replica_seeds_depend_on_seed_and_replica():
+    assert ensemble.get_replica_seed(1, 0) == ensemble.get_replica_seed(1, 0)
+    assert ensemble.get_replica_seed(1, 0) != ensemble.get_replica_seed(1, 1)
+    assert ensemble.get_replica_seed(1, 0) != ensemble.get_replica_seed(2, 0)
+
+
+def test_ensemble_replica_is_reproducible(capfd):
+    # GIVEN
+    seed = ensemble.get_replica_seed(7, 3)
+    # WHEN
+    tally = ensemble.run_replica(3, 50, seed)
+    out, err = capfd.readouterr()
+    # THEN
+    assert tally == ensemble.run_replica(3, 50, seed)
+    assert sum(tally.values()) == 50
+    assert out == ""
+
+
+def test_ensemble_can_summarise_tallies():
+    # GIVEN
+    tallies = [Counter({Item.P: 2, Item.A: 1}), Counter({Item.P: 4, Item.B: 3})]
+    # WHEN
+    summary = ensemble.summarise_tallies(tallies)
+    # THEN
+    assert summary["replicas"] == 2
+    assert summary["total"] == Counter({Item.P: 6, Item.A: 1, Item.B: 3, Item.EMPTY: 0})
+    assert summary["mean"][Item.P] == 3
+    assert summary["variance"][Item.P] == 2
+    low, high = summary["confidence_interval"][Item.P]
+    assert low == pytest.approx(3 - ensemble.Z_95)
+    assert high == pytest.approx(3 + ensemble.Z_95)
+
+
+def test_ensemble_summary_of_a_single_replica_has_no_variance():
+    # WHEN
+    summary = ensemble.summarise_tallies([Counter({Item.P: 2})])
+    # THEN
+    assert summary["variance"][Item.P] == 0
+    assert summary["confidence_interval"][Item.P] == (2, 2)
+
+
+def test_ensemble_result_does_not_depend_on_worker_count_or_chunking():
+    # WHEN
+    serial = ensemble.run_ensemble(3, 20, 6, seed=11, max_workers=1)
+    parallel = ensemble.run_ensemble(3, 20, 6, seed=11, max_workers=2, chunk_size=4)
+    # THEN
+    assert serial == parallel
+    assert serial["replicas"] == 6
+    assert sum(serial["total"].values()) == 6 * 20
+
+
+def test_ensemble_result_changes_with_seed():
+    # WHEN
+    summary = ensemble.run_ensemble(3, 50, 4, seed=1, max_workers=1)
+    other_summary = ensemble.run_ensemble(3, 50, 4, seed=2, max_workers=1)
+    # THEN
+    assert summary != other_summary
+
+
+def test_ensemble_replicas_run_with_assembly_ticks():
+    # WHEN
+    tally = ensemble.run_replica(3, 200, "1:0")
+    slow_tally = ensemble.run_replica(3, 200, "1:0", assembly_ticks=20)
+    # THEN
+    assert slow_tally[Item.P] < tally[Item.P]
@@ -1,8 +1,14 @@
+import random
+import time
+from collections import Counter
 from unittest.mock import patch, Mock
 
+import pytest
+
 from factory_simulator.belt import Belt
 from factory_simulator.enums import Row, Item
 from factory_simulator.factory import Factory
+from factory_simulator.tally import Tally
 from factory_simulator.worker import Worker
 
 
@@ -10,16 +16,54 @@ from factory_simulator.worker import Worker
 def test_factory_is_initialised_correctly(mock_set_up):
     # GIVEN
     belt_length = 3
-    belt = Belt()
     # WHEN
     factory = Factory(belt_length)
     # THEN
-    assert factory.belt is belt
+    assert isinstance(factory.belt, Belt)
     assert factory.workers == {Row.TOP: [], Row.BOTTOM: []}
-    assert factory.output == []
+    assert factory.tally.counts == Counter()
+    assert factory.output is None
     mock_set_up.assert_called_once_with(belt_length)
 
 
+@patch.object(Factory, '_set_up')
+def test_factory_can_be_initialised_with_injected_belt_and_workers(mock_set_up):
+    # GIVEN
+    belt = Belt()
+    workers = {Row.TOP: [Worker(0, Row.TOP)], Row.BOTTOM: [Worker(0, Row.BOTTOM)]}
+    # WHEN
+    factory = Factory(1, belt, workers)
+    # THEN
+    assert factory.belt is belt
+    assert factory.workers is workers
+
+
+def test_factories_do_not_share_belts():
+    # GIVEN
+    factory = Factory(2)
+    other_factory = Factory(3)
+    # WHEN
+    factory.belt.move(Item.A)
+    # THEN
+    assert factory.belt is not other_factory.belt
+    assert factory.belt.slots == [Item.A, Item.EMPTY]
+    assert other_factory.belt.slots == [Item.EMPTY, Item.EMPTY, Item.EMPTY]
+
+
+def test_factory_set_up_tops_up_injected_belt_and_workers():
+    # GIVEN
+    belt = Belt()
+    belt.slots = [Item.A]
+    top_worker = Worker(0, Row.TOP)
+    # WHEN
+    factory = Factory(2, belt, {Row.TOP: [top_worker], Row.BOTTOM: []})
+    # THEN
+    assert factory.belt.slots == [Item.A, Item.EMPTY]
+    assert factory.workers[Row.TOP][0] is top_worker
+    assert [w.belt_position for w in factory.workers[Row.TOP]] == [0, 1]
+    assert [w.belt_position for w in factory.workers[Row.BOTTOM]] == [0, 1]
+
+
 def test_factory_can_be_set_up(capfd):
     # GIVEN
     belt_length = 1
@@ -41,16 +85,15 @@ def test_factory_can_be_set_up(capfd):
 def test_factory_can_action_workers():
     # GIVEN
     belt = Belt()
-    top_worker1 = Mock()
-    top_worker2 = Mock()
-    bottom_worker1 = Mock()
-    bottom_worker2 = Mock()
+    top_worker1 = Mock(is_assembling=False)
+    top_worker2 = Mock(is_assembling=False)
+    bottom_worker1 = Mock(is_assembling=False)
+    bottom_worker2 = Mock(is_assembling=False)
     top_worker1.take_action.return_value = False
     top_worker2.take_action.return_value = False
     bottom_worker1.take_action.return_value = True
     bottom_worker2.take_action.return_value = True
-    factory = Factory(2)
-    factory.workers = {Row.TOP: [top_worker1, top_worker2], Row.BOTTOM: [bottom_worker1, bottom_worker2]}
+    factory = Factory(2, belt, {Row.TOP: [top_worker1, top_worker2], Row.BOTTOM: [bottom_worker1, bottom_worker2]})
     # WHEN
     factory._action_workers()
     # THEN
@@ -63,16 +106,15 @@ def test_factory_can_action_workers():
 def test_factory_only_has_one_belt_interaction_per_worker_pair_during_action_workers():
     # GIVEN
     belt = Belt()
-    top_worker1 = Mock()
-    top_worker2 = Mock()
-    bottom_worker1 = Mock()
-    bottom_worker2 = Mock()
+    top_worker1 = Mock(is_assembling=False)
+    top_worker2 = Mock(is_assembling=False)
+    bottom_worker1 = Mock(is_assembling=False)
+    bottom_worker2 = Mock(is_assembling=False)
     top_worker1.take_action.return_value = False
     top_worker2.take_action.return_value = True
     bottom_worker1.take_action.return_value = True
     bottom_worker2.take_action.return_value = False
-    factory = Factory(2)
-    factory.workers = {Row.TOP: [top_worker1, top_worker2], Row.BOTTOM: [bottom_worker1, bottom_worker2]}
+    factory = Factory(2, belt, {Row.TOP: [top_worker1, top_worker2], Row.BOTTOM: [bottom_worker1, bottom_worker2]})
     # WHEN
     factory._action_workers()
     # THEN
@@ -90,13 +132,23 @@ def test_factory_can_tick(mock_move_belt, mock_action_workers):
     factory = Factory(1)
     mock_move_belt.return_value = item
     # WHEN
-    factory.tick()
+    output = factory.tick()
     # THEN
-    assert factory.output == [item]
+    assert output is item
+    assert factory.tally.counts == Counter({item: 1})
     mock_move_belt.assert_called_once()
     mock_action_workers.assert_called_once()
 
 
+def test_factory_keeps_full_output_when_opted_in():
+    # GIVEN
+    factory = Factory(1, is_silent=True, tally=Tally(keep_history=True))
+    # WHEN
+    outputs = [factory.tick(item) for item in (Item.A, Item.B)]
+    # THEN
+    assert factory.output == outputs
+
+
 def test_factory_can_print_state(capfd):
     # GIVEN
     top_worker = Worker(0, Row.TOP)
@@ -124,8 +176,8 @@ def test_factory_can_print_state(capfd):
 def test_factory_can_print_tally(capfd):
     # GIVEN
     factory = Factory(1)
-    output = [Item.EMPTY, Item.EMPTY, Item.P, Item.A]
-    factory.output = output
+    for item in [Item.EMPTY, Item.EMPTY, Item.P, Item.A]:
+        factory.tally.add(item)
     expected_tally = "{EMPTY: 2, P: 1, A: 1}"
     # WHEN
     capfd.readouterr()
@@ -133,3 +185,95 @@ def test_factory_can_print_tally(capfd):
     out, err = capfd.readouterr()
     # THEN
     assert expected_tally in out
+
+
+def test_factory_parks_workers_while_they_assemble():
+    # GIVEN
+    factory = Factory(1, is_silent=True, assembly_ticks=3)
+    top_worker = factory.workers[Row.TOP][0]
+    top_worker.held = [Item.A, Item.B]
+    # WHEN
+    factory.tick(Item.EMPTY)
+    # THEN
+    assert top_worker.is_assembling
+    assert Row.TOP in factory._ready and 0 not in factory._ready[Row.TOP]
+    assert top_worker.held == [Item.A, Item.B]
+
+
+def test_factory_can_get_ticks_remaining_for_assembling_workers():
+    # GIVEN
+    factory = Factory(1, is_silent=True, assembly_ticks=4)
+    factory.workers[Row.TOP][0].held = [Item.A, Item.B]
+    factory.tick(Item.EMPTY)
+    # WHEN
+    factory.tick(Item.EMPTY)
+    # THEN
+    assert factory.get_assembling_workers() == [(Row.TOP, 0, 2)]
+
+
+@patch.object(Worker, 'take_action', autospec=True, side_effect=Worker.take_action)
+def test_factory_does_not_visit_workers_while_they_assemble(mock_take_action):
+    # GIVEN
+    factory = Factory(1, is_silent=True, assembly_ticks=3)
+    top_worker = factory.workers[Row.TOP][0]
+    top_worker.held = [Item.A, Item.B]
+    factory.tick(Item.EMPTY)
+    mock_take_action.reset_mock()
+    # WHEN
+    factory.tick(Item.EMPTY)
+    factory.tick(Item.EMPTY)
+    # THEN
+    assert top_worker not in [call.args[0] for call in mock_take_action.call_args_list]
+    assert top_worker.held == [Item.P]
+    assert 0 in factory._ready[Row.TOP]
+
+
+def test_factory_bottom_worker_can_pick_up_while_top_worker_assembles():
+    # GIVEN
+    factory = Factory(1, is_silent=True, assembly_ticks=2)
+    factory.workers[Row.TOP][0].held = [Item.A, Item.B]
+    factory.tick(Item.EMPTY)
+    # WHEN
+    factory.tick(Item.A)
+    # THEN
+    assert factory.workers[Row.BOTTOM][0].held == [Item.A]
+    assert factory.belt.slots == [Item.EMPTY]
+
+
+@pytest.mark.parametrize(
+    "assembly_ticks",
+    [1, 2, 4, 10]
+)
+def test_factory_scheduler_matches_stepping_every_worker(assembly_ticks):
+    # GIVEN
+    rng = random.Random(assembly_ticks)
+    factory = Factory(4, is_silent=True, assembly_ticks=assembly_ticks)
+    reference_belt = Belt()
+    reference_belt.slots = [Item.EMPTY] * 4
+    reference_workers = {
+        row: [Worker(i, row, assembly_ticks) for i in range(4)] for row in (Row.TOP, Row.BOTTOM)
+    }
+    for _ in range(300):
+        item = Item.get_random_input(rng)
+        # WHEN
+        output = factory.tick(item)
+        reference_output = reference_belt.move(item)
+        # Polls every worker, stepping busy bottom workers even when their top worker used the belt
+        for top_worker, bottom_worker in zip(reference_workers[Row.TOP], reference_workers[Row.BOTTOM]):
+            if not top_worker.take_action(reference_belt) or bottom_worker.is_assembling:
+                bottom_worker.take_action(reference_belt)
+        # THEN
+        assert output is reference_output
+        assert factory.belt.slots == reference_belt.slots
+        for row in (Row.TOP, Row.BOTTOM):
+            assert [w.held for w in factory.workers[row]] == [w.held for w in reference_workers[row]]
+
+
+def test_factory_builds_long_belts_in_linear_time():
+    # WHEN
+    start = time.perf_counter()
+    factory = Factory(50_000, is_silent=True)
+    # THEN
+    assert len(factory.belt.slots) == 50_000
+    assert len(factory.workers[Row.BOTTOM]) == 50_000
+    assert time.perf_counter() - start < 5
@@ -0,0 +1,229 @@
+import random
+from collections import Counter
+from itertools import groupby
+from unittest.mock import patch
+
+import pytest
+
+from factory_simulator.enums import Item
+from factory_simulator.inputs import (
+    AliasSampler, BlockInputs, MarkovInputs, RandomInputs, ReplayInputs, WeightedInputs, make_inputs, write_inputs
+)
+
+
+def test_random_inputs_are_initialised_correctly():
+    # WHEN
+    inputs = RandomInputs(3, 10)
+    # THEN
+    assert inputs.seed == 3
+    assert inputs.block_size == 10
+
+
+@patch('factory_simulator.inputs.random.getrandbits', return_value=42)
+def test_random_inputs_pick_a_seed_when_not_given_one(mock_getrandbits):
+    # WHEN
+    inputs = RandomInputs()
+    # THEN
+    assert inputs.seed == 42
+
+
+def test_random_inputs_only_returns_inputs():
+    # GIVEN
+    inputs = RandomInputs(1, 7)
+    # WHEN
+    drawn = [inputs() for _ in range(1000)]
+    # THEN
+    assert set(drawn) == {Item.EMPTY, Item.A, Item.B}
+
+
+def test_random_inputs_are_reproducible_whatever_the_block_size():
+    # GIVEN
+    inputs = RandomInputs(1, 3)
+    other_inputs = RandomInputs(1, 1000)
+    # WHEN
+    drawn = [inputs() for _ in range(100)]
+    # THEN
+    assert drawn == [other_inputs() for _ in range(100)]
+
+
+def test_random_inputs_draw_in_blocks():
+    # GIVEN
+    inputs = RandomInputs(1, 10)
+    # WHEN
+    with patch.object(inputs.rng, 'choices', wraps=inputs.rng.choices) as mock_choices:
+        for _ in range(25):
+            inputs()
+    # THEN
+    assert mock_choices.call_count == 3
+
+
+def test_random_inputs_can_spawn_independent_streams():
+    # GIVEN
+    inputs = RandomInputs(1)
+    # WHEN
+    children = inputs.spawn(2) + inputs.spawn(1)
+    # THEN
+    streams = [tuple(child() for _ in range(50)) for child in children]
+    assert len(set(streams)) == 3
+    assert [child.seed for child in children] == [child.seed for child in RandomInputs(1).spawn(3)]
+
+
+def test_random_inputs_carry_on_the_same_stream_from_a_saved_state():
+    # GIVEN
+    inputs = RandomInputs(1, 10)
+    for _ in range(15):
+        inputs()
+    state = inputs.get_state()
+    other_inputs = RandomInputs(2, 10)
+    # WHEN
+    other_inputs.set_state(state)
+    # THEN
+    assert [other_inputs() for _ in range(30)] == [inputs() for _ in range(30)]
+
+
+def test_alias_sampler_draws_in_proportion_to_weights():
+    # GIVEN
+    sampler = AliasSampler(["x", "y", "z"], [1, 2, 7])
+    # WHEN
+    counts = Counter(sampler.draw(random.Random(1), 100_000))
+    # THEN
+    assert counts["x"] / 100_000 == pytest.approx(0.1, abs=0.01)
+    assert counts["y"] / 100_000 == pytest.approx(0.2, abs=0.01)
+    assert counts["z"] / 100_000 == pytest.approx(0.7, abs=0.01)
+
+
+def test_alias_sampler_never_draws_items_with_no_weight():
+    # GIVEN
+    sampler = AliasSampler(["x", "y"], [0, 1])
+    # WHEN
+    drawn = sampler.draw(random.Random(1), 1000)
+    # THEN
+    assert set(drawn) == {"y"}
+    assert sampler.pick(0.0) == "y"
+
+
+@pytest.mark.parametrize("items, weights", [([], []), (["x", "y"], [1]), (["x", "y"], [-1, 2]), (["x", "y"], [0, 0])])
+def test_alias_sampler_rejects_invalid_weights(items, weights):
+    # THEN
+    with pytest.raises(ValueError):
+        AliasSampler(items, weights)
+
+
+def test_weighted_inputs_follow_their_mix_and_are_reproducible():
+    # GIVEN
+    inputs = WeightedInputs({Item.EMPTY: 2, Item.A: 1, Item.B: 1}, 1, 64)
+    other_inputs = WeightedInputs({Item.EMPTY: 2, Item.A: 1, Item.B: 1}, 1, 64)
+    # WHEN
+    drawn = [inputs() for _ in range(40_000)]
+    # THEN
+    assert Counter(drawn)[Item.EMPTY] / 40_000 == pytest.approx(0.5, abs=0.01)
+    assert drawn[:500] == [other_inputs() for _ in range(500)]
+
+
+def test_markov_inputs_come_in_runs_of_each_regime():
+    # GIVEN regimes of nothing but empty slots and nothing but A, each lasting 20 ticks on average
+    inputs = MarkovInputs([{Item.EMPTY: 1}, {Item.A: 1}], [[0.95, 0.05], [0.05, 0.95]], 1, 100)
+    # WHEN
+    drawn = [inputs() for _ in range(20_000)]
+    # THEN
+    runs = [len(list(run)) for _, run in groupby(drawn)]
+    assert set(drawn) == {Item.EMPTY, Item.A}
+    assert sum(runs) / len(runs) == pytest.approx(20, rel=0.15)
+
+
+def test_markov_inputs_stay_in_an_absorbing_regime():
+    # GIVEN
+    inputs = MarkovInputs([{Item.EMPTY: 1}, {Item.B: 1}], [[0, 1], [0, 1]], 1, 10)
+    # WHEN
+    drawn = [inputs() for _ in range(25)]
+    # THEN
+    assert drawn == [Item.EMPTY] + [Item.B] * 24
+    assert inputs.regime == 1
+
+
+def test_markov_inputs_need_switching_chances_for_every_regime():
+    # THEN
+    with pytest.raises(ValueError):
+        MarkovInputs([{Item.EMPTY: 1}, {Item.A: 1}], [[1, 0]])
+
+
+def test_replay_inputs_read_back_recorded_inputs_and_loop(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "inputs.txt")
+    recorded = [Item.A, Item.EMPTY, Item.B, Item.B, Item.A]
+    write_inputs(path, recorded, line_length=2)
+    inputs = ReplayInputs(path, 3)
+    # WHEN
+    replayed = [inputs() for _ in range(12)]
+    inputs.close()
+    # THEN
+    assert replayed == (recorded * 3)[:12]
+
+
+def test_replay_inputs_close_their_file_at_the_end_of_a_with_block(tmp_path):
+    # GIVEN
+    path = tmp_path / "inputs.txt"
+    path.write_text("AB")
+    # WHEN
+    with ReplayInputs(str(path)) as inputs:
+        inputs()
+    # THEN
+    assert inputs._file.closed
+
+
+def test_block_inputs_need_a_block_to_hand_out():
+    # THEN
+    assert isinstance(RandomInputs(1), BlockInputs)
+    with pytest.raises(TypeError):
+        BlockInputs()
+
+
+def test_replay_inputs_can_stop_at_the_end(tmp_path):
+    # GIVEN
+    path = tmp_path / "inputs.txt"
+    path.write_text("AB\nE\n")
+    inputs = ReplayInputs(str(path), 2, is_looped=False)
+    # WHEN
+    replayed = [inputs() for _ in range(3)]
+    # THEN
+    assert replayed == [Item.A, Item.B, Item.EMPTY]
+    with pytest.raises(EOFError):
+        inputs()
+
+
+def test_replay_inputs_reject_a_file_without_inputs(tmp_path):
+    # GIVEN
+    path = tmp_path / "inputs.txt"
+    path.write_text("\n  \n")
+    inputs = ReplayInputs(str(path))
+    # THEN
+    with pytest.raises(ValueError):
+        inputs()
+
+
+def test_make_inputs_builds_each_arrival_model(tmp_path):
+    # GIVEN
+    path = tmp_path / "inputs.txt"
+    path.write_text("A")
+    # THEN
+    assert isinstance(make_inputs(None, 1), RandomInputs)
+    assert isinstance(make_inputs("uniform", 1), RandomInputs)
+    assert isinstance(make_inputs("weighted:EMPTY=2,a=1,B=1", 1), WeightedInputs)
+    assert isinstance(make_inputs("bursty", 1), MarkovInputs)
+    assert isinstance(make_inputs(f"replay:{path}"), ReplayInputs)
+
+
+def test_make_inputs_can_set_burst_rates():
+    # GIVEN
+    inputs = make_inputs("bursty:on=1,off=0", 1)
+    # WHEN
+    drawn = [inputs() for _ in range(1000)]
+    # THEN
+    assert Counter(drawn)[Item.EMPTY] <= 1
+
+
+@pytest.mark.parametrize("spec", ["poisson", "uniform:x", "weighted", "weighted:P=1", "weighted:A=x", "bursty:up=1"])
+def test_make_inputs_rejects_invalid_specs(spec):
+    # THEN
+    with pytest.raises(ValueError, match="Invalid arrivals"):
+        make_inputs(spec)
@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.instrumentation import InstrumentedFactory, WorkerStats, profile
+
+
+def test_worker_stats_start_at_zero():
+    assert set(WorkerStats().as_dict().values()) == {0}
+
+
+def test_instrumented_factory_behaves_like_factory():
+    # GIVEN
+    rng = random.Random(1)
+    factory = Factory(3, is_silent=True)
+    instrumented_factory = InstrumentedFactory(3, is_silent=True)
+    for _ in range(200):
+        item = Item.get_random_input(rng)
+        # WHEN
+        output = factory.tick(item)
+        instrumented_output = instrumented_factory.tick(item)
+        # THEN
+        assert instrumented_output is output
+        assert instrumented_factory.belt.slots == factory.belt.slots
+
+
+@pytest.mark.parametrize(
+    "assembly_ticks",
+    [1, 3]
+)
+def test_instrumented_factory_accounts_for_every_worker_tick(assembly_ticks):
+    # GIVEN
+    factory = InstrumentedFactory(3, is_silent=True, assembly_ticks=assembly_ticks)
+    # WHEN
+    for _ in range(300):
+        factory.tick()
+    # THEN
+    for worker in factory.get_report()["workers"]:
+        assert worker["idle_ticks"] == (
+            worker["waiting_for_component_ticks"] + worker["blocked_ticks"] + worker["contention_losses"]
+        )
+        assert 300 == (
+            worker["idle_ticks"] + worker["assembling_ticks"] + worker["products_assembled"]
+            + worker["products_placed"] + worker["components_picked_up"]
+        )
+
+
+def test_instrumented_factory_counts_contention_losses():
+    # GIVEN
+    factory = InstrumentedFactory(1, is_silent=True)
+    # WHEN
+    factory.tick(Item.A)
+    # THEN
+    top_stats = factory.worker_stats[Row.TOP][0]
+    bottom_stats = factory.worker_stats[Row.BOTTOM][0]
+    assert top_stats.components_picked_up == 1
+    assert bottom_stats.contention_losses == 1
+    assert bottom_stats.idle_ticks == 1
+
+
+def test_instrumented_factory_counts_blocked_and_waiting_workers():
+    # GIVEN
+    factory = InstrumentedFactory(1, is_silent=True)
+    factory.workers[Row.TOP][0].held = [Item.P, Item.A]
+    # WHEN
+    factory.tick(Item.A)
+    # THEN
+    assert factory.worker_stats[Row.TOP][0].blocked_ticks == 1
+    assert factory.worker_stats[Row.BOTTOM][0].components_picked_up == 1
+
+
+def test_instrumented_factory_counts_products_assembled_and_placed():
+    # GIVEN
+    factory = InstrumentedFactory(1, is_silent=True)
+    factory.workers[Row.TOP][0].held = [Item.A, Item.B]
+    # WHEN
+    factory.tick(Item.EMPTY)
+    factory.tick(Item.EMPTY)
+    # THEN
+    assert factory.worker_stats[Row.TOP][0].products_assembled == 1
+    assert factory.worker_stats[Row.TOP][0].products_placed == 1
+    assert factory.worker_stats[Row.BOTTOM][0].waiting_for_component_ticks == 2
+
+
+def test_instrumented_factory_times_each_phase():
+    # GIVEN
+    factory = InstrumentedFactory(3, is_silent=True)
+    # WHEN
+    for _ in range(10):
+        factory.tick()
+    report = factory.get_report()
+    # THEN
+    assert report["ticks"] == 10
+    assert report["phase_seconds"]["belt_move"] > 0
+    assert report["phase_seconds"]["action_workers"] > 0
+    assert [(worker["row"], worker["position"]) for worker in report["workers"]] == [
+        ("TOP", 1), ("TOP", 2), ("TOP", 3), ("BOTTOM", 1), ("BOTTOM", 2), ("BOTTOM", 3)
+    ]
+
+
+def test_instrumented_factory_can_print_report(capfd):
+    # GIVEN
+    factory = InstrumentedFactory(1, is_silent=True)
+    factory.tick(Item.A)
+    # WHEN
+    factory.print_report()
+    out, err = capfd.readouterr()
+    # THEN
+    assert "Ticks: 1\n" in out
+    assert "TOP 1: idle_ticks=0" in out
+    assert "contention_losses=1" in out
+
+
+def test_profile_returns_stats_and_can_save_them(tmp_path):
+    # GIVEN
+    factory = Factory(3, is_silent=True)
+    output_path = tmp_path / "factory.prof"
+    # WHEN
+    stats = profile(factory, 20, str(output_path))
+    # THEN
+    assert factory.ticks == 20
+    assert stats.total_calls > 0
+    assert output_path.exists()
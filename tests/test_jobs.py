@@ -0,0 +1,97 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from factory_simulator import jobs
+from factory_simulator.main import get_config
+from factory_simulator.config import BELT_LENGTH, TICKS_TO_RUN, ASSEMBLY_TICKS
+
+
+def test_jobs_parses_a_job():
+    # WHEN
+    job = jobs.parse_job('{"id": 4, "belt_length": 5, "ticks": 10, "seed": 2, "engine": "table"}', get_config)
+    # THEN
+    assert job == {
+        "id": 4,
+        "config": {"belt_length": 5, "ticks_to_run": 10, "assembly_ticks": ASSEMBLY_TICKS},
+        "seed": 2,
+        "engine": "table"
+    }
+
+
+def test_jobs_fills_in_defaults_and_picks_a_seed():
+    # WHEN
+    job = jobs.parse_job("{}", get_config)
+    # THEN
+    assert job["config"] == {"belt_length": BELT_LENGTH, "ticks_to_run": TICKS_TO_RUN, "assembly_ticks": ASSEMBLY_TICKS}
+    assert isinstance(job["seed"], int)
+    assert job["engine"] == jobs.DEFAULT_ENGINE
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "not json",
+        "[1, 2]",
+        '{"belt_lenght": 3}',
+        '{"ticks": "many"}',
+        '{"seed": -1}',
+        '{"belt_length": 0}',
+        '{"ticks": 0}',
+        '{"engine": "quantum"}',
+        '{"assembly_ticks": 3, "engine": "batch"}',
+        '{"assembly_ticks": 1000, "engine": "vector"}',
+    ]
+)
+def test_jobs_rejects_invalid_jobs(line):
+    with pytest.raises(ValueError):
+        jobs.parse_job(line, get_config)
+
+
+@patch('factory_simulator.jobs.run_job')
+def test_jobs_reports_a_job_that_fails_to_run(mock_run_job):
+    # GIVEN
+    mock_run_job.side_effect = MemoryError("too big")
+    # WHEN
+    result = jobs.get_result(2, '{"id": "big", "seed": 5}', get_config)
+    # THEN
+    assert result["error"] == "MemoryError: too big"
+    assert result["id"] == "big"
+    assert result["seed"] == 5
+    assert "counts" not in result
+
+
+def test_jobs_engines_agree_on_a_seed():
+    # GIVEN
+    line = '{"belt_length": 5, "ticks": 500, "seed": 3, "engine": "%s"}'
+    # WHEN
+    object_result = jobs.get_result(1, line % "object", get_config)
+    table_result = jobs.get_result(1, line % "table", get_config)
+    vector_result = jobs.get_result(1, line % "vector", get_config)
+    # THEN
+    assert object_result["counts"] == table_result["counts"] == vector_result["counts"]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_jobs_yields_a_result_per_job_in_order(max_workers):
+    # GIVEN
+    lines = [json.dumps({"id": index, "belt_length": 3, "ticks": 50, "seed": index}) for index in range(7)]
+    lines.insert(3, "")
+    lines.append('{"engine": "quantum"}')
+    # WHEN
+    results = list(jobs.iter_results(lines, get_config, max_workers, jobs_per_chunk=2))
+    # THEN
+    assert [result["line"] for result in results] == [1, 2, 3, 5, 6, 7, 8, 9]
+    assert [result.get("id") for result in results[:-1]] == list(range(7))
+    assert all(sum(result["counts"].values()) == 50 for result in results[:-1])
+    assert "error" in results[-1]
+
+
+def test_jobs_results_only_depend_on_the_job():
+    # GIVEN
+    lines = [json.dumps({"belt_length": 4, "ticks": 100, "seed": seed}) for seed in (1, 2, 1)]
+    # WHEN
+    results = list(jobs.iter_results(lines, get_config, 2, jobs_per_chunk=1))
+    # THEN
+    assert results[0]["counts"] == results[2]["counts"]
@@ -0,0 +1,158 @@
+import random
+
+import pytest
+
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.latency import LogHistogram, P2Quantile, TrackedFactory, TrackedWorker
+from factory_simulator.worker import Worker
+
+
+def test_log_histogram_is_exact_for_small_values():
+    # GIVEN
+    histogram = LogHistogram(sub_bucket_bits=3)
+    # WHEN
+    for value in (0, 3, 3, 15):
+        histogram.add(value)
+    # THEN
+    assert histogram.get_buckets() == [(0, 0, 1), (3, 3, 2), (15, 15, 1)]
+    assert histogram.get_quantile(0.5) == 3
+    assert histogram.mean == 5.25
+    assert (histogram.min, histogram.max) == (0, 15)
+
+
+@pytest.mark.parametrize("value", [16, 17, 100, 1000, 123_456_789])
+def test_log_histogram_buckets_hold_their_values(value):
+    # GIVEN
+    histogram = LogHistogram(sub_bucket_bits=3)
+    # WHEN
+    histogram.add(value)
+    # THEN
+    [(low, high, count)] = histogram.get_buckets()
+    assert low <= value <= high
+    assert high - low < value / 8
+
+
+def test_log_histogram_stays_small_for_large_values():
+    # GIVEN
+    histogram = LogHistogram()
+    # WHEN
+    for exponent in range(62):
+        histogram.add(2 ** exponent + 1)
+    # THEN
+    assert len(histogram.counts) <= 64 << histogram.sub_bucket_bits
+
+
+def test_quantiles_are_close_to_exact():
+    # GIVEN
+    rng = random.Random(1)
+    values = [int(rng.expovariate(1 / 500)) for _ in range(50_000)]
+    histogram = LogHistogram()
+    sketches = [P2Quantile(quantile) for quantile in (0.5, 0.9, 0.99)]
+    # WHEN
+    for value in values:
+        histogram.add(value)
+        for sketch in sketches:
+            sketch.add(value)
+    # THEN
+    values.sort()
+    for sketch in sketches:
+        exact = values[int(sketch.quantile * len(values)) - 1]
+        assert sketch.get() == pytest.approx(exact, rel=0.05)
+        assert histogram.get_quantile(sketch.quantile) == pytest.approx(exact, rel=1 / 32)
+
+
+def test_p2_quantile_is_exact_for_few_values():
+    # GIVEN
+    sketch = P2Quantile(0.5)
+    # WHEN
+    for value in (5, 1, 3):
+        sketch.add(value)
+    # THEN
+    assert sketch.get() == 3
+
+
+def test_tracked_factory_behaves_like_factory():
+    # GIVEN
+    factory = Factory(6, Belt(RandomInputs(2)), is_silent=True, assembly_ticks=2)
+    tracked_factory = TrackedFactory(6, Belt(RandomInputs(2)), is_silent=True, assembly_ticks=2)
+    for _ in range(2000):
+        # WHEN
+        output = factory.tick()
+        # THEN
+        assert tracked_factory.tick() is output
+    assert tracked_factory.belt.slots == factory.belt.slots
+
+
+def test_tracked_factory_measures_an_item_through_the_factory():
+    # GIVEN
+    factory = TrackedFactory(1, Belt(lambda: Item.EMPTY), is_silent=True)
+    # WHEN
+    for item in (Item.A, Item.B, Item.EMPTY, Item.EMPTY, Item.EMPTY):
+        factory.tick(item)
+    report = factory.latency.get_report()
+    # THEN
+    assert report["pickup_delay"]["count"] == 2
+    assert report["pickup_delay"]["max"] == 0
+    # Placed on tick 4 and off the belt on tick 5, 4 ticks after the first component was picked up on tick 1
+    assert report["product_dwell"]["max"] == 1
+    assert report["product_latency"]["max"] == 4
+    assert report["components_missed"] == 0
+
+
+def test_tracked_factory_counts_missed_components():
+    # GIVEN
+    factory = TrackedFactory(1, Belt(lambda: Item.A), is_silent=True)
+    # WHEN
+    for _ in range(5):
+        factory.tick()
+    # THEN
+    # The first two are picked up, one by each worker, who can't hold another A, then the next two come off the end
+    assert factory.latency.components_missed == 2
+
+
+def test_tracked_factory_accounts_for_every_product(capfd):
+    # GIVEN
+    factory = TrackedFactory(5, Belt(RandomInputs(4)), is_silent=True, assembly_ticks=3)
+    # WHEN
+    for _ in range(5000):
+        factory.tick()
+    factory.print_report()
+    out, err = capfd.readouterr()
+    # THEN
+    report = factory.latency.get_report()
+    assert report["product_dwell"]["count"] == factory.tally.counts[Item.P]
+    assert report["product_latency"]["count"] == factory.tally.counts[Item.P]
+    assert report["product_dwell"]["max"] <= 5
+    assert "product_latency:" in out
+
+
+def test_tracked_factory_skips_products_already_on_the_belt():
+    # GIVEN
+    belt = Belt(lambda: Item.EMPTY)
+    belt.add_empty_items(1)
+    belt.slots[0] = Item.P
+    factory = TrackedFactory(1, belt, is_silent=True)
+    # WHEN
+    factory.tick()
+    # THEN
+    report = factory.latency.get_report()
+    assert factory.tally.counts[Item.P] == 1
+    assert report["product_dwell"]["count"] == 0
+    assert report["product_latency"]["count"] == 0
+
+
+def test_tracked_factory_takes_factorys_arguments():
+    # GIVEN
+    workers = {row: [Worker(0, row)] for row in (Row.TOP, Row.BOTTOM)}
+    workers[Row.TOP][0].held = [Item.A]
+    # WHEN
+    factory = TrackedFactory(1, Belt(lambda: Item.EMPTY), workers, True, None, 2, 7, quantiles=(0.5,))
+    factory.tick(Item.B)
+    # THEN
+    assert factory.ticks == 8
+    assert isinstance(factory.workers[Row.TOP][0], TrackedWorker)
+    assert factory.workers[Row.TOP][0].held == [Item.A, Item.B]
+    assert list(factory.latency.get_report()["pickup_delay"]["quantiles"]) == [0.5]
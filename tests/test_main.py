@@ -1,7 +1,13 @@
+import json
+from collections import Counter
 from unittest.mock import patch
 
-from factory_simulator import main
-from factory_simulator.config import BELT_LENGTH, TICKS_TO_RUN, ASSEMBLY_TICKS
+import pytest
+
+from factory_simulator import convergence, ensemble, main
+from factory_simulator.__main__ import check_modes, get_parser
+from factory_simulator.enums import Item
+from factory_simulator.config import BELT_LENGTH, TICKS_TO_RUN, ASSEMBLY_TICKS, CHECKPOINT_SECONDS
 
 
 @patch('factory_simulator.main.input')
@@ -14,7 +20,7 @@ def test_main_can_run_stepped_simulation(mock_factory, mock_input):
     # WHEN
     main.run_stepped_simulation(belt_length)
     # THEN
-    mock_factory.assert_called_once_with(belt_length)
+    mock_factory.assert_called_once_with(belt_length, None, assembly_ticks=ASSEMBLY_TICKS)
     assert mock_factory.tick.call_count == 2
     assert mock_factory.print_state.call_count == 2
     assert mock_input.call_count == 3
@@ -30,24 +36,28 @@ def test_main_can_run_set_tick_simulation(mock_factory):
     # WHEN
     main.run_set_tick_simulation(belt_length, ticks_to_run, False)
     # THEN
-    mock_factory.assert_called_once_with(belt_length)
+    mock_factory.assert_called_once_with(belt_length, None, assembly_ticks=ASSEMBLY_TICKS)
     assert mock_factory.tick.call_count == 10
     assert mock_factory.print_state.call_count == 0
     mock_factory.print_tally.assert_called_once()
 
 
+@patch('factory_simulator.main.Renderer')
 @patch('factory_simulator.main.Factory')
-def test_main_can_run_set_tick_simulation_verbose(mock_factory):
+def test_main_can_run_set_tick_simulation_verbose(mock_factory, mock_renderer):
     # GIVEN
     ticks_to_run = 10
     belt_length = 3
     mock_factory.return_value = mock_factory
+    mock_renderer.return_value = mock_renderer
     # WHEN
-    main.run_set_tick_simulation(belt_length, ticks_to_run, True)
+    main.run_set_tick_simulation(belt_length, ticks_to_run, True, render_options={"every": 5})
     # THEN
-    mock_factory.assert_called_once_with(belt_length)
+    mock_factory.assert_called_once_with(belt_length, None, assembly_ticks=ASSEMBLY_TICKS)
+    mock_renderer.assert_called_once_with(every=5)
     assert mock_factory.tick.call_count == 10
-    assert mock_factory.print_state.call_count == 10
+    assert mock_renderer.render.call_count == 10
+    mock_renderer.close.assert_called_once()
     mock_factory.print_tally.assert_called_once()
 
 
@@ -82,12 +92,12 @@ def test_main_can_get_config_overridden():
 def test_main_can_run_stepped(mock_get_config, mock_run_stepped_simulation):
     # GIVEN
     belt_length = 2
-    mock_get_config.return_value = {"belt_length": belt_length}
+    mock_get_config.return_value = {"belt_length": belt_length, "assembly_ticks": 3}
     # WHEN
-    main.run(True, belt_length)
+    main.run(is_stepped=True, belt_length=belt_length)
     # THEN
     mock_get_config.assert_called_once_with(belt_length, None, None)
-    mock_run_stepped_simulation.assert_called_once_with(belt_length)
+    mock_run_stepped_simulation.assert_called_once_with(belt_length, 3, None, None)
 
 
 @patch('factory_simulator.main.run_set_tick_simulation')
@@ -96,9 +106,442 @@ def test_main_can_run_set_tick(mock_get_config, mock_run_set_tick_simulation):
     # GIVEN
     belt_length = 2
     ticks_to_run = 8
-    mock_get_config.return_value = {"belt_length": belt_length, "ticks_to_run": ticks_to_run}
+    mock_get_config.return_value = {"belt_length": belt_length, "ticks_to_run": ticks_to_run, "assembly_ticks": 3}
+    # WHEN
+    main.run(belt_length=belt_length, ticks_to_run=ticks_to_run, assembly_ticks=3, is_verbose=True)
+    # THEN
+    mock_get_config.assert_called_once_with(belt_length, ticks_to_run, 3)
+    mock_run_set_tick_simulation.assert_called_once_with(
+        belt_length, ticks_to_run, True, 3, False, None, CHECKPOINT_SECONDS, None, None, False, None, None
+    )
+
+
+@patch('factory_simulator.main.TraceRecorder')
+@patch('factory_simulator.main.Factory')
+def test_main_can_trace_set_tick_simulation(mock_factory, mock_recorder):
+    # GIVEN
+    mock_factory.return_value = mock_factory
+    mock_recorder.return_value = mock_recorder
+    # WHEN
+    main.run_set_tick_simulation(3, 10, trace_path="run.trace")
+    # THEN
+    mock_recorder.assert_called_once_with("run.trace", mock_factory)
+    assert mock_recorder.record.call_count == 10
+    mock_recorder.close.assert_called_once()
+
+
+@patch('factory_simulator.main.TraceRecorder')
+@patch('factory_simulator.main.Renderer')
+@patch('factory_simulator.main.Factory')
+def test_main_closes_the_renderer_and_recorder_if_the_run_fails(mock_factory, mock_renderer, mock_recorder):
+    # GIVEN
+    mock_factory.return_value = mock_factory
+    mock_factory.tick.side_effect = KeyboardInterrupt
+    mock_renderer.return_value = mock_renderer
+    mock_recorder.return_value = mock_recorder
+    # WHEN
+    with pytest.raises(KeyboardInterrupt):
+        main.run_set_tick_simulation(3, 10, True, trace_path="run.trace")
+    # THEN
+    mock_renderer.close.assert_called_once()
+    mock_recorder.close.assert_called_once()
+
+
+@patch('factory_simulator.main.InstrumentedFactory')
+def test_main_can_run_instrumented_set_tick_simulation(mock_factory):
+    # GIVEN
+    mock_factory.return_value = mock_factory
+    # WHEN
+    main.run_set_tick_simulation(3, 10, False, ASSEMBLY_TICKS, True)
+    # THEN
+    mock_factory.assert_called_once_with(3, None, assembly_ticks=ASSEMBLY_TICKS)
+    assert mock_factory.tick.call_count == 10
+    mock_factory.print_tally.assert_called_once()
+    mock_factory.print_report.assert_called_once()
+
+
+@patch('factory_simulator.main.checkpoint')
+@patch('factory_simulator.main.Factory')
+def test_main_can_run_checkpointed_simulation(mock_factory, mock_checkpoint, tmp_path, capfd):
+    # GIVEN
+    path = str(tmp_path / "run.ckpt")
+    mock_factory.return_value = mock_factory
+    mock_checkpoint.run_with_checkpoints.return_value = (mock_factory, 2)
+    # WHEN
+    main.run_set_tick_simulation(3, 10, False, ASSEMBLY_TICKS, False, path, 1.5)
+    out, err = capfd.readouterr()
+    # THEN
+    mock_factory.assert_called_once_with(3, assembly_ticks=ASSEMBLY_TICKS, is_silent=True)
+    mock_checkpoint.load.assert_not_called()
+    mock_checkpoint.run_with_checkpoints.assert_called_once_with(mock_factory, 10, path, every_seconds=1.5)
+    assert "writing 2 checkpoint(s)" in out
+    mock_factory.print_tally.assert_called_once()
+
+
+@patch('factory_simulator.main.checkpoint')
+@patch('factory_simulator.main.Factory')
+def test_main_resumes_checkpointed_simulation(mock_factory, mock_checkpoint, tmp_path, capfd):
+    # GIVEN
+    path = tmp_path / "run.ckpt"
+    path.write_bytes(b"")
+    mock_checkpoint.load.return_value.ticks = 6
+    mock_checkpoint.load.return_value.belt.slots = [Item.EMPTY] * 3
+    mock_checkpoint.load.return_value.assembly_ticks = ASSEMBLY_TICKS
+    mock_checkpoint.run_with_checkpoints.return_value = (mock_checkpoint.load.return_value, 1)
+    # WHEN
+    main.run_set_tick_simulation(3, 10, False, ASSEMBLY_TICKS, False, str(path))
+    out, err = capfd.readouterr()
+    # THEN
+    mock_factory.assert_not_called()
+    mock_checkpoint.load.assert_called_once_with(str(path))
+    assert "Resuming from tick 6..." in out
+
+
+@patch('factory_simulator.main.ensemble.run_ensemble')
+def test_main_can_run_ensemble_simulation(mock_run_ensemble, capfd):
+    # GIVEN
+    mock_run_ensemble.return_value = ensemble.summarise_tallies([Counter({Item.P: 2}), Counter({Item.P: 4})])
+    # WHEN
+    main.run_ensemble_simulation(3, 10, 2, 5, 1)
+    out, err = capfd.readouterr()
+    # THEN
+    mock_run_ensemble.assert_called_once_with(3, 10, 2, 5, 1, assembly_ticks=ASSEMBLY_TICKS)
+    assert "Running 2 replica(s) with seed 5..." in out
+    assert "P: mean 3.000, variance 2.000" in out
+
+
+@patch('factory_simulator.main.ensemble.run_ensemble')
+def test_main_picks_and_prints_a_seed_for_unseeded_ensemble(mock_run_ensemble, capfd):
+    # GIVEN
+    mock_run_ensemble.return_value = ensemble.summarise_tallies([Counter()])
+    # WHEN
+    main.run_ensemble_simulation(3, 10, 1)
+    out, err = capfd.readouterr()
+    # THEN
+    seed = mock_run_ensemble.call_args.args[3]
+    assert isinstance(seed, int)
+    assert f"with seed {seed}" in out
+
+
+@patch('factory_simulator.main.run_ensemble_simulation')
+@patch('factory_simulator.main.get_config')
+def test_main_can_run_ensemble(mock_get_config, mock_run_ensemble_simulation):
+    # GIVEN
+    belt_length = 2
+    ticks_to_run = 8
+    mock_get_config.return_value = {"belt_length": belt_length, "ticks_to_run": ticks_to_run, "assembly_ticks": 4}
+    # WHEN
+    main.run(belt_length=belt_length, ticks_to_run=ticks_to_run, assembly_ticks=4, replicas=100, seed=3, max_workers=2)
+    # THEN
+    mock_run_ensemble_simulation.assert_called_once_with(belt_length, ticks_to_run, 100, 3, 2, 4)
+
+
+@patch('factory_simulator.main.markov.solve')
+def test_main_can_run_analytic_simulation(mock_solve, capfd):
+    # GIVEN
+    mock_solve.return_value = {"states": 5, "iterations": 7, "rates": {Item.P: 0.25, Item.A: 0.75}}
+    # WHEN
+    main.run_analytic_simulation(2, 100)
+    out, err = capfd.readouterr()
+    # THEN
+    mock_solve.assert_called_once_with(2)
+    assert "Solved over 5 reachable state(s) in 7 iteration(s)" in out
+    assert "P: 0.250000 per tick, 25.000 per 100 ticks" in out
+
+
+def test_main_analytic_simulation_requires_single_tick_assembly():
+    with pytest.raises(ValueError):
+        main.run_analytic_simulation(2, 100, 4)
+
+
+@patch('factory_simulator.main.run_analytic_simulation')
+@patch('factory_simulator.main.get_config')
+def test_main_can_run_analytic(mock_get_config, mock_run_analytic_simulation):
+    # GIVEN
+    mock_get_config.return_value = {"belt_length": 2, "ticks_to_run": 8, "assembly_ticks": 1}
+    # WHEN
+    main.run(belt_length=2, ticks_to_run=8, is_analytic=True)
+    # THEN
+    mock_run_analytic_simulation.assert_called_once_with(2, 8, 1)
+
+
+@patch('factory_simulator.main.sweep.run_sweep')
+def test_main_can_run_sweep_simulation(mock_run_sweep, tmp_path, capfd):
+    # GIVEN
+    mock_run_sweep.side_effect = lambda points, cache, max_workers: [
+        {"config": config, "seed": seed, "counts": Counter({Item.P: 1}), "is_cached": seed == 1}
+        for config, seed in points
+    ]
+    # WHEN
+    main.run_sweep_simulation([2, 3], [10], [None], [1, 2], 1, str(tmp_path))
+    out, err = capfd.readouterr()
+    # THEN
+    points = mock_run_sweep.call_args.args[0]
+    assert len(points) == 4
+    assert points[0] == ({"belt_length": 2, "ticks_to_run": 10, "assembly_ticks": ASSEMBLY_TICKS}, 1)
+    assert "Sweeping 4 point(s)..." in out
+    assert "Finished, 2 run and 2 from the cache" in out
+    assert "belt_length" in out
+
+
+@patch('factory_simulator.main.run_sweep_simulation')
+def test_main_can_run_sweep(mock_run_sweep_simulation):
+    # GIVEN
+    sweep_grid = {"belt_lengths": [2, 3], "ticks_to_run": None, "assembly_ticks": [1, 4], "seeds": None}
+    # WHEN
+    main.run(ticks_to_run=8, seed=5, max_workers=2, sweep_grid=sweep_grid)
+    # THEN
+    mock_run_sweep_simulation.assert_called_once_with([2, 3], [8], [1, 4], [5], 2)
+
+
+@patch('factory_simulator.main.convergence.run_converging_replica')
+def test_main_can_run_converging_simulation(mock_run_converging_replica, capfd):
+    # GIVEN
+    mock_run_converging_replica.return_value = {
+        "ticks": 21000, "warm_up_ticks": 10, "batch_ticks": 1000, "batches": 21, "rate": 0.3,
+        "half_width": 0.004, "confidence_interval": (0.296, 0.304), "is_converged": True
+    }
+    # WHEN
+    main.run_converging_simulation(3, 0.005, 7)
+    out, err = capfd.readouterr()
+    # THEN
+    mock_run_converging_replica.assert_called_once_with(3, 0.005, 7, ASSEMBLY_TICKS, convergence.MAX_TICKS)
+    assert "Finished" in out
+    assert "P: 0.300000 per tick, 95% CI [0.296000, 0.304000] (+/-0.004000)" in out
+    assert "Ran 21000 ticks, dropping 10 of warm-up, then 21 batch(es) of 1000" in out
+
+
+@patch('factory_simulator.main.run_converging_simulation')
+@patch('factory_simulator.main.get_config')
+def test_main_can_run_until_converged(mock_get_config, mock_run_converging_simulation):
+    # GIVEN
+    mock_get_config.return_value = {"belt_length": 2, "ticks_to_run": TICKS_TO_RUN, "assembly_ticks": 1}
     # WHEN
-    main.run(False, belt_length, ticks_to_run, None, True)
+    main.run(belt_length=2, seed=3, tolerance=0.01)
+    # THEN
+    mock_run_converging_simulation.assert_called_once_with(2, 0.01, 3, 1, None)
+
+
+@patch('factory_simulator.main.segmented.run_segmented')
+def test_main_can_run_segmented_simulation(mock_run_segmented, capfd):
+    # GIVEN
+    mock_run_segmented.side_effect = lambda factory, ticks_to_run, segments: factory
+    # WHEN
+    main.run_segmented_simulation(3, 10, 5)
+    out, err = capfd.readouterr()
+    # THEN
+    assert mock_run_segmented.call_args.args[1:] == (10, 3)
+    assert "Running over 3 segment(s)..." in out
+    assert "Finished" in out
+
+
+@patch('factory_simulator.main.run_segmented_simulation')
+@patch('factory_simulator.main.get_config')
+def test_main_can_run_segmented(mock_get_config, mock_run_segmented_simulation):
+    # GIVEN
+    mock_get_config.return_value = {"belt_length": 2, "ticks_to_run": 8, "assembly_ticks": 1}
+    # WHEN
+    main.run(belt_length=2, ticks_to_run=8, segments=2)
+    # THEN
+    mock_run_segmented_simulation.assert_called_once_with(2, 8, 2, 1, None, None)
+
+
+def test_main_can_run_batch_jobs(tmp_path, capfd):
+    # GIVEN
+    jobs_path = tmp_path / "jobs.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    jobs_path.write_text('{"belt_length": 3, "ticks": 20, "seed": 1}\n{"engine": "quantum"}\n')
+    # WHEN
+    main.run_batch_jobs(str(jobs_path), str(output_path), 1)
+    out, err = capfd.readouterr()
+    # THEN
+    results = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert out == ""
+    assert results[0]["seed"] == 1
+    assert sum(results[0]["counts"].values()) == 20
+    assert "error" in results[1]
+
+
+class ClosedPipe:
+    # Stands in for stdout piped into something that has stopped reading, e.g. head
+    def __init__(self, path):
+        self._file = open(path, "w")
+
+    def write(self, text):
+        raise BrokenPipeError
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+
+def test_main_batch_jobs_stop_quietly_when_the_reader_goes(tmp_path):
+    # GIVEN
+    jobs_path = tmp_path / "jobs.jsonl"
+    jobs_path.write_text('{"ticks": 5}\n' * 3)
+    closed_pipe = ClosedPipe(tmp_path / "stdout")
+    # WHEN
+    with patch('sys.stdout', closed_pipe):
+        main.run_batch_jobs(str(jobs_path), max_workers=1)
+    # THEN
+    # Nothing raised, and anything else written to stdout is thrown away
+    closed_pipe._file.write("more")
+    closed_pipe._file.close()
+    assert (tmp_path / "stdout").read_text() == ""
+
+
+@patch('factory_simulator.main.run_batch_jobs')
+def test_main_can_run_batch(mock_run_batch_jobs):
+    # WHEN
+    main.run(max_workers=2, batch_path="jobs.jsonl", batch_output_path="out.jsonl")
+    # THEN
+    mock_run_batch_jobs.assert_called_once_with("jobs.jsonl", "out.jsonl", 2)
+
+
+@patch('factory_simulator.main.TrackedFactory')
+def test_main_can_track_latency_of_set_tick_simulation(mock_factory):
+    # WHEN
+    main.run_set_tick_simulation(3, 10, is_latency_tracked=True)
+    # THEN
+    mock_factory.assert_called_once_with(3, None, assembly_ticks=ASSEMBLY_TICKS)
+    mock_factory.return_value.print_report.assert_called_once()
+
+
+def test_main_can_run_set_tick_simulation_with_arrivals(capfd):
+    # WHEN
+    main.run_set_tick_simulation(3, 50, arrivals="weighted:EMPTY=1,A=0,B=0", seed=1)
+    out, err = capfd.readouterr()
+    # THEN
+    assert "Counter({EMPTY: 50})" in out
+
+
+def test_main_seeded_set_tick_simulation_is_reproducible(capfd):
+    # GIVEN
+    main.run_set_tick_simulation(3, 200, seed=7)
+    first_out, _ = capfd.readouterr()
+    # WHEN
+    main.run_set_tick_simulation(3, 200, seed=7)
+    out, err = capfd.readouterr()
+    # THEN
+    assert out == first_out
+
+
+def test_main_closes_replayed_inputs(tmp_path, capfd):
+    # GIVEN
+    path = tmp_path / "inputs.txt"
+    path.write_text("AB")
+    belt = main.get_belt(f"replay:{path}")
+    # WHEN
+    with patch('factory_simulator.main.get_belt', return_value=belt):
+        main.run_set_tick_simulation(3, 10, arrivals=f"replay:{path}")
+    # THEN
+    assert belt.inputs._file.closed
+
+
+@patch('factory_simulator.main.run_checkpointed_simulation')
+def test_main_only_checkpoints_uniform_arrivals(mock_run_checkpointed_simulation):
+    # THEN
+    with pytest.raises(ValueError):
+        main.run_set_tick_simulation(3, 10, checkpoint_path="run.ckpt", arrivals="bursty")
+    mock_run_checkpointed_simulation.assert_not_called()
+
+
+@pytest.mark.parametrize("options", [
+    {"is_verbose": True}, {"is_instrumented": True}, {"trace_path": "run.trace"}, {"is_latency_tracked": True},
+    {"seed": 0}
+])
+@patch('factory_simulator.main.run_checkpointed_simulation')
+def test_main_rejects_options_checkpoints_cant_keep(mock_run_checkpointed_simulation, options):
+    # THEN
+    with pytest.raises(ValueError):
+        main.run_set_tick_simulation(3, 10, checkpoint_path="run.ckpt", **options)
+    mock_run_checkpointed_simulation.assert_not_called()
+
+
+@patch('factory_simulator.main.checkpoint')
+def test_main_only_resumes_checkpoints_of_the_same_run(mock_checkpoint, tmp_path):
+    # GIVEN
+    path = tmp_path / "run.ckpt"
+    path.write_bytes(b"")
+    mock_checkpoint.load.return_value.belt.slots = [Item.EMPTY] * 4
+    mock_checkpoint.load.return_value.assembly_ticks = ASSEMBLY_TICKS
+    # THEN
+    with pytest.raises(ValueError, match="belt length of 4"):
+        main.run_set_tick_simulation(3, 10, checkpoint_path=str(path))
+    mock_checkpoint.run_with_checkpoints.assert_not_called()
+
+
+@patch('factory_simulator.main.run_set_tick_simulation')
+def test_main_can_run_with_arrivals(mock_run_set_tick_simulation):
+    # WHEN
+    main.run(belt_length=2, ticks_to_run=8, assembly_ticks=1, seed=5, arrivals="bursty")
+    # THEN
+    assert mock_run_set_tick_simulation.call_args.args[-2:] == ("bursty", 5)
+
+
+def test_main_can_run_recipe_simulation(tmp_path, capfd):
+    # GIVEN
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps({"hands": 3, "recipes": [{"product": "P", "components": ["A", "B", "C"]}]}))
+    # WHEN
+    main.run_recipe_simulation(5, 200, str(path), seed=1)
+    out, err = capfd.readouterr()
+    # THEN
+    assert "Finished" in out
+    assert "P: " in out
+
+
+@patch('factory_simulator.main.run_recipe_simulation')
+@patch('factory_simulator.main.get_config')
+def test_main_can_run_recipes(mock_get_config, mock_run_recipe_simulation):
+    # GIVEN
+    mock_get_config.return_value = {"belt_length": 2, "ticks_to_run": 8, "assembly_ticks": 1}
+    # WHEN
+    main.run(belt_length=2, ticks_to_run=8, seed=4, recipes_path="recipes.json")
+    # THEN
+    mock_run_recipe_simulation.assert_called_once_with(2, 8, "recipes.json", 1, 4)
+
+
+@patch('factory_simulator.main.variance.run_variance_reduced')
+def test_main_can_run_variance_reduced_simulation(mock_run_variance_reduced, capfd):
+    # GIVEN
+    estimate = {"mean": 2.0, "variance": 0.1, "confidence_interval": (1.5, 2.5), "variance_reduction": 4.0}
+    mock_run_variance_reduced.return_value = {
+        "replicas": 10,
+        "configs": [{"belt_length": 3, "assembly_ticks": 1}, {"belt_length": 4, "assembly_ticks": 1}],
+        "products": [estimate, estimate],
+        "difference": estimate
+    }
+    # WHEN
+    main.run_variance_reduced_simulation(3, 100, 10, 7, 1, 1, {"belt_length": 4}, False, True)
+    out, err = capfd.readouterr()
+    # THEN
+    mock_run_variance_reduced.assert_called_once_with(3, 100, 10, 7, 1, 1, {"belt_length": 4}, False, True)
+    assert "using common random numbers, control variates" in out
+    assert "belt length 4, 1 assembly tick(s): P mean 2.000" in out
+    assert "Difference: P mean 2.000, 95% CI [1.500, 2.500], variance reduced 4.00x" in out
+
+
+@patch('factory_simulator.main.run_ensemble_simulation')
+@patch('factory_simulator.main.run_variance_reduced_simulation')
+@patch('factory_simulator.main.get_config')
+def test_main_can_run_variance_reduced_ensemble(mock_get_config, mock_run_variance_reduced_simulation,
+                                                mock_run_ensemble_simulation):
+    # GIVEN
+    mock_get_config.return_value = {"belt_length": 2, "ticks_to_run": 8, "assembly_ticks": 1}
+    # WHEN
+    main.run(
+        belt_length=2, ticks_to_run=8, replicas=10, seed=4, max_workers=1, comparison={"assembly_ticks": 3},
+        is_antithetic=True
+    )
+    # THEN
+    mock_run_variance_reduced_simulation.assert_called_once_with(2, 8, 10, 4, 1, 1, {"assembly_ticks": 3}, True, False)
+    mock_run_ensemble_simulation.assert_not_called()
+
+
+@pytest.mark.parametrize("args", [["-i", "--latency"], ["--sweep-ticks", "5", "-r", "2"], ["--antithetic"]])
+def test_main_rejects_options_that_cant_be_combined(args, capfd):
+    # GIVEN
+    parser = get_parser()
     # THEN
-    mock_get_config.assert_called_once_with(belt_length, ticks_to_run, None)
-    mock_run_set_tick_simulation.assert_called_once_with(belt_length, ticks_to_run, True)
+    with pytest.raises(SystemExit):
+        check_modes(parser, parser.parse_args(args))
@@ -0,0 +1,67 @@
+import pytest
+
+from factory_simulator import markov
+from factory_simulator.enums import Item, Row
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.transitions import TableFactory
+
+
+def test_markov_empty_state_has_an_empty_belt_and_workers():
+    assert markov.get_empty_state(2) == ((Item.EMPTY.value, Item.EMPTY.value), (0, 0), (0, 0))
+
+
+def test_markov_step_matches_table_factory():
+    # GIVEN
+    factory = TableFactory(3)
+    state = markov.get_empty_state(3)
+    for item in [Item.A, Item.B, Item.EMPTY, Item.A, Item.A, Item.B, Item.EMPTY, Item.EMPTY, Item.B]:
+        # WHEN
+        factory.tick(item)
+        state = markov.step(state, item.value)
+        # THEN
+        slots, top_hands, bottom_hands = state
+        assert list(slots) == [slot_item.value for slot_item in factory.get_slots()]
+        assert list(top_hands) == factory.hands[Row.TOP]
+        assert list(bottom_hands) == factory.hands[Row.BOTTOM]
+
+
+def test_markov_chain_has_one_next_state_per_input():
+    # WHEN
+    states, next_states = markov.build_chain(1)
+    # THEN
+    assert next_states.shape == (3, len(states))
+    assert states[0] == markov.get_empty_state(1)
+    assert next_states[0][0] == 0
+
+
+def test_markov_solution_of_no_belt_is_the_input_mix():
+    # WHEN
+    rates = markov.solve(0)["rates"]
+    # THEN
+    assert rates[Item.P] == 0
+    assert rates[Item.A] == pytest.approx(1 / 3)
+
+
+@pytest.mark.parametrize(
+    "belt_length",
+    [1, 2]
+)
+def test_markov_solution_is_a_distribution_over_outputs(belt_length):
+    # WHEN
+    rates = markov.solve(belt_length)["rates"]
+    # THEN
+    assert sum(rates.values()) == pytest.approx(1)
+    assert rates[Item.A] == pytest.approx(rates[Item.B])
+
+
+def test_markov_solution_agrees_with_a_long_simulation():
+    # GIVEN
+    ticks = 100_000
+    factory = TableFactory(2, RandomInputs(0))
+    # WHEN
+    rates = markov.solve(2)["rates"]
+    for _ in range(ticks):
+        factory.tick()
+    # THEN
+    for item in (Item.P, Item.A, Item.EMPTY):
+        assert factory.tally.counts[item] / ticks == pytest.approx(rates[item], abs=0.01)
@@ -0,0 +1,175 @@
+import json
+
+import pytest
+
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.recipes import DEFAULT_RECIPES, RecipeBook, RecipeFactory, RecipeWorker, load_recipes
+from factory_simulator.belt import Belt
+
+STAGED_RECIPES = [
+    {"product": "S", "components": ["A", "B", "C"]},
+    {"product": "P", "components": ["S", "D"], "ticks": 3}
+]
+
+
+def make_belt(*items) -> Belt:
+    belt = Belt()
+    belt.slots = list(items)
+    return belt
+
+
+def test_recipe_book_compiles_parts_and_inputs():
+    # WHEN
+    book = RecipeBook(STAGED_RECIPES, 3)
+    # THEN
+    assert [part.name for part in book.parts] == ["A", "B", "C", "S", "D", "P"]
+    assert book.inputs == [book.parts.A, book.parts.B, book.parts.C, book.parts.D]
+    assert book.products == [book.parts.S, book.parts.P]
+    assert all(part.value & Item.EMPTY.value == 0 for part in book.parts)
+
+
+def test_recipe_book_knows_what_held_components_still_need():
+    # GIVEN
+    book = RecipeBook(STAGED_RECIPES, 3)
+    parts = book.parts
+    # THEN
+    assert book.get_needed([]) == [parts.A, parts.B, parts.C, parts.S, parts.D]
+    assert book.get_needed([parts.A]) == [parts.B, parts.C]
+    assert book.get_needed([parts.D]) == [parts.S]
+    assert book.get_needed([parts.A, parts.B, parts.C]) == []
+
+
+def test_recipe_book_finds_the_recipe_held_components_complete():
+    # GIVEN
+    book = RecipeBook(STAGED_RECIPES, 3)
+    parts = book.parts
+    # THEN
+    assert book.completes[(parts.A | parts.B | parts.C).value].product is parts.S
+    assert book.completes[(parts.S | parts.D).value].ticks == 3
+    assert book.completes[(parts.A | parts.B).value] is None
+
+
+@pytest.mark.parametrize("recipes, hands", [
+    ([], 2),
+    ([{"product": "P", "components": ["A", "B", "C"]}], 2),
+    ([{"product": "P", "components": ["A", "A"]}], 2),
+    ([{"product": "P", "components": []}], 2),
+    ([{"product": "EMPTY", "components": ["A"]}], 2),
+    ([{"product": "P", "components": ["A"]}, {"product": "P", "components": ["B"]}], 2),
+    ([{"product": "P", "components": ["A"], "ticks": 0}], 2),
+    ([{"product": "P", "components": ["A"], "speed": 1}], 2),
+    ([{"product": "P", "components": ["Q"]}, {"product": "Q", "components": ["P"]}], 2),
+])
+def test_recipe_book_rejects_invalid_recipes(recipes, hands):
+    # THEN
+    with pytest.raises(ValueError):
+        RecipeBook(recipes, hands)
+
+
+def test_recipe_book_limits_the_number_of_components():
+    # GIVEN
+    recipes = [{"product": f"P{i}", "components": [f"C{i}"]} for i in range(13)]
+    # THEN
+    with pytest.raises(ValueError):
+        RecipeBook(recipes)
+
+
+def test_recipe_book_can_weight_inputs():
+    # GIVEN
+    book = RecipeBook(STAGED_RECIPES, 3)
+    # WHEN
+    inputs = book.make_inputs(1, {"EMPTY": 1, "D": 1})
+    # THEN
+    assert {inputs() for _ in range(100)} == {Item.EMPTY, book.parts.D}
+    with pytest.raises(ValueError):
+        book.make_inputs(1, {"S": 1})
+
+
+def test_recipe_worker_picks_up_what_it_needs_within_its_hands():
+    # GIVEN
+    book = RecipeBook(STAGED_RECIPES, 3)
+    parts = book.parts
+    worker = RecipeWorker(0, Row.TOP, book)
+    # WHEN
+    picked = [worker.take_action(make_belt(part)) for part in (parts.A, parts.D, parts.A, parts.C, parts.B)]
+    # THEN
+    assert picked == [True, False, False, True, True]
+    assert worker.held == [parts.A, parts.C, parts.B]
+    assert worker.held_mask == (parts.A | parts.B | parts.C).value
+
+
+def test_recipe_worker_assembles_then_places_its_product():
+    # GIVEN
+    book = RecipeBook(STAGED_RECIPES, 3)
+    parts = book.parts
+    worker = RecipeWorker(0, Row.TOP, book)
+    worker.held, worker.held_mask = [parts.S, parts.D], (parts.S | parts.D).value
+    belt = make_belt(parts.A)
+    # WHEN
+    worker.take_action(belt)
+    # THEN
+    assert worker.assembly_ticks_remaining == 2
+    worker.take_action(belt)
+    worker.take_action(belt)
+    assert worker.held == [parts.P]
+    assert worker.held_mask == 0
+    # AND WHEN the product is held, components can still be picked up with the hands left
+    assert worker.take_action(belt)
+    assert worker.held == [parts.P, parts.A]
+    belt.slots[0] = Item.EMPTY
+    assert worker.take_action(belt)
+    assert belt.slots[0] is parts.P
+    assert worker.held == [parts.A]
+
+
+def test_recipe_factory_with_the_default_recipe_matches_factory():
+    # GIVEN
+    for assembly_ticks in (1, 3):
+        inputs = RandomInputs(5)
+        items = [inputs() for _ in range(2000)]
+        factory = Factory(5, is_silent=True, assembly_ticks=assembly_ticks)
+        recipe_factory = RecipeFactory(5, is_silent=True, assembly_ticks=assembly_ticks)
+        parts = {Item.EMPTY: Item.EMPTY, Item.A: recipe_factory.book.parts.A, Item.B: recipe_factory.book.parts.B}
+        # WHEN
+        outputs = [factory.tick(item) for item in items]
+        recipe_outputs = [recipe_factory.tick(parts[item]) for item in items]
+        # THEN
+        assert [item.name for item in outputs] == [item.name for item in recipe_outputs]
+        assert factory.products_placed == recipe_factory.products_placed
+        assert factory.get_assembling_workers() == recipe_factory.get_assembling_workers()
+
+
+def test_recipe_factory_makes_multi_stage_products():
+    # GIVEN
+    book = RecipeBook(STAGED_RECIPES, 3)
+    factory = RecipeFactory(20, book, book.make_inputs(1), is_silent=True)
+    # WHEN
+    for _ in range(5000):
+        factory.tick()
+    # THEN
+    assert factory.tally.counts[book.parts.P] > 0
+    assert factory.products_placed >= factory.tally.counts[book.parts.P] + factory.tally.counts[book.parts.S]
+
+
+def test_load_recipes_fills_in_default_hands(tmp_path):
+    # GIVEN
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps({"recipes": DEFAULT_RECIPES["recipes"]}))
+    # WHEN
+    definition = load_recipes(str(path))
+    # THEN
+    assert definition["hands"] == DEFAULT_RECIPES["hands"]
+
+
+@pytest.mark.parametrize("definition", [
+    [], {"recipes": {}}, {"recipes": [], "colour": "red"}, {"recipes": [], "hands": 0}
+])
+def test_load_recipes_rejects_invalid_files(tmp_path, definition):
+    # GIVEN
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps(definition))
+    # THEN
+    with pytest.raises(ValueError):
+        load_recipes(str(path))
@@ -0,0 +1,138 @@
+import io
+
+import pytest
+
+from factory_simulator import rendering
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+
+def get_factory() -> Factory:
+    return Factory(3, Belt(RandomInputs(1)), is_silent=True)
+
+
+def test_rendering_formats_state_like_print_state(capfd):
+    # GIVEN
+    factory = get_factory()
+    for _ in range(5):
+        factory.tick()
+    factory.workers[Row.TOP][1].held = [Item.B, Item.A]
+    # WHEN
+    text = rendering.format_state(rendering.get_snapshot(factory))
+    # THEN
+    assert text == (
+        f"TOP ROW: {[f'{i + 1}: {w.held}' for i, w in enumerate(factory.workers[Row.TOP])]}\n"
+        f"BELT: {[f'{i + 1}: [{s.name}]' for i, s in enumerate(factory.belt.slots)]}\n"
+        f"BOTTOM ROW: {[f'{i + 1}: {w.held}' for i, w in enumerate(factory.workers[Row.BOTTOM])]}\n"
+        "\n***************\n\n"
+    )
+
+
+def test_rendering_snapshot_is_unaffected_by_later_ticks():
+    # GIVEN
+    factory = get_factory()
+    snapshot = rendering.get_snapshot(factory)
+    text = rendering.format_state(snapshot)
+    # WHEN
+    for _ in range(5):
+        factory.tick()
+    # THEN
+    assert rendering.format_state(snapshot) == text
+
+
+def test_rendering_only_renders_every_nth_tick():
+    # GIVEN
+    stream = io.StringIO()
+    factory = get_factory()
+    renderer = rendering.Renderer(stream, every=3)
+    # WHEN
+    for _ in range(10):
+        factory.tick()
+        renderer.render(factory)
+    renderer.close()
+    # THEN
+    assert stream.getvalue().count("BELT:") == 3
+
+
+def test_rendering_buffers_output_until_closed():
+    # GIVEN
+    stream = io.StringIO()
+    factory = get_factory()
+    renderer = rendering.Renderer(stream, buffer_size=1_000)
+    factory.tick()
+    # WHEN
+    renderer.render(factory)
+    # THEN
+    assert stream.getvalue() == ""
+    for _ in range(10):
+        renderer.render(factory)
+    assert stream.getvalue() != ""
+    renderer.close()
+    assert stream.getvalue().count("BELT:") == 11
+
+
+def test_rendering_can_render_to_a_file(tmp_path):
+    # GIVEN
+    path = tmp_path / "render.txt"
+    factory = get_factory()
+    # WHEN
+    with rendering.Renderer(path=str(path)) as renderer:
+        for _ in range(4):
+            factory.tick()
+            renderer.render(factory)
+    # THEN
+    assert path.read_text().count("BELT:") == 4
+
+
+def test_rendering_on_a_thread_gives_the_same_output():
+    # GIVEN
+    stream, threaded_stream = io.StringIO(), io.StringIO()
+    factory, other_factory = get_factory(), get_factory()
+    renderer = rendering.Renderer(stream)
+    threaded_renderer = rendering.Renderer(threaded_stream, is_threaded=True, queue_size=2)
+    # WHEN
+    for _ in range(50):
+        factory.tick()
+        other_factory.tick()
+        renderer.render(factory)
+        threaded_renderer.render(other_factory)
+    renderer.close()
+    threaded_renderer.close()
+    # THEN
+    assert threaded_stream.getvalue() == stream.getvalue()
+
+
+class BrokenStream(io.StringIO):
+    def write(self, text):
+        raise OSError("Broken pipe")
+
+
+def test_rendering_on_a_thread_raises_if_the_writer_stops(monkeypatch):
+    # GIVEN
+    monkeypatch.setattr(rendering, "QUEUE_BATCH_SIZE", 1)
+    factory = get_factory()
+    renderer = rendering.Renderer(BrokenStream(), is_redraw=True, is_threaded=True, queue_size=1)
+    # WHEN
+    with pytest.raises(RuntimeError) as error:
+        for _ in range(50):
+            factory.tick()
+            renderer.render(factory)
+    # THEN
+    assert isinstance(error.value.__cause__, OSError)
+
+
+def test_rendering_can_redraw_in_place():
+    # GIVEN
+    stream = io.StringIO()
+    factory = get_factory()
+    renderer = rendering.Renderer(stream, is_redraw=True)
+    # WHEN
+    for _ in range(2):
+        factory.tick()
+        renderer.render(factory)
+    # THEN
+    first, second = stream.getvalue().split(rendering.CURSOR_UP.format(7) + rendering.CLEAR_DOWN)
+    assert first.startswith("Tick 1\n")
+    assert second.startswith("Tick 2\n")
@@ -0,0 +1,92 @@
+import pytest
+
+from factory_simulator import segmented
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+
+def _get_state(factory: Factory) -> tuple:
+    return (
+        factory.ticks,
+        factory.products_placed,
+        factory.tally.counts,
+        list(factory.belt.slots),
+        [[worker.held for worker in factory.workers[row]] for row in (Row.TOP, Row.BOTTOM)],
+        sorted(factory.get_assembling_workers(), key=lambda entry: (entry[0].value, entry[1]))
+    )
+
+
+@pytest.mark.parametrize(
+    "belt_length, ticks_to_run, assembly_ticks, segments",
+    [
+        (10, 1000, 1, 3),
+        (10, 777, 3, 4),
+        (5, 100, 2, 8),
+        (1, 50, 1, 1),
+    ]
+)
+def test_segmented_matches_a_single_factory(belt_length, ticks_to_run, assembly_ticks, segments):
+    # GIVEN
+    factory = Factory(belt_length, Belt(RandomInputs(1)), is_silent=True, assembly_ticks=assembly_ticks)
+    segmented_factory = Factory(belt_length, Belt(RandomInputs(1)), is_silent=True, assembly_ticks=assembly_ticks)
+    # WHEN
+    for _ in range(ticks_to_run):
+        factory.tick()
+    segmented_factory = segmented.run_segmented(segmented_factory, ticks_to_run, segments, block_ticks=64)
+    # THEN
+    assert _get_state(segmented_factory) == _get_state(factory)
+
+
+def test_segmented_factory_carries_on_as_the_single_factory_would():
+    # GIVEN
+    factory = Factory(6, Belt(RandomInputs(2)), is_silent=True, assembly_ticks=3)
+    segmented_factory = Factory(6, Belt(RandomInputs(2)), is_silent=True, assembly_ticks=3)
+    for _ in range(300):
+        factory.tick()
+    segmented_factory = segmented.run_segmented(segmented_factory, 300, 2, block_ticks=32)
+    # WHEN
+    for _ in range(100):
+        factory.tick()
+        segmented_factory.tick()
+    # THEN
+    assert _get_state(segmented_factory) == _get_state(factory)
+
+
+def test_segmented_can_resume_from_a_factory_part_way_through_a_run():
+    # GIVEN
+    factory = Factory(8, Belt(RandomInputs(3)), is_silent=True, assembly_ticks=2)
+    segmented_factory = Factory(8, Belt(RandomInputs(3)), is_silent=True, assembly_ticks=2)
+    for _ in range(55):
+        factory.tick()
+        segmented_factory.tick()
+    # WHEN
+    for _ in range(200):
+        factory.tick()
+    segmented_factory = segmented.run_segmented(segmented_factory, 200, 3, block_ticks=16)
+    # THEN
+    assert _get_state(segmented_factory) == _get_state(factory)
+
+
+def test_segmented_keeps_the_factory_tally():
+    # GIVEN
+    factory = Factory(3, Belt(lambda: Item.A), is_silent=True)
+    tally = factory.tally
+    # WHEN
+    factory = segmented.run_segmented(factory, 10, 2)
+    # THEN
+    assert factory.tally is tally
+    assert tally.ticks == 10
+
+
+@pytest.mark.parametrize(
+    "belt_length, segments, expected_bounds",
+    [
+        (10, 3, [(0, 4), (4, 7), (7, 10)]),
+        (2, 4, [(0, 1), (1, 2)]),
+        (5, 0, [(0, 5)]),
+    ]
+)
+def test_segmented_splits_the_belt_evenly(belt_length, segments, expected_bounds):
+    assert segmented.get_segment_bounds(belt_length, segments) == expected_bounds
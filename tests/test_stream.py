@@ -0,0 +1,67 @@
+from collections import Counter
+from itertools import islice
+
+from factory_simulator import stream
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+
+def get_factory() -> Factory:
+    return Factory(3, Belt(RandomInputs(5)), is_silent=True)
+
+
+def test_stream_yields_an_event_per_tick():
+    # GIVEN
+    factory, other_factory = get_factory(), get_factory()
+    # WHEN
+    events = list(stream.iter_ticks(factory, 50))
+    # THEN
+    assert [event["tick"] for event in events] == list(range(1, 51))
+    assert [event["item"] for event in events] == [other_factory.tick() for _ in range(50)]
+    assert events[-1]["tally"] == factory.tally.counts
+
+
+def test_stream_is_lazy_and_can_stop_early():
+    # GIVEN
+    factory = get_factory()
+    # WHEN
+    events = stream.iter_ticks(factory)
+    first_product = next(event for event in events if event["item"] is Item.P)
+    # THEN
+    assert factory.ticks == first_product["tick"]
+    assert list(islice(events, 3))[-1]["tick"] == factory.ticks == first_product["tick"] + 3
+
+
+def test_stream_counts_products_placed():
+    # GIVEN
+    factory = Factory(1, Belt(lambda: Item.EMPTY), is_silent=True)
+    factory.workers[Row.TOP][0].held = [Item.P]
+    # WHEN
+    events = list(stream.iter_ticks(factory, 1))
+    # THEN
+    assert events[0]["products_placed"] == 1
+    assert factory.products_placed == 1
+
+
+def test_stream_products_placed_all_come_off_the_belt_eventually():
+    # GIVEN
+    factory = get_factory()
+    # WHEN
+    placed = sum(event["products_placed"] for event in stream.iter_ticks(factory, 500))
+    # THEN
+    assert placed - sum(slot is Item.P for slot in factory.belt.slots) == factory.tally.counts[Item.P]
+
+
+def test_stream_can_yield_chunks():
+    # GIVEN
+    factory, other_factory = get_factory(), get_factory()
+    # WHEN
+    chunks = list(stream.iter_chunks(factory, 250, 100))
+    # THEN
+    assert [(chunk["first_tick"], chunk["last_tick"]) for chunk in chunks] == [(1, 100), (101, 200), (201, 250)]
+    expected = [Counter(other_factory.tick() for _ in range(ticks)) for ticks in (100, 100, 50)]
+    assert [chunk["counts"] for chunk in chunks] == expected
+    assert sum((chunk["counts"] for chunk in chunks), Counter()) == factory.tally.counts
+    assert sum(chunk["products_placed"] for chunk in chunks) == factory.products_placed
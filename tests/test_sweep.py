@@ -0,0 +1,96 @@
+import os
+from collections import Counter
+from unittest.mock import patch
+
+from factory_simulator import ensemble, sweep
+from factory_simulator.enums import Item
+from factory_simulator.main import get_config
+
+
+def test_sweep_cache_key_depends_on_config_seed_and_engine_version():
+    # GIVEN
+    config = get_config(3, 10, 1)
+    key = sweep.get_cache_key(config, 1)
+    # THEN
+    assert key == sweep.get_cache_key(get_config(3, 10, 1), 1)
+    assert key != sweep.get_cache_key(get_config(4, 10, 1), 1)
+    assert key != sweep.get_cache_key(config, 2)
+    with patch('factory_simulator.sweep.ENGINE_VERSION', sweep.ENGINE_VERSION + 1):
+        assert key != sweep.get_cache_key(config, 1)
+
+
+def test_sweep_can_expand_a_grid():
+    # WHEN
+    points = sweep.expand_grid(get_config, [2, 3], [10], [None, 4], [1, 2])
+    # THEN
+    assert len(points) == 8
+    assert points[0] == ({"belt_length": 2, "ticks_to_run": 10, "assembly_ticks": 1}, 1)
+    assert points[-1] == ({"belt_length": 3, "ticks_to_run": 10, "assembly_ticks": 4}, 2)
+
+
+def test_sweep_cache_can_store_and_get_results(tmp_path):
+    # GIVEN
+    cache = sweep.ResultCache(str(tmp_path), 1024)
+    counts = Counter({Item.P: 3, Item.EMPTY: 2})
+    # WHEN
+    cache.put("key", counts)
+    # THEN
+    assert cache.get("key") == counts
+    assert cache.get("other") is None
+
+
+def test_sweep_cache_evicts_least_recently_used_results(tmp_path):
+    # GIVEN
+    cache = sweep.ResultCache(str(tmp_path), 1024)
+    for age, key in enumerate(["old", "used", "new"]):
+        cache.put(key, Counter({Item.P: 1}))
+        os.utime(tmp_path / f"{key}.json", ns=(age * 10 ** 9, age * 10 ** 9))
+    cache.get("used")
+    entry_size = os.path.getsize(tmp_path / "old.json")
+    cache.max_bytes = entry_size * 2
+    # WHEN
+    cache.evict()
+    # THEN
+    assert cache.get("old") is None
+    assert cache.get("used") is not None
+    assert cache.get("new") is not None
+
+
+def test_sweep_only_runs_points_missing_from_the_cache(tmp_path):
+    # GIVEN
+    cache = sweep.ResultCache(str(tmp_path), 1024 * 1024)
+    sweep.run_sweep(sweep.expand_grid(get_config, [3], [20], [1], [1, 2]), cache, max_workers=1)
+    points = sweep.expand_grid(get_config, [3], [20], [1], [1, 2, 3])
+    # WHEN
+    with patch('factory_simulator.sweep.run_replica', wraps=ensemble.run_replica) as mock_run_replica:
+        results = sweep.run_sweep(points, cache, max_workers=1)
+    # THEN
+    mock_run_replica.assert_called_once_with(3, 20, 3, 1)
+    assert [result["is_cached"] for result in results] == [True, True, False]
+    assert [result["counts"] for result in results] == [ensemble.run_replica(3, 20, seed) for seed in (1, 2, 3)]
+
+
+def test_sweep_result_does_not_depend_on_worker_count(tmp_path):
+    # GIVEN
+    points = sweep.expand_grid(get_config, [2, 3], [20], [1, 2], [5])
+    # WHEN
+    serial = sweep.run_sweep(points, sweep.ResultCache(str(tmp_path / "serial"), 1024 * 1024), max_workers=1)
+    parallel = sweep.run_sweep(points, sweep.ResultCache(str(tmp_path / "parallel"), 1024 * 1024), max_workers=2)
+    # THEN
+    assert serial == parallel
+
+
+def test_sweep_can_format_results_as_a_table():
+    # GIVEN
+    results = [
+        {"config": get_config(3, 10, 1), "seed": 1, "counts": Counter({Item.P: 2, Item.EMPTY: 8}), "is_cached": True},
+        {"config": get_config(12, 10, 1), "seed": 2, "counts": Counter({Item.A: 10}), "is_cached": False},
+    ]
+    # WHEN
+    table = sweep.format_table(results)
+    # THEN
+    header, first, second = table.split("\n")
+    assert header.split() == list(sweep.COLUMNS)
+    assert first.split() == ["3", "1", "10", "1", "2", "0", "0", "8", "yes"]
+    assert second.split() == ["12", "1", "10", "2", "0", "10", "0", "0", "no"]
+    assert len(header) == len(first) == len(second)
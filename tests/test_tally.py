@@ -0,0 +1,78 @@
+from collections import Counter
+
+import pytest
+
+from factory_simulator.enums import Item
+from factory_simulator.tally import MAX_INTERVALS, Tally
+
+ITEMS = [Item.A, Item.EMPTY, Item.P, Item.A, Item.B, Item.P, Item.P]
+
+
+def test_tally_is_initialised_correctly():
+    # WHEN
+    tally = Tally()
+    # THEN
+    assert tally.counts == Counter()
+    assert tally.ticks == 0
+    assert tally.recent is None
+    assert tally.intervals is None
+    assert tally.history is None
+
+
+def test_tally_counts_items_as_they_are_added():
+    # GIVEN
+    tally = Tally()
+    # WHEN
+    for item in ITEMS:
+        tally.add(item)
+    # THEN
+    assert tally.counts == Counter(ITEMS)
+    assert tally.ticks == len(ITEMS)
+    assert tally.history is None
+
+
+def test_tally_keeps_a_bounded_window_of_recent_items():
+    # GIVEN
+    tally = Tally(window=3)
+    # WHEN
+    for item in ITEMS:
+        tally.add(item)
+    # THEN
+    assert list(tally.recent) == [Item.B, Item.P, Item.P]
+    assert tally.get_recent_counts() == Counter({Item.P: 2, Item.B: 1})
+
+
+def test_tally_keeps_counts_for_the_most_recent_intervals():
+    # GIVEN
+    tally = Tally(interval=3, max_intervals=2)
+    # WHEN
+    for item in ITEMS:
+        tally.add(item)
+    # THEN
+    assert list(tally.intervals) == [Counter({Item.A: 1, Item.B: 1, Item.P: 1}), Counter({Item.P: 1})]
+
+
+def test_tally_bounds_intervals_by_default():
+    # WHEN
+    tally = Tally(interval=1)
+    for _ in range(MAX_INTERVALS + 10):
+        tally.add(Item.EMPTY)
+    # THEN
+    assert len(tally.intervals) == MAX_INTERVALS
+
+
+def test_tally_needs_a_limit_on_intervals_kept():
+    # WHEN
+    with pytest.raises(ValueError):
+        # THEN
+        Tally(interval=3, max_intervals=None)
+
+
+def test_tally_keeps_full_history_when_asked():
+    # GIVEN
+    tally = Tally(keep_history=True)
+    # WHEN
+    for item in ITEMS:
+        tally.add(item)
+    # THEN
+    assert tally.history == ITEMS
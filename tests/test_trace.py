@@ -0,0 +1,137 @@
+import pytest
+
+from factory_simulator import trace
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.rendering import format_state, get_snapshot
+
+
+def get_factory(assembly_ticks: int = 1) -> Factory:
+    return Factory(4, Belt(RandomInputs(3)), is_silent=True, assembly_ticks=assembly_ticks)
+
+
+def record(path, ticks_to_run: int, assembly_ticks: int = 1, is_closed: bool = True) -> trace.TraceRecorder:
+    # Small keyframe intervals and chunks, so a short run has several of each
+    factory = get_factory(assembly_ticks)
+    recorder = trace.TraceRecorder(str(path), factory, keyframe_ticks=25, chunk_bytes=100)
+    for _ in range(ticks_to_run):
+        factory.tick()
+        recorder.record()
+    if is_closed:
+        recorder.close()
+    return recorder
+
+
+def test_trace_has_a_frame_for_every_tick(tmp_path):
+    # GIVEN
+    path = tmp_path / "run.trace"
+    record(path, 100)
+    factory = get_factory()
+    # WHEN
+    with trace.TraceReader(str(path)) as reader:
+        # THEN
+        assert (reader.first_tick, reader.last_tick) == (0, 100)
+        assert reader.keyframe_count == 5
+        for tick in range(101):
+            assert reader.get_slots(tick) == list(factory.belt.slots)
+            assert reader.get_held(tick, Row.TOP) == [worker.held for worker in factory.workers[Row.TOP]]
+            assert reader.get_held(tick, Row.BOTTOM) == [worker.held for worker in factory.workers[Row.BOTTOM]]
+            factory.tick()
+
+
+def test_trace_frames_are_sliced_from_the_file(tmp_path):
+    # GIVEN
+    path = tmp_path / "run.trace"
+    record(path, 10)
+    with trace.TraceReader(str(path)) as reader:
+        # WHEN
+        slots, top, bottom = reader.get_frame(7)
+        # THEN
+        assert isinstance(slots, memoryview) and slots.readonly
+        assert len(slots) == len(top) == len(bottom) == 4
+        assert [trace.checkpoint.ITEMS_BY_VALUE[value] for value in slots] == reader.get_slots(7)
+        for view in (slots, top, bottom):
+            view.release()
+
+
+@pytest.mark.parametrize("assembly_ticks", [1, 3])
+@pytest.mark.parametrize("tick", [0, 1, 24, 25, 26, 73, 100])
+def test_trace_can_rebuild_the_exact_factory_at_any_tick(tmp_path, assembly_ticks, tick):
+    # GIVEN
+    path = tmp_path / "run.trace"
+    record(path, 100, assembly_ticks)
+    factory = get_factory(assembly_ticks)
+    for _ in range(tick):
+        factory.tick()
+    # WHEN
+    with trace.TraceReader(str(path)) as reader:
+        replayed = reader.get_factory(tick)
+    # THEN
+    assert replayed.ticks == tick
+    assert format_state(get_snapshot(replayed)) == format_state(get_snapshot(factory))
+    assert replayed.tally.counts == factory.tally.counts
+    assert [replayed.tick() for _ in range(30)] == [factory.tick() for _ in range(30)]
+
+
+def test_trace_can_be_read_without_its_index(tmp_path):
+    # GIVEN
+    path = tmp_path / "run.trace"
+    recorder = record(path, 60, is_closed=False)
+    recorder._file.flush()
+    # WHEN
+    with trace.TraceReader(str(path)) as reader:
+        # THEN
+        assert reader.keyframe_count == 3
+        assert reader.last_tick < 60
+        assert reader.get_factory(reader.last_tick).ticks == reader.last_tick
+
+
+def test_trace_rejects_ticks_outside_it(tmp_path):
+    # GIVEN
+    path = tmp_path / "run.trace"
+    record(path, 10)
+    with trace.TraceReader(str(path)) as reader:
+        # THEN
+        with pytest.raises(IndexError):
+            reader.get_frame(11)
+        with pytest.raises(IndexError):
+            reader.get_factory(-1)
+
+
+def test_trace_command_line_rejects_ticks_outside_it(tmp_path, monkeypatch, capfd):
+    # GIVEN
+    path = tmp_path / "run.trace"
+    record(path, 10)
+    monkeypatch.setattr("sys.argv", ["trace", str(path), "5000"])
+    # WHEN
+    with pytest.raises(SystemExit) as exit_info:
+        trace.main()
+    out, err = capfd.readouterr()
+    # THEN
+    assert exit_info.value.code == 2
+    assert "Tick 5000 isn't in the trace" in err
+
+
+def test_trace_rejects_other_files(tmp_path):
+    # GIVEN
+    path = tmp_path / "other.trace"
+    path.write_bytes(b"NOPE" + bytes(100))
+    # THEN
+    with pytest.raises(trace.TraceError):
+        trace.TraceReader(str(path))
+
+
+def test_trace_writes_frames_in_chunks(tmp_path):
+    # GIVEN
+    factory = get_factory()
+    recorder = trace.TraceRecorder(str(tmp_path / "run.trace"), factory, chunk_bytes=12 * 10)
+    # WHEN
+    for _ in range(25):
+        factory.tick()
+        recorder.record()
+    recorder.close()
+    # THEN
+    frame_records = [entry for entry in recorder._index if entry[0] == trace.FRAMES]
+    assert [first_tick for _, first_tick, _, _ in frame_records] == [0, 10, 20]
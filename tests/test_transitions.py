@@ -0,0 +1,76 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from factory_simulator import ensemble
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.transitions import (
+    TableFactory, TRANSITIONS, HOLDABLE_ITEMS, decode_hands, encode_held, get_index, run_table_replica
+)
+from factory_simulator.worker import Worker
+
+
+@pytest.mark.parametrize(
+    "held",
+    [[], [Item.A], [Item.B, Item.P], [Item.A, Item.B]]
+)
+def test_transitions_can_encode_and_decode_held_items(held):
+    assert sorted(decode_hands(encode_held(held)), key=HOLDABLE_ITEMS.index) == held
+
+
+@pytest.mark.parametrize(
+    "held",
+    [list(held) for hands_used in range(3) for held in combinations(HOLDABLE_ITEMS, hands_used)]
+)
+@pytest.mark.parametrize(
+    "slot_item",
+    [Item.EMPTY, Item.A, Item.B, Item.P]
+)
+def test_transitions_agree_with_worker(held, slot_item):
+    # GIVEN
+    worker = Worker(0, Row.TOP)
+    worker.held = list(held)
+    belt = Belt()
+    belt.slots = [slot_item]
+    # WHEN
+    hands, slot, interacted = TRANSITIONS[get_index(encode_held(held), slot_item.value)]
+    # THEN
+    assert interacted is worker.take_action(belt)
+    assert hands == encode_held(worker.held)
+    assert slot == belt.slots[0].value
+
+
+def test_table_factory_is_initialised_correctly():
+    # WHEN
+    factory = TableFactory(3)
+    # THEN
+    assert factory.get_slots() == [Item.EMPTY] * 3
+    assert factory.get_held(Row.TOP) == [[], [], []]
+    assert factory.get_held(Row.BOTTOM) == [[], [], []]
+
+
+def test_table_factory_matches_factory_tick_for_tick():
+    # GIVEN
+    rng = random.Random(2)
+    factory = Factory(5, is_silent=True)
+    table_factory = TableFactory(5)
+    for _ in range(500):
+        item = Item.get_random_input(rng)
+        # WHEN
+        output = factory.tick(item)
+        table_output = table_factory.tick(item)
+        # THEN
+        assert table_output is output
+        assert table_factory.get_slots() == list(factory.belt.slots)
+        for row in (Row.TOP, Row.BOTTOM):
+            assert [set(held) for held in table_factory.get_held(row)] == [
+                set(worker.held) for worker in factory.workers[row]
+            ]
+    assert table_factory.tally.counts == factory.tally.counts
+
+
+def test_table_replica_matches_ensemble_replica():
+    assert run_table_replica(3, 200, "1:0") == ensemble.run_replica(3, 200, "1:0")
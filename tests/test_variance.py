@@ -0,0 +1,134 @@
+import math
+
+import pytest
+
+from factory_simulator.enums import Item
+from factory_simulator.inputs import RandomInputs
+from factory_simulator.variance import (
+    ANTITHETIC_ITEMS, COMPONENT_CHANCE, CountedInputs, estimate_mean, parse_comparison, run_counted_replica,
+    run_variance_reduced
+)
+
+
+def test_antithetic_items_mirror_the_inputs():
+    # THEN
+    assert ANTITHETIC_ITEMS == {Item.EMPTY: Item.B, Item.A: Item.A, Item.B: Item.EMPTY}
+    assert COMPONENT_CHANCE == pytest.approx(2 / 3)
+
+
+def test_counted_inputs_count_components_fed():
+    # GIVEN
+    inputs = CountedInputs(iter([Item.A, Item.EMPTY, Item.B, Item.B]).__next__)
+    # WHEN
+    drawn = [inputs() for _ in range(4)]
+    # THEN
+    assert drawn == [Item.A, Item.EMPTY, Item.B, Item.B]
+    assert inputs.components == 3
+
+
+def test_counted_inputs_can_mirror_the_stream():
+    # GIVEN
+    inputs = CountedInputs(iter([Item.A, Item.EMPTY, Item.B, Item.B]).__next__, is_antithetic=True)
+    # WHEN
+    drawn = [inputs() for _ in range(4)]
+    # THEN
+    assert drawn == [Item.A, Item.B, Item.EMPTY, Item.EMPTY]
+    assert inputs.components == 2
+
+
+def test_antithetic_stream_is_the_one_drawn_from_mirrored_uniforms():
+    # GIVEN
+    inputs = RandomInputs(3)
+    rng = RandomInputs(3).rng
+    # WHEN
+    mirrored = [ANTITHETIC_ITEMS[inputs()] for _ in range(1000)]
+    # THEN
+    assert mirrored == [RandomInputs.INPUTS[math.floor((1 - rng.random()) * 3)] for _ in range(1000)]
+
+
+def test_parse_comparison_reads_keys_and_values():
+    # THEN
+    assert parse_comparison("belt_length=4") == {"belt_length": 4}
+    assert parse_comparison("belt_length=4,assembly_ticks=2") == {"belt_length": 4, "assembly_ticks": 2}
+
+
+@pytest.mark.parametrize("value", ["ticks=4", "belt_length", "belt_length=x", "assembly_ticks=0"])
+def test_parse_comparison_rejects_invalid_values(value):
+    # THEN
+    with pytest.raises(ValueError):
+        parse_comparison(value)
+
+
+def test_counted_replica_matches_the_ensemble_replica():
+    # GIVEN
+    config = {"belt_length": 3, "assembly_ticks": 1}
+    # WHEN
+    products, components = run_counted_replica(config, 200, "1:0")
+    # THEN
+    drawn = RandomInputs("1:0")
+    assert components == sum(drawn() is not Item.EMPTY for _ in range(200))
+    assert products > 0
+
+
+def test_estimate_mean_without_a_control_is_the_plain_mean():
+    # WHEN
+    estimate = estimate_mean([1, 2, 3, 4], [0, 0, 0, 0], 0, 5 / 12)
+    # THEN
+    assert estimate["mean"] == 2.5
+    assert estimate["variance"] == pytest.approx(5 / 12)
+    assert estimate["variance_reduction"] == pytest.approx(1)
+
+
+def test_estimate_mean_removes_variance_explained_by_the_control():
+    # GIVEN values that move exactly with their controls
+    values, controls = [11, 9, 13, 7], [1, -1, 3, -3]
+    # WHEN
+    estimate = estimate_mean(values, controls, 0, 1.0, is_controlled=True)
+    # THEN
+    assert estimate["mean"] == pytest.approx(10)
+    assert estimate["variance"] == pytest.approx(0)
+    assert estimate["variance_reduction"] == math.inf
+
+
+def test_variance_reduced_run_does_not_depend_on_worker_count_or_chunking():
+    # WHEN
+    result = run_variance_reduced(3, 100, 6, 1, 1, comparison={"belt_length": 4}, is_antithetic=True)
+    other_result = run_variance_reduced(3, 100, 6, 1, 2, comparison={"belt_length": 4}, is_antithetic=True,
+                                        chunk_size=1)
+    # THEN
+    assert result == other_result
+
+
+def test_identical_configurations_have_no_difference_with_common_random_numbers():
+    # WHEN
+    result = run_variance_reduced(3, 100, 5, 1, 1, comparison={"belt_length": 3})
+    # THEN
+    assert result["products"][0] == result["products"][1]
+    assert result["difference"]["mean"] == 0
+    assert result["difference"]["variance_reduction"] == math.inf
+
+
+def test_common_random_numbers_reduce_the_variance_of_a_difference():
+    # WHEN
+    result = run_variance_reduced(3, 500, 30, 1, 1, comparison={"belt_length": 4})
+    # THEN
+    assert result["replicas"] == 30
+    assert result["difference"]["variance_reduction"] > 5
+    assert result["products"][0]["variance_reduction"] == pytest.approx(1)
+
+
+def test_control_variate_reduces_the_variance_of_products():
+    # WHEN
+    result = run_variance_reduced(3, 500, 30, 1, 1, is_controlled=True)
+    # THEN
+    assert result["difference"] is None
+    assert result["products"][0]["variance_reduction"] > 1
+
+
+def test_antithetic_runs_come_in_pairs():
+    # WHEN
+    result = run_variance_reduced(3, 50, 6, 1, 1, is_antithetic=True)
+    # THEN
+    assert result["replicas"] == 6
+    with pytest.raises(ValueError):
+        run_variance_reduced(3, 50, 5, 1, 1, is_antithetic=True)
@@ -0,0 +1,70 @@
+import pytest
+
+from factory_simulator import vector
+from factory_simulator.belt import Belt
+from factory_simulator.enums import Item, Row
+from factory_simulator.factory import Factory
+from factory_simulator.inputs import RandomInputs
+
+
+def _sort_held(held):
+    return sorted(held, key=lambda item: item.value)
+
+
+@pytest.mark.parametrize(
+    "belt_length, assembly_ticks",
+    [(1, 1), (3, 1), (10, 1), (1, 2), (7, 3), (12, 5)]
+)
+def test_vector_factory_matches_factory_tick_by_tick(belt_length, assembly_ticks):
+    # GIVEN
+    factory = Factory(belt_length, Belt(RandomInputs(5)), is_silent=True, assembly_ticks=assembly_ticks)
+    vector_factory = vector.VectorFactory(belt_length, RandomInputs(5), assembly_ticks=assembly_ticks)
+    for _ in range(2000):
+        # WHEN
+        item_removed = factory.tick()
+        # THEN
+        assert vector_factory.tick() is item_removed
+        assert vector_factory.get_slots() == list(factory.belt.slots)
+        for row in (Row.TOP, Row.BOTTOM):
+            assert vector_factory.get_held(row) == [_sort_held(worker.held) for worker in factory.workers[row]]
+        assert vector_factory.get_assembling_workers() == sorted(
+            factory.get_assembling_workers(), key=lambda entry: (entry[0].value, entry[1])
+        )
+    assert vector_factory.tally.counts == factory.tally.counts
+
+
+def test_vector_factory_takes_given_items():
+    # GIVEN
+    vector_factory = vector.VectorFactory(2, lambda: Item.EMPTY)
+    # WHEN
+    outputs = [vector_factory.tick(item) for item in (Item.A, Item.A, Item.B, Item.A, Item.EMPTY)]
+    # THEN
+    assert outputs == [Item.EMPTY, Item.EMPTY, Item.EMPTY, Item.EMPTY, Item.EMPTY]
+    assert vector_factory.get_held(Row.TOP) == [[], [Item.A]]
+    assert vector_factory.get_held(Row.BOTTOM) == [[Item.A], []]
+    assert vector_factory.get_slots() == [Item.P, Item.EMPTY]
+
+
+def test_vector_factory_with_no_belt_passes_inputs_straight_through():
+    # GIVEN
+    vector_factory = vector.VectorFactory(0)
+    # THEN
+    assert vector_factory.tick(Item.A) is Item.A
+
+
+def test_vector_transitions_are_shared():
+    assert vector.build_transitions(3) is vector.build_transitions(3)
+
+
+def test_vector_transitions_are_bounded():
+    with pytest.raises(ValueError):
+        vector.build_transitions(vector.MAX_ASSEMBLY_TICKS + 1)
+
+
+def test_vector_replica_matches_factory_replica():
+    # GIVEN
+    factory = Factory(20, Belt(RandomInputs(9)), is_silent=True, assembly_ticks=4)
+    for _ in range(500):
+        factory.tick()
+    # THEN
+    assert vector.run_vector_replica(20, 500, 9, 4) == factory.tally.counts
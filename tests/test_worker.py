@@ -3,6 +3,7 @@ from unittest.mock import patch, Mock
 import pytest
 
 from factory_simulator.belt import Belt
+from factory_simulator.config import ASSEMBLY_TICKS
 from factory_simulator.enums import Row, Item
 from factory_simulator.worker import Worker
 
@@ -18,6 +19,8 @@ def test_worker_is_initialised_correctly():
     assert worker.row is row
     assert len(worker.held) is 0
     assert worker.NUMBER_OF_HANDS is 2
+    assert worker.assembly_ticks is ASSEMBLY_TICKS
+    assert worker.is_assembling is False
 
 
 def test_worker_can_place_product():
@@ -148,6 +151,62 @@ def test_worker_can_assemble():
     assert worker.held == [Item.P]
 
 
+def test_worker_starts_assembling_when_it_takes_more_than_one_tick():
+    # GIVEN
+    worker = Worker(0, Row.TOP, 3)
+    worker.held = [Item.A, Item.B]
+    # WHEN
+    action_taken = worker._assemble()
+    # THEN
+    assert action_taken is True
+    assert worker.is_assembling is True
+    assert worker.assembly_ticks_remaining == 2
+    assert worker.held == [Item.A, Item.B]
+
+
+def test_worker_finishes_assembling_after_assembly_ticks():
+    # GIVEN
+    belt = Belt()
+    belt.add_empty_item()
+    worker = Worker(0, Row.TOP, 3)
+    worker.held = [Item.A, Item.B]
+    worker._assemble()
+    # WHEN
+    actions_taken = [worker.take_action(belt), worker.take_action(belt)]
+    # THEN
+    assert actions_taken == [False, False]
+    assert worker.is_assembling is False
+    assert worker.held == [Item.P]
+
+
+def test_worker_does_not_touch_belt_while_assembling():
+    # GIVEN
+    belt = Belt()
+    belt.add_empty_item().move(Item.A)
+    worker = Worker(0, Row.TOP, 3)
+    worker.held = [Item.B]
+    worker.assembly_ticks_remaining = 2
+    # WHEN
+    action_taken = worker.take_action(belt)
+    # THEN
+    assert action_taken is False
+    assert worker.held == [Item.B]
+    assert worker.assembly_ticks_remaining == 1
+    assert belt.slots[0] is Item.A
+
+
+def test_worker_can_finish_assembly_early():
+    # GIVEN
+    worker = Worker(0, Row.TOP, 5)
+    worker.held = [Item.A, Item.B]
+    worker._assemble()
+    # WHEN
+    worker.finish_assembly()
+    # THEN
+    assert worker.is_assembling is False
+    assert worker.held == [Item.P]
+
+
 @pytest.mark.parametrize(
     "held",
     [[], [Item.A], [Item.B], [Item.P], [Item.P, Item.A], [Item.P, Item.B]]